@@ -0,0 +1,131 @@
+"""
+Archive tier for completed projects
+Completed projects untouched for a while are moved out of the hot `projects`
+collection into `archived_projects`, one small document per project holding
+the zlib-compressed project JSON, so per-user list queries only ever read
+active work.
+"""
+
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLLECTION = 'archived_projects'
+# Two writes per project (archive + delete) must fit in one 500-write batch
+ARCHIVE_BATCH_SIZE = 200
+
+
+def _encode(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def compress_project(data: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(data, default=_encode, separators=(",", ":")).encode(), 9)
+
+
+def decompress_project(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob))
+
+
+def archive_stale_projects(db, older_than_days: int, has_pending: Optional[Callable[[str], bool]] = None) -> int:
+    """Move completed projects untouched for `older_than_days` into the archive"""
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    projects_ref = db.collection('projects')
+    archived = 0
+
+    # Projects with writes still buffered on their way to Firestore wait for a later sweep
+    def settled(docs):
+        return [doc for doc in docs if has_pending is None or not has_pending(doc.id)]
+
+    # Skipped projects stay in the collection, so page past them
+    last_doc = None
+    while True:
+        query = (
+            projects_ref
+            .where('status', '==', 'completed')
+            .where('updated_at', '<', cutoff)
+            .order_by('updated_at')
+            .limit(ARCHIVE_BATCH_SIZE)
+        )
+        if last_doc is not None:
+            query = query.start_after(last_doc)
+        docs = list(query.stream())
+        if not docs:
+            break
+        last_doc = docs[-1]
+        ready = settled(docs)
+        if ready:
+            archived += _move_to_archive(db, ready)
+
+    # Projects saved before updated_at existed only have their save date
+    last_doc = None
+    while True:
+        query = (
+            projects_ref
+            .where('status', '==', 'completed')
+            .where('dateSaved', '<', cutoff.isoformat())
+            .order_by('dateSaved')
+            .limit(ARCHIVE_BATCH_SIZE)
+        )
+        if last_doc is not None:
+            query = query.start_after(last_doc)
+        docs = list(query.stream())
+        if not docs:
+            break
+        last_doc = docs[-1]
+        legacy = settled(doc for doc in docs if 'updated_at' not in doc.to_dict())
+        if legacy:
+            archived += _move_to_archive(db, legacy)
+
+    if archived:
+        logger.info("Archived stale projects", extra={"count": archived, "older_than_days": older_than_days})
+    return archived
+
+
+def _move_to_archive(db, docs) -> int:
+    archive_ref = db.collection(ARCHIVE_COLLECTION)
+    batch = db.batch()
+    now = datetime.now()
+    for doc in docs:
+        data = doc.to_dict()
+        data['id'] = doc.id
+        batch.set(archive_ref.document(doc.id), {
+            'user_id': data.get('user_id'),
+            'archived_at': now,
+            'data': compress_project(data)
+        })
+        # Fails the batch if the project changed since it was read, so no edit is lost
+        batch.delete(doc.reference, option=db.write_option(last_update_time=doc.update_time))
+    batch.commit()
+    return len(docs)
+
+
+def get_archived_projects(db, user_id: Optional[str]) -> List[Dict[str, Any]]:
+    """Archived projects for a user (or everyone), most recently archived first"""
+    query = db.collection(ARCHIVE_COLLECTION)
+    if user_id:
+        query = query.where('user_id', '==', user_id)
+    query = query.order_by('archived_at', direction='DESCENDING')
+    return [decompress_project(doc.to_dict()['data']) for doc in query.stream()]
+
+
+def load_archived_project(db, project_id: str) -> Optional[Dict[str, Any]]:
+    """An archived project's data, or None if it isn't archived"""
+    doc = db.collection(ARCHIVE_COLLECTION).document(project_id).get()
+    return decompress_project(doc.to_dict()['data']) if doc.exists else None
+
+
+def restore_project(db, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Move an archived project back into the active collection"""
+    data = dict(data, updated_at=datetime.now())
+    batch = db.batch()
+    batch.set(db.collection('projects').document(data['id']), data)
+    batch.delete(db.collection(ARCHIVE_COLLECTION).document(data['id']))
+    batch.commit()
+    return data
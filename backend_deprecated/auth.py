@@ -0,0 +1,146 @@
+"""
+Firebase ID token verification
+Signing keys are cached until the JWKS response's max-age runs out, and
+verified tokens are cached until they expire, so after the first request a
+token costs one hash and a dict lookup instead of an RSA signature check.
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from jose import jwk, jwt
+from jose.exceptions import JOSEError
+
+from cache import TTLCache
+
+FIREBASE_JWKS_URL = "https://www.googleapis.com/service_accounts/v1/jwk/securetoken@system.gserviceaccount.com"
+DEFAULT_KEYS_MAX_AGE = 3600.0
+# Don't hammer the JWKS endpoint when tokens carry an unknown key ID
+MIN_KEYS_REFRESH_INTERVAL = 60.0
+REJECTED_TOKEN_TTL = 30.0
+
+
+class AuthError(Exception):
+    """Raised when a bearer token cannot be verified"""
+
+
+class TokenVerifier:
+    """Verifies Firebase ID tokens with in-memory key and token caches"""
+
+    def __init__(
+        self,
+        project_id: str,
+        jwks_url: str = FIREBASE_JWKS_URL,
+        max_cached_tokens: int = 10000,
+        clock_skew: float = 60.0
+    ):
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self.jwks_url = jwks_url
+        self.clock_skew = clock_skew
+        self._keys: Dict[str, Any] = {}
+        self._keys_expire_at = 0.0
+        self._keys_fetched_at = 0.0
+        self._keys_lock: Optional[asyncio.Lock] = None
+        self._verified = TTLCache(maxsize=max_cached_tokens)
+        self._rejected = TTLCache(maxsize=max_cached_tokens, ttl=REJECTED_TOKEN_TTL)
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Return the token's claims, or raise AuthError"""
+        cache_key = hashlib.sha256(token.encode()).digest()
+        claims = self._verified.get(cache_key)
+        if claims is not None:
+            return claims
+
+        reason = self._rejected.get(cache_key)
+        if reason is not None:
+            raise AuthError(reason)
+
+        try:
+            claims = await self._verify_uncached(token)
+        except AuthError as e:
+            self._rejected.set(cache_key, str(e))
+            raise
+
+        # Keep the result only as long as the token itself is valid
+        ttl = claims["exp"] - time.time()
+        if ttl > 0:
+            self._verified.set(cache_key, claims, ttl=ttl)
+        return claims
+
+    def set_keys(self, jwks: Dict[str, Any], max_age: float = DEFAULT_KEYS_MAX_AGE):
+        """Install a JWKS document as the current signing keys"""
+        self._keys = {
+            key_data["kid"]: jwk.construct(key_data, key_data.get("alg", "RS256"))
+            for key_data in jwks.get("keys", [])
+        }
+        now = time.monotonic()
+        self._keys_fetched_at = now
+        self._keys_expire_at = now + max_age
+
+    async def _verify_uncached(self, token: str) -> Dict[str, Any]:
+        try:
+            header = jwt.get_unverified_header(token)
+        except JOSEError:
+            raise AuthError("Malformed token")
+
+        if header.get("alg") != "RS256":
+            raise AuthError("Unsupported token algorithm")
+
+        key = await self._get_key(header.get("kid"))
+        if key is None:
+            raise AuthError("Unknown token signing key")
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=self.issuer,
+                options={"leeway": self.clock_skew, "require_exp": True, "require_iat": True}
+            )
+        except JOSEError as e:
+            raise AuthError(f"Invalid token: {e}")
+
+        if not claims.get("sub"):
+            raise AuthError("Token has no subject")
+        claims["uid"] = claims["sub"]
+        return claims
+
+    async def _get_key(self, kid: Optional[str]):
+        now = time.monotonic()
+        key = self._keys.get(kid)
+        if key is not None and now < self._keys_expire_at:
+            return key
+
+        # Refresh on expiry, or early when a token names a key we haven't seen
+        if now >= self._keys_expire_at or now - self._keys_fetched_at >= MIN_KEYS_REFRESH_INTERVAL:
+            if self._keys_lock is None:
+                self._keys_lock = asyncio.Lock()
+            async with self._keys_lock:
+                if self._keys_fetched_at <= now:
+                    await self._refresh_keys()
+        return self._keys.get(kid)
+
+    async def _refresh_keys(self):
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(self.jwks_url)
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            self._keys_fetched_at = time.monotonic()
+            # Keep serving with the keys we have rather than locking everyone out
+            if self._keys:
+                return
+            raise AuthError(f"Could not fetch token signing keys: {e}")
+
+        max_age = DEFAULT_KEYS_MAX_AGE
+        match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        if match:
+            max_age = float(match.group(1))
+        self.set_keys(response.json(), max_age=max_age)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark bearer-token verification overhead per request
+
+Signs Firebase-style ID tokens with a throwaway RSA key and compares the
+first (signature-checking) verification with cached verifications.
+
+Usage: python bench_auth.py [requests]
+"""
+
+import asyncio
+import sys
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from auth import TokenVerifier
+
+PROJECT_ID = "bench-project"
+KEY_ID = "bench-key"
+
+
+def make_signing_key():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk.update({"kid": KEY_ID, "alg": "RS256"})
+    return private_pem, {"keys": [public_jwk]}
+
+
+def make_token(private_pem: bytes, uid: str) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": uid,
+        "iat": now,
+        "exp": now + 3600
+    }
+    return jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": KEY_ID})
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(n_requests: int):
+    private_pem, jwks = make_signing_key()
+    verifier = TokenVerifier(PROJECT_ID)
+    verifier.set_keys(jwks)
+
+    tokens = [make_token(private_pem, f"user-{i}") for i in range(100)]
+
+    cold = []
+    for token in tokens:
+        start = time.perf_counter()
+        await verifier.verify(token)
+        cold.append((time.perf_counter() - start) * 1e6)
+
+    warm = []
+    for i in range(n_requests):
+        token = tokens[i % len(tokens)]
+        start = time.perf_counter()
+        await verifier.verify(token)
+        warm.append((time.perf_counter() - start) * 1e6)
+
+    print(f"First verification:  p50 {percentile(cold, 50):8.1f} us  p99 {percentile(cold, 99):8.1f} us")
+    print(f"Cached verification: p50 {percentile(warm, 50):8.1f} us  p99 {percentile(warm, 99):8.1f} us")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
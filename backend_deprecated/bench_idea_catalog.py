@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark idea template scoring on a large synthetic catalog
+
+Usage: python bench_idea_catalog.py [templates] [requests]
+"""
+
+import random
+import sys
+import time
+
+from idea_catalog import DIFFICULTIES, TIME_BUCKETS, IdeaCatalog
+
+CATEGORIES = ["IoT", "Robotics", "Automation", "Environmental", "Energy", "AI/ML",
+              "Security", "Health", "Audio", "Wearables", "Agriculture", "Education"]
+
+
+def synthetic_templates(count: int, n_components: int = 200, seed: int = 7):
+    rng = random.Random(seed)
+    component_names = [f"Part {i}" for i in range(n_components)]
+    templates = []
+    for i in range(count):
+        templates.append({
+            "id": f"synthetic-{i}",
+            "title": f"Synthetic Project {i}",
+            "description": "Generated for benchmarking",
+            "difficulty": rng.choice(DIFFICULTIES),
+            "estimatedTime": rng.choice(TIME_BUCKETS),
+            "components": rng.sample(component_names, rng.randint(2, 8)),
+            "category": rng.choice(CATEGORIES),
+            "instructions": []
+        })
+    return templates, component_names
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    n_templates = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rng = random.Random(11)
+
+    templates, component_names = synthetic_templates(n_templates)
+    start = time.perf_counter()
+    catalog = IdeaCatalog(templates)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"Built catalog of {len(catalog)} templates in {build_ms:.1f} ms "
+          f"({catalog.features.nbytes / 1e6:.1f} MB feature matrix)")
+
+    timings = []
+    for _ in range(n_requests):
+        request = {
+            "skill": rng.choice(DIFFICULTIES),
+            "categories": rng.sample(CATEGORIES, rng.randint(0, 3)),
+            "components": rng.sample(component_names, rng.randint(0, 4)),
+            "time": rng.choice(TIME_BUCKETS)
+        }
+        start = time.perf_counter()
+        catalog.top_k(6, **request)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"Scored {n_requests} requests: p50 {percentile(timings, 50):.3f} ms, "
+          f"p95 {percentile(timings, 95):.3f} ms, p99 {percentile(timings, 99):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+In-process caching helpers
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a time-to-live"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class PartitionedCache:
+    """TTL caches per partition, so one busy partition can't evict the others
+
+    Keys are tuples whose first element names the partition (e.g. a tenant).
+    Each partition holds `maxsize` entries unless `quotas` sets its own size.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, quotas: Optional[Dict[str, int]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.quotas = quotas or {}
+        self._partitions: Dict[Hashable, TTLCache] = {}
+
+    def get(self, key: Tuple, default: Any = None) -> Any:
+        partition = self._partitions.get(key[0])
+        return partition.get(key, default) if partition is not None else default
+
+    def set(self, key: Tuple, value: Any, ttl: Optional[float] = None):
+        partition = self._partitions.get(key[0])
+        if partition is None:
+            partition = TTLCache(maxsize=self.quotas.get(key[0], self.maxsize), ttl=self.ttl)
+            self._partitions[key[0]] = partition
+        partition.set(key, value, ttl)
+
+    def delete(self, key: Tuple):
+        partition = self._partitions.get(key[0])
+        if partition is not None:
+            partition.delete(key)
+
+    def clear(self):
+        self._partitions.clear()
+
+    def sizes(self) -> Dict[Hashable, int]:
+        """Entries held per partition"""
+        return {name: len(partition) for name, partition in self._partitions.items()}
+
+    def __contains__(self, key: Tuple) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return sum(len(partition) for partition in self._partitions.values())
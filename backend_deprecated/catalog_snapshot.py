@@ -0,0 +1,159 @@
+"""
+Warm-start snapshots of the in-memory catalog indexes
+The component resolver and facet counts are written to a local file on
+shutdown and at intervals, together with the newest component `updated_at`
+they reflect. A new worker memory-maps the file, decodes each section
+straight from the mapping and only has to fetch components changed since
+that watermark, instead of rebuilding everything from Firestore.
+
+Layout: magic, format version and header length (struct `<8sII`), a JSON
+header with the watermark, section offsets and array descriptors, one JSON
+document per section, then the raw bytes of every NumPy array. Nothing is
+pickled, so a planted file can't run code in the workers that load it; at
+worst it is rejected or yields a wrong index until the next reconcile.
+Containers are tagged (`__tuple__`, `__set__`, `__dict__`, `__counter__`,
+`__array__`) so the indexes get back exactly the types they saved.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ATALSNAP"
+# Bump whenever a section's structure changes; older snapshots are then ignored
+SNAPSHOT_VERSION = 4
+_PREFIX = struct.Struct("<8sII")
+
+
+def as_utc(value: datetime) -> datetime:
+    """Naive datetimes are UTC, as the Firestore client stores them"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def write_snapshot(path: str, watermark: Optional[datetime], sections: Dict[str, Any]):
+    """Atomically replace the snapshot at `path`"""
+    arrays: List[np.ndarray] = []
+    blobs = {
+        name: json.dumps(_pack(state, arrays), separators=(",", ":")).encode()
+        for name, state in sections.items()
+    }
+    offsets = {}
+    position = 0
+    for name, blob in blobs.items():
+        offsets[name] = [position, len(blob)]
+        position += len(blob)
+    descriptors = []
+    for array in arrays:
+        descriptors.append([position, array.dtype.str, list(array.shape)])
+        position += array.nbytes
+    header = json.dumps({
+        "watermark": watermark.isoformat() if watermark is not None else None,
+        "written_at": datetime.now(timezone.utc).isoformat(),
+        "sections": offsets,
+        "arrays": descriptors
+    }).encode()
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for blob in blobs.values():
+            f.write(blob)
+        for array in arrays:
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> Optional[Tuple[Optional[datetime], Dict[str, Any]]]:
+    """(watermark, sections) from a snapshot, or None if missing, corrupt or outdated"""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                magic, version, header_length = _PREFIX.unpack_from(view)
+                if magic != MAGIC or version != SNAPSHOT_VERSION:
+                    logger.info("Ignoring incompatible catalog snapshot", extra={"path": path, "version": version})
+                    return None
+
+                start = _PREFIX.size + header_length
+                header = json.loads(bytes(view[_PREFIX.size:start]))
+                arrays = [
+                    _load_array(view, start + offset, dtype, shape) for offset, dtype, shape in header["arrays"]
+                ]
+                sections = {
+                    name: json.loads(
+                        bytes(view[start + offset:start + offset + length]),
+                        object_hook=lambda obj: _unpack(obj, arrays)
+                    )
+                    for name, (offset, length) in header["sections"].items()
+                }
+            finally:
+                view.release()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Unreadable catalog snapshot", extra={"path": path, "error": str(e)})
+        return None
+
+    watermark = datetime.fromisoformat(header["watermark"]) if header["watermark"] else None
+    return watermark, sections
+
+
+def _pack(value: Any, arrays: List[np.ndarray]) -> Any:
+    """JSON-ready form of an index structure; arrays are collected for the data area"""
+    if isinstance(value, np.ndarray):
+        arrays.append(np.ascontiguousarray(value))
+        return {"__array__": len(arrays) - 1}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Counter):
+        return {"__counter__": [[_pack(key, arrays), _pack(item, arrays)] for key, item in value.items()]}
+    if isinstance(value, dict):
+        # Tagged even with string keys, so a component ID can never pass for a tag
+        return {"__dict__": [[_pack(key, arrays), _pack(item, arrays)] for key, item in value.items()]}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_pack(item, arrays) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": [_pack(item, arrays) for item in value]}
+    if isinstance(value, list):
+        return [_pack(item, arrays) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Cannot snapshot value of type {type(value).__name__}")
+
+
+def _unpack(obj: Dict[str, Any], arrays: List[np.ndarray]) -> Any:
+    (tag, value), = obj.items()
+    if tag == "__dict__":
+        return {key: item for key, item in value}
+    if tag == "__counter__":
+        return Counter({key: item for key, item in value})
+    if tag == "__tuple__":
+        return tuple(value)
+    if tag == "__set__":
+        return set(value)
+    if tag == "__array__":
+        return arrays[value]
+    raise ValueError(f"Unknown snapshot tag {tag!r}")
+
+
+def _load_array(view: memoryview, offset: int, dtype: str, shape: List[int]) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    if dtype.hasobject:
+        raise ValueError("Snapshot arrays must be plain numeric data")
+    count = int(np.prod(shape, dtype=np.int64))
+    # Copied out, since the mapping is closed once the snapshot is read
+    return np.frombuffer(view, dtype=dtype, count=count, offset=offset).reshape(shape).copy()
@@ -0,0 +1,131 @@
+"""
+Circuit breaker and stale-while-revalidate reads
+After enough consecutive data-layer failures (errors or very slow calls) the
+breaker opens and calls fail immediately instead of tying up workers. After a
+cool-down one probe call is let through; its outcome closes the breaker or
+opens it again. While reads fail, the last good result for the same read is
+served, flagged as stale, and refreshed in the background.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable, Set, Tuple
+
+from cache import TTLCache
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The data layer is failing and calls are being short-circuited"""
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker, safe to use from executor threads"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, slow_call_ms: float = 5000.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_ms = slow_call_ms
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed"""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._probing = False
+            # A probe that never reported back (e.g. an unconsumed stream) expires
+            stuck = time.monotonic() - self._probe_started >= self.reset_timeout
+            if self._state == HALF_OPEN and (not self._probing or stuck):
+                self._probing = True
+                self._probe_started = time.monotonic()
+                return
+        raise CircuitOpenError("Data store unavailable; circuit is open")
+
+    def record_success(self, elapsed_ms: float = 0.0):
+        if elapsed_ms >= self.slow_call_ms:
+            self.record_failure()
+            return
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self._failures, "retry_after": round(self.retry_after(), 2)}
+
+
+class StaleWhileRevalidate:
+    """Remembers the last good result per read key to serve during outages"""
+
+    def __init__(self, breaker: CircuitBreaker, maxsize: int = 4096, ttl: float = 86400.0, cache=None):
+        self.breaker = breaker
+        # Any TTLCache-like store, e.g. a PartitionedCache keyed by tenant
+        self._last_good = cache if cache is not None else TTLCache(maxsize=maxsize, ttl=ttl)
+        self._revalidating: Set[Hashable] = set()
+
+    async def read(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """(result, stale); re-raises when the read fails and nothing was cached"""
+        try:
+            data = await fetch()
+        except Exception:
+            stale = self._last_good.get(key)
+            if stale is None:
+                raise
+            self._schedule_revalidation(key, fetch)
+            return stale, True
+
+        if data is not None:
+            self._last_good.set(key, data)
+        return data, False
+
+    def _schedule_revalidation(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]):
+        if key not in self._revalidating:
+            self._revalidating.add(key)
+            asyncio.ensure_future(self._revalidate(key, fetch))
+
+    async def _revalidate(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]):
+        try:
+            # Wait for the breaker's next probe window rather than failing fast again
+            await asyncio.sleep(self.breaker.retry_after())
+            data = await fetch()
+            if data is not None:
+                self._last_good.set(key, data)
+        except Exception:
+            pass
+        finally:
+            self._revalidating.discard(key)
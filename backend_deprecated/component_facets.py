@@ -0,0 +1,77 @@
+"""
+Facet counts for the component catalog
+Counts by category, availability and price bucket are adjusted as components
+are added, changed and removed, so reading them never touches Firestore.
+Search-narrowed counts filter the in-memory entries with the same matching
+rule as the component list endpoint.
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from pricing import price_bucket
+
+FACETS = ("category", "availability", "price")
+
+
+class ComponentFacets:
+    """Incrementally maintained facet counts"""
+
+    def __init__(self):
+        # component_id -> ((category, availability, price bucket), lowercased search text)
+        self._entries: Dict[str, Tuple[Tuple[str, str, str], str]] = {}
+        self._counts = {facet: Counter() for facet in FACETS}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, data: Dict[str, Any]):
+        """Count a component, replacing its previous values if it was already counted"""
+        self.remove(data['id'])
+        values = (
+            data.get('category') or '',
+            data.get('availability') or 'Available',
+            price_bucket(data.get('price_range'))
+        )
+        search_text = '\n'.join(
+            (data.get('name') or '', data.get('description') or '', data.get('category') or '')
+        ).lower()
+        self._entries[data['id']] = (values, search_text)
+        for facet, value in zip(FACETS, values):
+            self._counts[facet][value] += 1
+
+    def remove(self, component_id: str):
+        entry = self._entries.pop(component_id, None)
+        if entry is None:
+            return
+        for facet, value in zip(FACETS, entry[0]):
+            counts = self._counts[facet]
+            counts[value] -= 1
+            if counts[value] <= 0:
+                del counts[value]
+
+    def component_ids(self) -> List[str]:
+        return list(self._entries)
+
+    def export_state(self) -> Dict[str, Any]:
+        """Entries and counts for a warm-start snapshot"""
+        return {"entries": self._entries, "counts": self._counts}
+
+    def load_state(self, state: Dict[str, Any]):
+        self._entries = state["entries"]
+        self._counts = state["counts"]
+
+    def counts(self, search: Optional[str] = None) -> Dict[str, Any]:
+        """Facet counts for the whole catalog, or for components matching `search`"""
+        if not search:
+            return {"total": len(self._entries), **{facet: dict(self._counts[facet]) for facet in FACETS}}
+
+        search_term = search.lower()
+        counts = {facet: Counter() for facet in FACETS}
+        total = 0
+        for values, search_text in self._entries.values():
+            if search_term in search_text:
+                total += 1
+                for facet, value in zip(FACETS, values):
+                    counts[facet][value] += 1
+        return {"total": total, **{facet: dict(counts[facet]) for facet in FACETS}}
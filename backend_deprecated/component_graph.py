@@ -0,0 +1,171 @@
+"""
+Precomputed similar / compatible component graph
+Each component is encoded as a hashed feature vector (name and description
+words, category, specification keys). A rebuild computes every component's
+k nearest neighbours by cosine similarity, plus its most frequent partners
+in the idea templates, into fixed-width arrays; a lookup is then one row read.
+Rebuilds run in the background whenever the catalog has changed.
+"""
+
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FEATURE_DIMS = 1024
+CATEGORY_WEIGHT = 2.0
+SPEC_WEIGHT = 1.0
+TEXT_WEIGHT = 1.0
+# Rows of the similarity matrix computed at a time, bounding peak memory
+BLOCK_ROWS = 1024
+
+_STOPWORDS = {"a", "an", "and", "for", "of", "the", "to", "with", "in", "on", "by", "is", "it"}
+
+
+def _bucket(feature: str) -> int:
+    # Stable across processes, unlike hash()
+    return zlib.crc32(feature.encode()) % FEATURE_DIMS
+
+
+def component_features(data: Dict[str, Any]) -> Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]:
+    """(name, category, spec keys, words) used to place a component in the graph"""
+    text = f"{data.get('name') or ''} {data.get('description') or ''}".lower()
+    words = tuple(word for word in re.findall(r'[a-z0-9]+', text) if word not in _STOPWORDS)
+    specifications = data.get('specifications') or {}
+    spec_keys = tuple(sorted(key for key, value in specifications.items() if value))
+    return data.get('name') or '', data.get('category') or '', spec_keys, words
+
+
+class ComponentGraph:
+    """k-nearest-neighbour and co-occurrence lists per component"""
+
+    def __init__(self, k: int = 8):
+        self.k = k
+        self.dirty = False
+        self._features: Dict[str, Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]] = {}
+        # Built arrays, swapped in together: ids, row lookup, (n, k) neighbour rows and scores
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._similar = np.full((0, k), -1, dtype=np.int32)
+        self._similar_scores = np.zeros((0, k), dtype=np.float32)
+        self._compatible = np.full((0, k), -1, dtype=np.int32)
+        self._compatible_counts = np.zeros((0, k), dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, data: Dict[str, Any]):
+        features = component_features(data)
+        if self._features.get(data['id']) != features:
+            self._features[data['id']] = features
+            self.dirty = True
+
+    def remove(self, component_id: str):
+        if self._features.pop(component_id, None) is not None:
+            self.dirty = True
+
+    def features(self) -> Dict[str, Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]]:
+        """Copy of the current features, for a rebuild off the event loop"""
+        self.dirty = False
+        return dict(self._features)
+
+    def export_state(self) -> Dict[str, Any]:
+        return {
+            "features": self._features,
+            "built": (self._ids, self._similar, self._similar_scores, self._compatible, self._compatible_counts)
+        }
+
+    def load_state(self, state: Dict[str, Any]):
+        self._features = state["features"]
+        self._install(*state["built"])
+
+    def build(
+        self,
+        features: Dict[str, Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]],
+        groups: Iterable[Iterable[str]] = ()
+    ) -> tuple:
+        """Compute neighbour arrays; `groups` are sets of IDs used together (e.g. in a template)"""
+        ids = list(features)
+        rows = {component_id: row for row, component_id in enumerate(ids)}
+        n = len(ids)
+        k = self.k
+
+        # Inverse document frequency keeps common words from dominating text similarity
+        document_frequency = Counter(word for _, _, _, words in features.values() for word in set(words))
+        matrix = np.zeros((n, FEATURE_DIMS), dtype=np.float32)
+        for row, component_id in enumerate(ids):
+            _, category, spec_keys, words = features[component_id]
+            if category:
+                matrix[row, _bucket(f"category:{category.lower()}")] += CATEGORY_WEIGHT
+            for key in spec_keys:
+                matrix[row, _bucket(f"spec:{key}")] += SPEC_WEIGHT
+            for word, count in Counter(words).items():
+                matrix[row, _bucket(f"word:{word}")] += TEXT_WEIGHT * count * np.log(1 + n / document_frequency[word])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        similar = np.full((n, k), -1, dtype=np.int32)
+        similar_scores = np.zeros((n, k), dtype=np.float32)
+        width = min(k, n - 1)
+        for start in range(0, n, BLOCK_ROWS):
+            block = matrix[start:start + BLOCK_ROWS] @ matrix.T
+            block[np.arange(block.shape[0]), np.arange(start, start + block.shape[0])] = -np.inf
+            if width <= 0:
+                continue
+            top = np.argpartition(-block, width - 1, axis=1)[:, :width]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            similar[start:start + block.shape[0], :width] = np.take_along_axis(top, order, axis=1)
+            similar_scores[start:start + block.shape[0], :width] = np.take_along_axis(top_scores, order, axis=1)
+
+        partners: Dict[int, Counter] = {}
+        for group in groups:
+            members = sorted({rows[component_id] for component_id in group if component_id in rows})
+            for row in members:
+                partners.setdefault(row, Counter()).update(other for other in members if other != row)
+        compatible = np.full((n, k), -1, dtype=np.int32)
+        compatible_counts = np.zeros((n, k), dtype=np.int32)
+        for row, counts in partners.items():
+            for column, (other, count) in enumerate(counts.most_common(k)):
+                compatible[row, column] = other
+                compatible_counts[row, column] = count
+
+        return ids, similar, similar_scores, compatible, compatible_counts
+
+    def install(self, built: tuple):
+        """Swap in arrays produced by build()"""
+        self._install(*built)
+
+    def _install(self, ids, similar, similar_scores, compatible, compatible_counts):
+        self._ids = ids
+        self._rows = {component_id: row for row, component_id in enumerate(ids)}
+        self._similar = similar
+        self._similar_scores = similar_scores
+        self._compatible = compatible
+        self._compatible_counts = compatible_counts
+
+    def neighbors(self, component_id: str, limit: int = 8) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Similar and compatible components, or None if the component isn't in the graph"""
+        ids = self._ids
+        row = self._rows.get(component_id)
+        # Removed components keep their row until the next rebuild
+        if row is None or component_id not in self._features:
+            return None
+
+        similar = [
+            {"id": ids[other], "name": self._name(ids[other]), "score": round(float(score), 4)}
+            for other, score in zip(self._similar[row, :limit], self._similar_scores[row, :limit])
+            if other >= 0 and score > 0 and ids[other] in self._features
+        ]
+        compatible = [
+            {"id": ids[other], "name": self._name(ids[other]), "count": int(count)}
+            for other, count in zip(self._compatible[row, :limit], self._compatible_counts[row, :limit])
+            if other >= 0 and ids[other] in self._features
+        ]
+        return {"similar": similar, "compatible": compatible}
+
+    def _name(self, component_id: str) -> str:
+        features = self._features.get(component_id)
+        return features[0] if features is not None else ''
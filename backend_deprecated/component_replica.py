@@ -0,0 +1,152 @@
+"""
+Live in-memory replica of a Firestore collection
+A snapshot listener streams adds, modifications and removals into a local
+dict, so catalog reads never leave the process and writes made by other
+instances arrive within the listener's latency. If the listener dies it is
+re-subscribed with backoff; the first snapshot after that is treated as a
+full resync, dropping documents that disappeared while it was down. After
+each full snapshot `on_sync` gets the complete set of live IDs, so indexes
+restored from elsewhere can drop documents the replica never saw.
+
+`subscribe(callback)` is injectable for tests and emulator runs. It must
+return a handle with `unsubscribe()` and an `is_active` attribute, like the
+Watch object returned by `CollectionReference.on_snapshot`.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ComponentReplica:
+    """Listener-fed copy of one collection with change hooks"""
+
+    def __init__(
+        self,
+        db,
+        collection: str,
+        on_upsert: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_remove: Optional[Callable[[str], None]] = None,
+        on_sync: Optional[Callable[[Set[str]], None]] = None,
+        subscribe: Optional[Callable] = None,
+        check_interval: float = 1.0,
+        max_backoff: float = 60.0
+    ):
+        self.collection = collection
+        self.on_upsert = on_upsert
+        self.on_remove = on_remove
+        self.on_sync = on_sync
+        self.check_interval = check_interval
+        self.max_backoff = max_backoff
+        self._subscribe = subscribe or (lambda callback: db.collection(collection).on_snapshot(callback))
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watch = None
+        self._resync = True
+        self._monitor: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once the first full snapshot has been applied"""
+        return self._ready.is_set()
+
+    async def start(self, timeout: float = 10.0):
+        """Subscribe and wait (up to `timeout`, 0 to not wait) for the initial snapshot"""
+        self._loop = asyncio.get_running_loop()
+        self._listen()
+        self._monitor = asyncio.ensure_future(self._watch_listener())
+        if timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Replica not ready yet; serving from Firestore", extra={"collection": self.collection})
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        self._unsubscribe()
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        data = self._documents.get(doc_id)
+        return dict(data) if data is not None else None
+
+    def values(self) -> Iterable[Dict[str, Any]]:
+        return self._documents.values()
+
+    def upsert(self, data: Dict[str, Any]):
+        """Apply a document locally, e.g. right after this instance wrote it"""
+        self._documents[data['id']] = data
+        if self.on_upsert is not None:
+            self.on_upsert(data)
+
+    def remove(self, doc_id: str):
+        if self._documents.pop(doc_id, None) is not None and self.on_remove is not None:
+            self.on_remove(doc_id)
+
+    def _listen(self):
+        self._resync = True
+        self._watch = self._subscribe(self._on_snapshot)
+
+    def _unsubscribe(self):
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception:
+                pass
+            self._watch = None
+
+    def _on_snapshot(self, documents, changes, read_time):
+        # Called on the listener's thread; apply on the event loop
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._apply, list(documents), list(changes))
+
+    def _apply(self, documents: List, changes: List):
+        if self._resync:
+            # Full snapshot: replace everything
+            current = {}
+            for doc in documents:
+                data = doc.to_dict()
+                data['id'] = doc.id
+                current[doc.id] = data
+            for doc_id in [doc_id for doc_id in self._documents if doc_id not in current]:
+                self.remove(doc_id)
+            for data in current.values():
+                self.upsert(data)
+            if self.on_sync is not None:
+                self.on_sync(set(current))
+            self._resync = False
+            self._ready.set()
+            logger.info("Replica synced", extra={"collection": self.collection, "count": len(current)})
+            return
+
+        for change in changes:
+            doc = change.document
+            if change.type.name == 'REMOVED':
+                self.remove(doc.id)
+            else:
+                data = doc.to_dict()
+                data['id'] = doc.id
+                self.upsert(data)
+
+    async def _watch_listener(self):
+        """Re-subscribe with backoff whenever the listener stops"""
+        backoff = self.check_interval
+        while True:
+            await asyncio.sleep(self.check_interval)
+            if self._watch is not None and getattr(self._watch, 'is_active', True):
+                backoff = self.check_interval
+                continue
+
+            logger.warning("Replica listener stopped; resubscribing", extra={"collection": self.collection})
+            self._unsubscribe()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+            try:
+                self._listen()
+            except Exception as e:
+                logger.error("Replica resubscribe failed", extra={"collection": self.collection, "error": str(e)})
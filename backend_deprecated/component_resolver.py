@@ -0,0 +1,132 @@
+"""
+Fuzzy resolution of free-form component names to catalog IDs
+Generator requests and saved projects name components loosely ("ESP32",
+"Servo Motor", "dht-22"). Each catalog component is indexed under its ID, its
+name and the leading words of its name, all reduced to lowercase
+alphanumerics and split into trigrams, so a lookup only scores aliases that
+share a trigram with the query.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Leading name words indexed as extra aliases ("Servo Motor SG90" -> "servo", "servomotor")
+MAX_PREFIX_WORDS = 3
+MIN_ALIAS_LENGTH = 3
+
+
+def compact_name(text: str) -> str:
+    """Lowercase alphanumerics only, so 'DHT-22' and 'dht22' compare equal"""
+    return re.sub(r'[^a-z0-9]', '', text.lower())
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def name_aliases(component_id: str, name: str) -> Set[str]:
+    words = re.findall(r'[a-z0-9]+', name.lower())
+    aliases = {compact_name(component_id), ''.join(words)}
+    for count in range(1, min(len(words), MAX_PREFIX_WORDS) + 1):
+        aliases.add(''.join(words[:count]))
+    return {alias for alias in aliases if len(alias) >= MIN_ALIAS_LENGTH}
+
+
+class ComponentResolver:
+    """Trigram alias index over catalog component names"""
+
+    def __init__(self, min_score: float = 0.45, memo_size: int = 4096):
+        self.min_score = min_score
+        self.memo_size = memo_size
+        # Alias slots: (component_id, trigram count); None once removed, until reused
+        self._slots: List[Optional[Tuple[str, int]]] = []
+        self._free: List[int] = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._component_slots: Dict[str, List[Tuple[int, Set[str]]]] = {}
+        self._memo: Dict[str, Optional[Tuple[str, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._component_slots)
+
+    def add(self, component_id: str, name: str):
+        """Index a component, replacing any previous aliases for it"""
+        self.remove(component_id)
+        slots = []
+        for alias in sorted(name_aliases(component_id, name)):
+            grams = trigrams(alias)
+            if self._free:
+                slot = self._free.pop()
+                self._slots[slot] = (component_id, len(grams))
+            else:
+                slot = len(self._slots)
+                self._slots.append((component_id, len(grams)))
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(slot)
+            slots.append((slot, grams))
+        self._component_slots[component_id] = slots
+        self._memo.clear()
+
+    def remove(self, component_id: str):
+        slots = self._component_slots.pop(component_id, None)
+        if not slots:
+            return
+        for slot, grams in slots:
+            self._slots[slot] = None
+            self._free.append(slot)
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(slot)
+                    if not postings:
+                        del self._postings[gram]
+        self._memo.clear()
+
+    def export_state(self) -> Dict[str, Any]:
+        """Index structures for a warm-start snapshot"""
+        return {"slots": self._slots, "postings": self._postings, "component_slots": self._component_slots}
+
+    def load_state(self, state: Dict[str, Any]):
+        self._slots = state["slots"]
+        self._postings = state["postings"]
+        self._component_slots = state["component_slots"]
+        self._free = [slot for slot, entry in enumerate(self._slots) if entry is None]
+        self._memo.clear()
+
+    def resolve(self, text: str) -> Optional[Tuple[str, float]]:
+        """Best matching (component_id, score) for a free-form name, or None"""
+        key = compact_name(text)
+        if not key:
+            return None
+        if key in self._memo:
+            return self._memo[key]
+
+        grams = trigrams(key)
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        best = None
+        best_score = self.min_score
+        for slot, count in shared.items():
+            component_id, size = self._slots[slot]
+            # Dice coefficient over trigram sets
+            score = 2 * count / (len(grams) + size)
+            if score > best_score or (best is not None and score == best_score and component_id < best):
+                best, best_score = component_id, score
+        result = (best, round(best_score, 3)) if best is not None else None
+
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[key] = result
+        return result
+
+    def resolve_ids(self, names: Iterable[str]) -> Dict[str, str]:
+        """Map each resolvable name to its component ID"""
+        resolved = {}
+        for name in names:
+            match = self.resolve(name)
+            if match is not None:
+                resolved[name] = match[0]
+        return resolved
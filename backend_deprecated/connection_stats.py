@@ -0,0 +1,59 @@
+"""
+Connection reuse statistics
+ASGI doesn't report connection open/close events for HTTP, so a connection
+is identified by the client's (host, port) pair: a request from a pair seen
+within the keep-alive window reused an existing connection.
+"""
+
+from typing import Any, Dict
+
+from cache import TTLCache
+
+
+class ConnectionStats:
+    """Counts requests and how many of them arrived on a reused connection"""
+
+    def __init__(self, keep_alive: float, max_tracked: int = 65536):
+        # A little slack past the server's keep-alive timeout
+        self._connections = TTLCache(maxsize=max_tracked, ttl=keep_alive + 1.0)
+        self.requests = 0
+        self.connections = 0
+        self.reused_requests = 0
+
+    def record(self, client):
+        self.requests += 1
+        if client is None:
+            self.connections += 1
+            return
+
+        served = self._connections.get(client)
+        if served is None:
+            self.connections += 1
+            self._connections.set(client, 1)
+        else:
+            self.reused_requests += 1
+            self._connections.set(client, served + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "connections": self.connections,
+            "reused_requests": self.reused_requests,
+            "reuse_ratio": self.reused_requests / self.requests if self.requests else 0.0,
+            "requests_per_connection": self.requests / self.connections if self.connections else 0.0,
+            "open_connections_estimate": len(self._connections)
+        }
+
+
+class ConnectionStatsMiddleware:
+    """ASGI middleware feeding ConnectionStats"""
+
+    def __init__(self, app, stats: ConnectionStats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            client = scope.get("client")
+            self.stats.record(tuple(client) if client else None)
+        await self.app(scope, receive, send)
@@ -0,0 +1,94 @@
+"""
+Request coalescing for single-document Firestore reads
+Concurrent reads of the same document share one backend call, and distinct
+IDs requested within a short window are fetched together with get_all().
+Reads are keyed by tenant as well as ID, so tenants never share a result.
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import scheduler
+from tenancy import tenant_for, use_tenant
+
+
+class DocumentLoader:
+    """Single-flight, micro-batched loader for one Firestore collection"""
+
+    def __init__(self, db, collection: str, window: float = 0.002, max_batch: int = 100):
+        self.db = db
+        self.collection = collection
+        self.window = window
+        self.max_batch = max_batch
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._queue: List[Tuple[str, str]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def load(self, doc_id: str) -> Optional[Dict]:
+        """Load one document, joining any in-flight read for the same ID"""
+        key = (tenant_for(self.collection), doc_id)
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._enqueue(key)
+        # Shield so a cancelled caller doesn't cancel the read for everyone else
+        data = await asyncio.shield(future)
+        return dict(data) if data is not None else None
+
+    async def load_many(self, doc_ids: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Load several documents; IDs queued together go out in one get_all"""
+        unique_ids = list(dict.fromkeys(doc_ids))
+        results = await asyncio.gather(*(self.load(doc_id) for doc_id in unique_ids))
+        return dict(zip(unique_ids, results))
+
+    def _enqueue(self, key: Tuple[str, str]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        self._queue.append(key)
+
+        if len(self._queue) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._queue = self._queue, []
+        if batch:
+            asyncio.ensure_future(self._fetch(batch))
+
+    async def _fetch(self, keys: List[Tuple[str, str]]):
+        try:
+            results = await scheduler.run(scheduler.INTERACTIVE, self._get_all, keys)
+        except Exception as e:
+            for key in keys:
+                future = self._inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in keys:
+            future = self._inflight.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(results.get(key))
+
+    def _get_all(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[Dict]]:
+        by_tenant: Dict[str, List[str]] = {}
+        for tenant, doc_id in keys:
+            by_tenant.setdefault(tenant, []).append(doc_id)
+
+        results: Dict[Tuple[str, str], Optional[Dict]] = {key: None for key in keys}
+        for tenant, doc_ids in by_tenant.items():
+            with use_tenant(tenant):
+                collection_ref = self.db.collection(self.collection)
+            refs = [collection_ref.document(doc_id) for doc_id in doc_ids]
+            for doc in self.db.get_all(refs):
+                if doc.exists:
+                    data = doc.to_dict()
+                    data['id'] = doc.id
+                    results[(tenant, doc.id)] = data
+        return results
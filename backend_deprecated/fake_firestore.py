@@ -0,0 +1,293 @@
+"""
+In-memory stand-in for the Firestore client
+Implements the subset of the client API this backend uses (collections and
+subcollections, documents, where / order_by / select / limit / start_after
+queries, get_all, write batches and last-update-time preconditions), with an
+optional fixed latency per backend round trip.
+Used by replay_traffic.py to run the app offline.
+"""
+
+import copy
+import operator
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge
+}
+
+
+def _comparable(value: Any) -> Any:
+    # The Firestore client stores and returns naive datetimes as UTC
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class FakeWriteOption:
+    """Precondition for a write, as returned by FakeFirestore.write_option()"""
+
+    def __init__(self, last_update_time: Optional[datetime] = None, exists: Optional[bool] = None):
+        self.last_update_time = last_update_time
+        self.exists = exists
+
+    def check(self, reference: "FakeDocumentReference"):
+        """Raise ValueError unless the document still matches; caller holds the lock"""
+        exists = reference.id in reference._db._collection(reference.parent.path)
+        if self.exists is not None and exists != self.exists:
+            raise ValueError(f"Precondition failed: {reference._path} exists={exists}")
+        if self.last_update_time is not None and reference._db._update_times.get(reference._path) != self.last_update_time:
+            raise ValueError(f"Precondition failed: {reference._path} was updated since it was read")
+
+
+class FakeDocumentSnapshot:
+    def __init__(
+        self,
+        reference: "FakeDocumentReference",
+        data: Optional[Dict[str, Any]],
+        update_time: Optional[datetime] = None
+    ):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self.update_time = update_time
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class FakeQuery:
+    def __init__(self, collection: "FakeCollectionReference", filters=(), order=(), fields=None, limit=None, after=None):
+        self._parent = collection
+        self._filters = list(filters)
+        self._order = list(order)
+        self._fields = fields
+        self._limit = limit
+        self._after = after
+
+    def _with(self, **changes) -> "FakeQuery":
+        state = {
+            "filters": self._filters,
+            "order": self._order,
+            "fields": self._fields,
+            "limit": self._limit,
+            "after": self._after,
+            **changes
+        }
+        return FakeQuery(self._parent, **state)
+
+    def where(self, field: str, op: str, value: Any) -> "FakeQuery":
+        return self._with(filters=self._filters + [(field, op, value)])
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "FakeQuery":
+        return self._with(order=self._order + [(field, direction == "DESCENDING")])
+
+    def select(self, fields: List[str]) -> "FakeQuery":
+        return self._with(fields=list(fields))
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._with(limit=count)
+
+    def start_after(self, snapshot: FakeDocumentSnapshot) -> "FakeQuery":
+        return self._with(after=snapshot)
+
+    def stream(self) -> Iterator[FakeDocumentSnapshot]:
+        db = self._parent._db
+        db._round_trip()
+        with db._lock:
+            update_times = {
+                doc_id: db._update_times.get(f"{self._parent.path}/{doc_id}") for doc_id in db._collection(self._parent.path)
+            }
+            rows = [
+                (doc_id, data) for doc_id, data in db._collection(self._parent.path).items()
+                if all(
+                    field in data and _OPERATORS[op](_comparable(data[field]), _comparable(value))
+                    for field, op, value in self._filters
+                )
+            ]
+            rows = copy.deepcopy(rows)
+        # A cursor is a position in the ordering, so it holds even if its document is gone
+        after = self._after
+        if after is not None and all(doc_id != after.id for doc_id, _ in rows):
+            rows.append((after.id, after._data or {}))
+        # Ties are broken by document ID, as in Firestore
+        rows.sort(key=lambda row: row[0])
+        for field, descending in reversed(self._order):
+            rows.sort(key=lambda row: _comparable(row[1].get(field)), reverse=descending)
+        if after is not None:
+            ids = [doc_id for doc_id, _ in rows]
+            rows = rows[ids.index(after.id) + 1:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+
+        for doc_id, data in rows:
+            if self._fields is not None:
+                data = {key: value for key, value in data.items() if key in self._fields}
+            yield FakeDocumentSnapshot(self._parent.document(doc_id), data, update_times.get(doc_id))
+
+    def get(self) -> List[FakeDocumentSnapshot]:
+        return list(self.stream())
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, db: "FakeFirestore", collection_id: str, path: Optional[str] = None):
+        self._db = db
+        self.id = collection_id
+        self.path = path or collection_id
+        super().__init__(self)
+
+    def document(self, doc_id: str) -> "FakeDocumentReference":
+        return FakeDocumentReference(self, doc_id)
+
+    def list_documents(self) -> Iterator["FakeDocumentReference"]:
+        """Stored documents plus those that only parent a subcollection; lazy, like the client's"""
+        self._db._round_trip()
+        prefix = self.path + "/"
+        with self._db._lock:
+            doc_ids = set(self._db._collection(self.path))
+            doc_ids.update(
+                path[len(prefix):].split("/", 1)[0]
+                for path, documents in self._db._data.items() if documents and path.startswith(prefix)
+            )
+        for doc_id in sorted(doc_ids):
+            yield self.document(doc_id)
+
+
+class FakeDocumentReference:
+    def __init__(self, parent: FakeCollectionReference, doc_id: str):
+        self.parent = parent
+        self.id = doc_id
+
+    @property
+    def _db(self) -> "FakeFirestore":
+        return self.parent._db
+
+    def collection(self, collection_id: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self._db, collection_id, f"{self.parent.path}/{self.id}/{collection_id}")
+
+    def get(self) -> FakeDocumentSnapshot:
+        self._db._round_trip()
+        return self._read()
+
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        self._db._round_trip()
+        self._write(data, merge)
+
+    def update(self, data: Dict[str, Any]):
+        self._db._round_trip()
+        with self._db._lock:
+            documents = self._db._collection(self.parent.path)
+            if self.id not in documents:
+                raise KeyError(f"No document to update: {self.parent.path}/{self.id}")
+            documents[self.id].update(copy.deepcopy(data))
+            self._db._touch(self._path)
+
+    def delete(self, option: Optional[FakeWriteOption] = None):
+        self._db._round_trip()
+        with self._db._lock:
+            if option is not None:
+                option.check(self)
+            self._drop()
+
+    @property
+    def _path(self) -> str:
+        return f"{self.parent.path}/{self.id}"
+
+    def _read(self) -> FakeDocumentSnapshot:
+        with self._db._lock:
+            data = self._db._collection(self.parent.path).get(self.id)
+            return FakeDocumentSnapshot(self, copy.deepcopy(data), self._db._update_times.get(self._path))
+
+    def _write(self, data: Dict[str, Any], merge: bool = False):
+        with self._db._lock:
+            documents = self._db._collection(self.parent.path)
+            if merge and self.id in documents:
+                documents[self.id].update(copy.deepcopy(data))
+            else:
+                documents[self.id] = copy.deepcopy(data)
+            self._db._touch(self._path)
+
+    def _remove(self):
+        with self._db._lock:
+            self._drop()
+
+    def _drop(self):
+        # Callers hold the lock
+        self._db._collection(self.parent.path).pop(self.id, None)
+        self._db._update_times.pop(self._path, None)
+
+
+class FakeWriteBatch:
+    def __init__(self, db: "FakeFirestore"):
+        self._db = db
+        self._writes = []
+        self._preconditions = []
+
+    def set(self, reference: FakeDocumentReference, data: Dict[str, Any], merge: bool = False):
+        self._writes.append(lambda: reference._write(data, merge))
+
+    def update(self, reference: FakeDocumentReference, data: Dict[str, Any]):
+        self._writes.append(lambda: reference._write(data, merge=True))
+
+    def delete(self, reference: FakeDocumentReference, option: Optional[FakeWriteOption] = None):
+        self._writes.append(reference._remove)
+        if option is not None:
+            self._preconditions.append((reference, option))
+
+    def commit(self):
+        """Apply every write, or none if a precondition fails"""
+        self._db._round_trip()
+        with self._db._lock:
+            for reference, option in self._preconditions:
+                option.check(reference)
+        for write in self._writes:
+            write()
+
+
+class FakeFirestore:
+    """Thread-safe in-memory client with a fixed per-call latency"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Document path -> last write time, strictly increasing
+        self._update_times: Dict[str, datetime] = {}
+        self._clock = datetime.min.replace(tzinfo=timezone.utc)
+
+    def collection(self, collection_id: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, collection_id)
+
+    def get_all(self, references: List[FakeDocumentReference]) -> Iterator[FakeDocumentSnapshot]:
+        """Lazy, like the client's: the round trip happens once iteration starts"""
+        self._round_trip()
+        for reference in references:
+            yield reference._read()
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def write_option(self, last_update_time: Optional[datetime] = None, exists: Optional[bool] = None) -> FakeWriteOption:
+        return FakeWriteOption(last_update_time, exists)
+
+    def _collection(self, path: str) -> Dict[str, Dict[str, Any]]:
+        return self._data.setdefault(path, {})
+
+    def _touch(self, path: str):
+        # Callers hold the lock
+        self._clock = max(datetime.now(timezone.utc), self._clock + timedelta(microseconds=1))
+        self._update_times[path] = self._clock
+
+    def _round_trip(self):
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
@@ -3,11 +3,14 @@ Firebase configuration and initialization
 TODO: Replace with your actual Firebase configuration
 """
 
+import logging
 import os
 from firebase_admin import credentials, firestore, initialize_app
 import firebase_admin
 from decouple import config
 
+logger = logging.getLogger(__name__)
+
 # Firebase Service Account Configuration
 # TODO: Replace these with your actual Firebase service account details
 FIREBASE_CONFIG = {
@@ -30,10 +33,10 @@ def initialize_firebase():
         if not firebase_admin._apps:
             cred = credentials.Certificate(FIREBASE_CONFIG)
             initialize_app(cred)
-            print("Firebase initialized successfully")
+            logger.info("Firebase initialized successfully")
         return firestore.client()
     except Exception as e:
-        print(f"Error initializing Firebase: {e}")
+        logger.error("Error initializing Firebase", extra={"error": str(e)})
         # For development, you can return None and handle gracefully
         return None
 
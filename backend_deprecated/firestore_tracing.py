@@ -0,0 +1,261 @@
+"""
+Instrumented Firestore client
+Wraps the client so every call that goes over the network (document reads
+and writes, query streams, get_all, batch commits) is counted and timed
+against the current request.
+"""
+
+import inspect
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from google.api_core import exceptions as api_exceptions
+
+from circuit_breaker import CircuitBreaker
+from request_context import request_stats, route_name
+
+logger = logging.getLogger(__name__)
+
+# Methods that return another client object to keep instrumenting
+_CHAINED = {
+    "collection", "document", "collection_group", "parent",
+    "where", "limit", "limit_to_last", "offset", "order_by", "select",
+    "start_at", "start_after", "end_at", "end_before"
+}
+# Methods that make a backend round trip
+_CALLS = {"get", "set", "create", "update", "delete", "stream", "get_all", "collections", "list_documents"}
+# Errors that mean the backend is unhealthy, as opposed to e.g. NotFound
+_UNAVAILABLE = (
+    api_exceptions.ServerError,
+    api_exceptions.TooManyRequests,
+    api_exceptions.RetryError,
+    ConnectionError,
+    TimeoutError
+)
+
+
+def _unwrap(value: Any) -> Any:
+    if isinstance(value, _Traced):
+        return value._target
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+
+def record_call(operation: str, collection: Optional[str], elapsed_ms: float):
+    stats = request_stats.get()
+    if stats is not None:
+        stats.firestore_calls += 1
+        stats.firestore_ms += elapsed_ms
+        stats.firestore_ops[(operation, collection)] += 1
+
+
+def _collection_of(target) -> Optional[str]:
+    """Best-effort collection name for a reference or query"""
+    parent = getattr(target, "_parent", None)  # queries
+    if parent is not None:
+        return getattr(parent, "id", None)
+    if hasattr(target, "document"):  # collection references
+        return getattr(target, "id", None)
+    parent = getattr(target, "parent", None)  # document references
+    return getattr(parent, "id", None) if parent is not None else None
+
+
+def _record_outcome(breaker: Optional[CircuitBreaker], error: Optional[BaseException], elapsed_ms: float):
+    if breaker is None:
+        return
+    if isinstance(error, _UNAVAILABLE):
+        breaker.record_failure()
+    else:
+        breaker.record_success(elapsed_ms)
+
+
+def _timed_iteration(results, operation: str, collection: Optional[str], started: float, breaker: Optional[CircuitBreaker]):
+    # stream(), get_all() and friends are generators: the RPC happens while
+    # iterating, so time and judge the whole iteration, not the call
+    error = None
+    try:
+        yield from results
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        record_call(operation, collection, elapsed_ms)
+        _record_outcome(breaker, error, elapsed_ms)
+
+
+class _Traced:
+    __slots__ = ("_target", "_breaker")
+
+    def __init__(self, target, breaker: Optional[CircuitBreaker] = None):
+        self._target = target
+        self._breaker = breaker
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        breaker = self._breaker
+        if name == "batch":
+            return lambda *args, **kwargs: _TracedBatch(attr(*args, **kwargs), breaker)
+        if name in _CHAINED:
+            if not callable(attr):
+                return _Traced(attr, breaker) if attr is not None else None
+            return lambda *args, **kwargs: _Traced(attr(*_unwrap(args), **kwargs), breaker)
+        if name in _CALLS:
+            def call(*args, **kwargs):
+                if breaker is not None:
+                    breaker.before_call()
+                started = time.perf_counter()
+                collection = _collection_of(self._target)
+                error = None
+                result = None
+                try:
+                    result = attr(*_unwrap(args), **kwargs)
+                    if inspect.isgenerator(result):
+                        return _timed_iteration(result, name, collection, started, breaker)
+                    return result
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    if not inspect.isgenerator(result):
+                        elapsed_ms = (time.perf_counter() - started) * 1000
+                        record_call(name, collection, elapsed_ms)
+                        _record_outcome(breaker, error, elapsed_ms)
+            return call
+        return attr
+
+    def __repr__(self) -> str:
+        return f"Traced({self._target!r})"
+
+
+class _TracedBatch:
+    """Write batch; only commit() reaches the backend"""
+
+    __slots__ = ("_target", "_breaker")
+
+    def __init__(self, target, breaker: Optional[CircuitBreaker] = None):
+        self._target = target
+        self._breaker = breaker
+
+    def set(self, reference, *args, **kwargs):
+        return self._target.set(_unwrap(reference), *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        return self._target.update(_unwrap(reference), *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        return self._target.delete(_unwrap(reference), *args, **kwargs)
+
+    def create(self, reference, *args, **kwargs):
+        return self._target.create(_unwrap(reference), *args, **kwargs)
+
+    def commit(self, *args, **kwargs):
+        if self._breaker is not None:
+            self._breaker.before_call()
+        started = time.perf_counter()
+        error = None
+        try:
+            return self._target.commit(*args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            record_call("commit", None, elapsed_ms)
+            _record_outcome(self._breaker, error, elapsed_ms)
+
+
+def traced_client(client, breaker: Optional[CircuitBreaker] = None):
+    """Wrap a Firestore client (or None, in development mode), optionally behind a circuit breaker"""
+    return _Traced(client, breaker) if client is not None else None
+
+
+class FirestoreProfiler:
+    """Per-route Firestore call statistics with budget and N+1 warnings"""
+
+    def __init__(self, call_budget: int = 5, repeat_threshold: int = 3):
+        self.call_budget = call_budget
+        self.repeat_threshold = repeat_threshold
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, route: str, stats) -> List[str]:
+        """Fold one finished request into the report; returns any warnings"""
+        entry = self._routes.setdefault(route, {
+            "requests": 0,
+            "calls_total": 0,
+            "calls_max": 0,
+            "firestore_ms_total": 0.0,
+            "over_budget": 0,
+            "repeated_calls": {}
+        })
+        entry["requests"] += 1
+        entry["calls_total"] += stats.firestore_calls
+        entry["calls_max"] = max(entry["calls_max"], stats.firestore_calls)
+        entry["firestore_ms_total"] += stats.firestore_ms
+
+        warnings = []
+        if stats.firestore_calls > self.call_budget:
+            entry["over_budget"] += 1
+            warnings.append(f"{stats.firestore_calls} Firestore calls exceeds budget of {self.call_budget}")
+        for (operation, collection), count in stats.firestore_ops.items():
+            # The same call repeated within one request usually means a call inside a loop
+            if count >= self.repeat_threshold and operation != "commit":
+                key = f"{operation} {collection}"
+                entry["repeated_calls"][key] = max(entry["repeated_calls"].get(key, 0), count)
+                warnings.append(f"possible N+1: {key} called {count} times")
+        return warnings
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for route, entry in sorted(self._routes.items()):
+            requests = entry["requests"]
+            report[route] = {
+                "requests": requests,
+                "calls_avg": round(entry["calls_total"] / requests, 2),
+                "calls_max": entry["calls_max"],
+                "firestore_ms_avg": round(entry["firestore_ms_total"] / requests, 2),
+                "over_budget": entry["over_budget"],
+                "repeated_calls": dict(entry["repeated_calls"])
+            }
+        return report
+
+    def check_budgets(self, budgets: Dict[str, int]) -> List[str]:
+        """Routes whose worst request made more calls than allowed, for benchmark gates"""
+        return [
+            f"{route}: {entry['calls_max']} calls > {budgets[route]}"
+            for route, entry in self._routes.items()
+            if route in budgets and entry["calls_max"] > budgets[route]
+        ]
+
+    def reset(self):
+        self._routes.clear()
+
+
+class FirestoreProfilerMiddleware:
+    """Feeds each request's Firestore stats to a FirestoreProfiler
+
+    Must sit inside RequestLoggingMiddleware, which sets up the request stats.
+    """
+
+    def __init__(self, app, profiler: FirestoreProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stats = request_stats.get()
+            if stats is not None:
+                route = route_name(scope)
+                for warning in self.profiler.record(route, stats):
+                    logger.warning(
+                        warning,
+                        extra={"firestore_calls": stats.firestore_calls, "firestore_ms": round(stats.firestore_ms, 2)}
+                    )
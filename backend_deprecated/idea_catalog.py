@@ -0,0 +1,216 @@
+"""
+Project idea template catalog with vectorized scoring
+Templates are encoded once into a column-major feature matrix (one-hot
+components, categories, difficulty and time bucket) so a generation request
+is scored against every template with a couple of NumPy operations.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+TIME_BUCKETS = ["lt-2h", "2-5h", "5-10h", "10h-plus"]
+
+# Difficulty / time levels a request accepts besides an exact match,
+# mirroring the filters in the Next.js generate route
+ADJACENT_DIFFICULTIES = {
+    "beginner": ["intermediate"],
+    "intermediate": [],
+    "advanced": ["intermediate"]
+}
+ADJACENT_TIME_BUCKETS = {
+    "10h-plus": ["5-10h"]
+}
+
+COMPONENT_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+EXACT_LEVEL_WEIGHT = 1.0
+ADJACENT_LEVEL_WEIGHT = 0.5
+
+# Relevance vs. novelty trade-off for diversified ranking (1.0 = plain top-k)
+DIVERSITY_LAMBDA = 0.7
+# Diversified ranking only re-ranks this many best-scoring candidates per result
+DIVERSITY_POOL_FACTOR = 8
+
+
+def normalize_name(name: str) -> str:
+    """Canonical form used to match component and category names"""
+    key = re.sub(r"[^a-z0-9]+", "", name.lower())
+    # "Servo Motors" and "Servo Motor" are the same part
+    if len(key) > 3 and key.endswith("s") and not key.endswith("ss"):
+        key = key[:-1]
+    return key
+
+
+class IdeaCatalog:
+    """Idea templates plus the feature matrix used to rank them"""
+
+    def __init__(self, templates: Sequence[Dict[str, Any]]):
+        self.templates = list(templates)
+
+        self.component_names: List[str] = []
+        self.component_columns: Dict[str, int] = {}
+        self.category_names: List[str] = []
+        self.category_columns: Dict[str, int] = {}
+        for template in self.templates:
+            for name in template["components"]:
+                self._add_vocab(name, self.component_names, self.component_columns)
+            self._add_vocab(template["category"], self.category_names, self.category_columns)
+
+        n_components = len(self.component_names)
+        n_categories = len(self.category_names)
+        self.category_offset = n_components
+        self.difficulty_offset = self.category_offset + n_categories
+        self.time_offset = self.difficulty_offset + len(DIFFICULTIES)
+        width = self.time_offset + len(TIME_BUCKETS)
+
+        # Column-major so gathering the handful of columns a request touches is contiguous
+        self.features = np.zeros((len(self.templates), width), dtype=np.float32, order="F")
+        self.component_counts = np.zeros(len(self.templates), dtype=np.float32)
+        rows, cols = [], []
+        for row, template in enumerate(self.templates):
+            template_columns = {
+                self.component_columns[normalize_name(name)] for name in template["components"]
+            }
+            template_columns.add(self.category_offset + self.category_columns[normalize_name(template["category"])])
+            if template["difficulty"] in DIFFICULTIES:
+                template_columns.add(self.difficulty_offset + DIFFICULTIES.index(template["difficulty"]))
+            if template["estimatedTime"] in TIME_BUCKETS:
+                template_columns.add(self.time_offset + TIME_BUCKETS.index(template["estimatedTime"]))
+            rows.extend([row] * len(template_columns))
+            cols.extend(template_columns)
+            self.component_counts[row] = len(template["components"])
+        self.features[rows, cols] = 1.0
+
+    @classmethod
+    def from_file(cls, path: str) -> "IdeaCatalog":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def score(
+        self,
+        skill: Optional[str] = None,
+        categories: Optional[List[str]] = None,
+        components: Optional[List[str]] = None,
+        time: Optional[str] = None
+    ) -> np.ndarray:
+        """Score every template against a generation request"""
+        # Each requested component counts once, however many vocabulary entries it matches
+        component_groups = [
+            self._matching_columns([name], self.component_names)
+            for name in (components or []) if normalize_name(name)
+        ]
+        n_requested = len(component_groups)
+        component_cols = sorted({col for cols in component_groups for col in cols})
+
+        weighted_cols: List[int] = []
+        weights: List[float] = []
+        for col in self._matching_columns(categories or [], self.category_names, one_way=True):
+            weighted_cols.append(self.category_offset + col)
+            weights.append(CATEGORY_WEIGHT)
+        if skill in DIFFICULTIES:
+            weighted_cols.append(self.difficulty_offset + DIFFICULTIES.index(skill))
+            weights.append(EXACT_LEVEL_WEIGHT)
+            for level in ADJACENT_DIFFICULTIES[skill]:
+                weighted_cols.append(self.difficulty_offset + DIFFICULTIES.index(level))
+                weights.append(ADJACENT_LEVEL_WEIGHT)
+        if time in TIME_BUCKETS:
+            weighted_cols.append(self.time_offset + TIME_BUCKETS.index(time))
+            weights.append(EXACT_LEVEL_WEIGHT)
+            for bucket in ADJACENT_TIME_BUCKETS.get(time, []):
+                weighted_cols.append(self.time_offset + TIME_BUCKETS.index(bucket))
+                weights.append(ADJACENT_LEVEL_WEIGHT)
+
+        block = self.features[:, component_cols + weighted_cols]
+        scores = block[:, len(component_cols):] @ np.asarray(weights, dtype=np.float32)
+        if component_cols:
+            position = {col: i for i, col in enumerate(component_cols)}
+            matches = np.zeros(len(self.templates), dtype=np.float32)
+            for cols in component_groups:
+                if len(cols) == 1:
+                    matches += block[:, position[cols[0]]]
+                elif cols:
+                    matches += block[:, [position[col] for col in cols]].max(axis=1)
+            scores += COMPONENT_WEIGHT * matches / np.maximum(n_requested, self.component_counts)
+        return scores
+
+    def top_k(self, k: int, **request) -> List[int]:
+        """Indices of the k best-scoring templates, best first"""
+        scores = self.score(**request)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        # Keep every template tied with the k-th score so ties break by index, not by partition order
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        candidates = np.flatnonzero(scores >= threshold)
+        order = np.lexsort((candidates, -scores[candidates]))[:k]
+        return candidates[order].tolist()
+
+    def diverse_top_k(self, k: int, diversity: float = DIVERSITY_LAMBDA, **request) -> List[int]:
+        """Top-k by maximal marginal relevance over component and category overlap"""
+        scores = self.score(**request)
+        pool_size = min(len(scores), max(k * DIVERSITY_POOL_FACTOR, 32))
+        k = min(k, pool_size)
+        if k <= 0:
+            return []
+        threshold = scores[np.argpartition(-scores, pool_size - 1)[pool_size - 1]]
+        pool = np.flatnonzero(scores >= threshold)
+        pool = pool[np.lexsort((pool, -scores[pool]))][:pool_size]
+
+        relevance = scores[pool]
+        top = relevance[0]
+        if top > 0:
+            relevance = relevance / top
+
+        # Unit-length component + category vectors, so dot products are cosine similarities
+        vectors = np.ascontiguousarray(self.features[pool, :self.difficulty_offset])
+        norms = np.linalg.norm(vectors, axis=1)
+        vectors /= np.where(norms > 0, norms, 1.0)[:, None]
+
+        # Similarity to the closest already-picked idea, updated one pick at a time
+        max_similarity = np.zeros(pool_size, dtype=np.float32)
+        available = np.ones(pool_size, dtype=bool)
+        selected = []
+        for _ in range(k):
+            marginal = diversity * relevance - (1.0 - diversity) * max_similarity
+            marginal[~available] = -np.inf
+            pick = int(np.argmax(marginal))
+            selected.append(int(pool[pick]))
+            available[pick] = False
+            np.maximum(max_similarity, vectors @ vectors[pick], out=max_similarity)
+        return selected
+
+    def missing_components(self, index: int, components: Optional[List[str]]) -> List[str]:
+        """Template components that none of the requested components cover"""
+        owned = [key for key in (normalize_name(name) for name in (components or [])) if key]
+        missing = []
+        for name in self.templates[index]["components"]:
+            key = normalize_name(name)
+            if not any(key in owned_key or owned_key in key for owned_key in owned):
+                missing.append(name)
+        return missing
+
+    def _matching_columns(self, names: List[str], vocab: List[str], one_way: bool = False) -> List[int]:
+        # Substring matching happens against the vocabulary, never per template
+        columns = set()
+        for name in names:
+            key = normalize_name(name)
+            if not key:
+                continue
+            for col, vocab_key in enumerate(vocab):
+                if key in vocab_key or (not one_way and vocab_key in key):
+                    columns.add(col)
+        return sorted(columns)
+
+    @staticmethod
+    def _add_vocab(name: str, names: List[str], columns: Dict[str, int]):
+        key = normalize_name(name)
+        if key not in columns:
+            columns[key] = len(names)
+            names.append(key)
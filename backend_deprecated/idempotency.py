@@ -0,0 +1,83 @@
+"""
+Idempotency-Key handling for create endpoints
+The first request with a given key runs normally and its result is kept for
+a while; repeats with the same key get that result back without touching
+Firestore, and repeats that arrive while the first is still running wait for
+it instead of creating a second document. With a shared cache tier the first
+request claims its key there, so a repeat that lands on another worker waits
+for the result too. Reusing a key with a different payload is rejected.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from shared_cache import TieredCache
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request"""
+    pass
+
+
+class IdempotencyStore:
+    """Completed results in a bounded TTL cache, in-flight requests collapsed"""
+
+    def __init__(self, cache: TieredCache, claim_ttl: float = 60.0, poll_interval: float = 0.05):
+        self.cache = cache
+        # How long a worker may hold a key before the others assume it died
+        self.claim_ttl = claim_ttl
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, fingerprint: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `func` once per key; repeats get the first call's result"""
+        stored = self.cache.get(key)
+        if stored is not None:
+            return self._replay(stored, fingerprint)
+
+        future = self._inflight.get(key)
+        if future is not None:
+            return self._replay(await asyncio.shield(future), fingerprint)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            stored = await self._claim(key)
+            if stored is None:
+                try:
+                    result = await func()
+                    stored = (fingerprint, result)
+                    self.cache.set(key, stored)
+                finally:
+                    # After the result is stored, so waiting workers find it
+                    self.cache.release(key)
+        except BaseException as e:
+            # Failures aren't stored, so a retry runs again
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(stored)
+        return self._replay(stored, fingerprint)
+
+    async def _claim(self, key: str) -> Optional[Tuple[str, Any]]:
+        """Claim the key across workers, or return the result another worker stored meanwhile"""
+        while not self.cache.claim(key, self.claim_ttl):
+            # Another worker is running this request; wait for its result or for its claim to lapse
+            await asyncio.sleep(self.poll_interval)
+            stored = self.cache.get(key)
+            if stored is not None:
+                return stored
+
+        # The previous holder may have stored its result just before releasing the claim
+        stored = self.cache.get(key)
+        if stored is not None:
+            self.cache.release(key)
+        return stored
+
+    def _replay(self, stored: Tuple[str, Any], fingerprint: str) -> Any:
+        if stored[0] != fingerprint:
+            raise IdempotencyConflict("Idempotency-Key was already used with a different request body")
+        return stored[1]
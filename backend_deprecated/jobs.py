@@ -0,0 +1,331 @@
+"""
+Background job queue with pollable results
+Jobs are processed by a pool of asyncio workers. Job state lives in a
+result store, either in-process or in SQLite so queued jobs survive a
+restart and results can be read by other processes. Several processes can
+share one SQLite store: a job is claimed atomically before it runs, and the
+running worker renews a lease on it, so only jobs whose owner has died or
+whose lease has run out are picked up again.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """True if the process named in a 'pid:token' owner is still running"""
+    pid = (owner or "").split(":", 1)[0]
+    if not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class InMemoryJobStore:
+    """Job records kept in a dict; lost on restart"""
+
+    def __init__(self, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._finished_at: Dict[str, float] = {}
+
+    def create(self, job: Dict[str, Any]):
+        self._prune()
+        self._jobs[job["id"]] = dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    def update(self, job_id: str, **fields):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields, updated_at=_now())
+        if job["status"] in FINISHED_STATES:
+            self._finished_at[job_id] = time.monotonic()
+
+    def claim(self, job_id: str, owner: str, lease: float) -> bool:
+        """Mark a queued job as running; False if it isn't queued any more"""
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != QUEUED:
+            return False
+        job.update(status=RUNNING, updated_at=_now())
+        return True
+
+    def renew(self, job_id: str, owner: str, lease: float):
+        pass
+
+    def requeue_abandoned(self) -> int:
+        # Jobs in this store belong to this process, so none are abandoned
+        return 0
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        return [dict(job) for job in self._jobs.values() if job["status"] not in FINISHED_STATES]
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.ttl
+        for job_id, finished_at in list(self._finished_at.items()):
+            if finished_at < cutoff:
+                self._jobs.pop(job_id, None)
+                del self._finished_at[job_id]
+
+
+class SQLiteJobStore:
+    """Job records kept in a SQLite database file"""
+
+    def __init__(self, path: str, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                finished_at REAL,
+                owner TEXT,
+                lease_expires REAL
+            )
+            """
+        )
+        # Databases created before jobs were claimed lack the ownership columns
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_expires", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def create(self, job: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (time.time() - self.ttl,)
+            )
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job["id"], job["status"], json.dumps(job["payload"]), job["created_at"], job["updated_at"])
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, payload, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def update(self, job_id: str, **fields):
+        columns = {"updated_at": _now()}
+        for key, value in fields.items():
+            columns[key] = json.dumps(value) if key in ("payload", "result") else value
+        if fields.get("status") in FINISHED_STATES:
+            columns["finished_at"] = time.time()
+
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*columns.values(), job_id)
+            )
+
+    def claim(self, job_id: str, owner: str, lease: float) -> bool:
+        """Mark a queued job as running under `owner`; False if another worker got it first"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_expires = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, owner, time.time() + lease, _now(), job_id, QUEUED)
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, job_id: str, owner: str, lease: float):
+        """Extend the lease on a job this owner is running"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND owner = ? AND status = ?",
+                (time.time() + lease, job_id, owner, RUNNING)
+            )
+
+    def requeue_abandoned(self) -> int:
+        """Put running jobs back in the queue if their owner died or stopped renewing"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, owner, lease_expires FROM jobs WHERE status = ?", (RUNNING,)
+            ).fetchall()
+            requeued = 0
+            now = time.time()
+            for job_id, owner, lease_expires in rows:
+                if (lease_expires or 0) > now and _owner_alive(owner):
+                    continue
+                # Conditional on the owner, in case it renewed or finished meanwhile
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, updated_at = ? "
+                    "WHERE id = ? AND status = ? AND owner IS ? AND lease_expires IS ?",
+                    (QUEUED, _now(), job_id, RUNNING, owner, lease_expires)
+                )
+                requeued += cursor.rowcount
+        return requeued
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, status, payload, result, error, created_at, updated_at FROM jobs "
+                "WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING)
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    @staticmethod
+    def _to_job(row) -> Dict[str, Any]:
+        job_id, status, payload, result, error, created_at, updated_at = row
+        return {
+            "id": job_id,
+            "status": status,
+            "payload": json.loads(payload),
+            "result": json.loads(result) if result is not None else None,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+
+class JobQueue:
+    """Runs submitted jobs on a fixed pool of asyncio workers"""
+
+    def __init__(
+        self,
+        store,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        workers: int = 4,
+        poll_interval: float = 0.25,
+        lease: float = 60.0
+    ):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._done_events: Dict[str, asyncio.Event] = {}
+
+    async def start(self):
+        """Start the workers and pick up queued jobs, including ones abandoned by dead workers"""
+        self._queue = asyncio.Queue()
+        self.store.requeue_abandoned()
+        for job in self.store.unfinished():
+            # Running jobs belong to a live worker; queued ones go to whoever claims them first
+            if job["status"] == QUEUED:
+                self._enqueue(job["id"], job["payload"])
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a job and return its record"""
+        now = _now()
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": QUEUED,
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        self.store.create(job)
+        self._enqueue(job["id"], payload)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Return the job once it has finished or the timeout has passed"""
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED_STATES or timeout <= 0:
+            return job
+
+        deadline = time.monotonic() + timeout
+        event = self._done_events.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            job = self.store.get(job_id)
+            if job is None or job["status"] in FINISHED_STATES:
+                return job
+
+        # Job is owned by another process sharing the store; poll it
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            job = self.store.get(job_id)
+            if job is None or job["status"] in FINISHED_STATES:
+                break
+        return job
+
+    def _enqueue(self, job_id: str, payload: Dict[str, Any]):
+        self._done_events[job_id] = asyncio.Event()
+        self._queue.put_nowait((job_id, payload))
+
+    async def _worker(self):
+        while True:
+            job_id, payload = await self._queue.get()
+            if not self.store.claim(job_id, self.owner, self.lease):
+                # Another worker is running it; local waiters fall back to polling
+                event = self._done_events.pop(job_id, None)
+                if event is not None:
+                    event.set()
+                self._queue.task_done()
+                continue
+
+            heartbeat = asyncio.ensure_future(self._renew_lease(job_id))
+            try:
+                result = await self.handler(payload)
+                self.store.update(job_id, status=SUCCEEDED, result=result)
+            except Exception as e:
+                self.store.update(job_id, status=FAILED, error=str(e))
+            finally:
+                heartbeat.cancel()
+                event = self._done_events.pop(job_id, None)
+                if event is not None:
+                    event.set()
+                self._queue.task_done()
+
+    async def _renew_lease(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            self.store.renew(job_id, self.owner, self.lease)
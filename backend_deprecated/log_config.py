@@ -0,0 +1,188 @@
+"""
+Structured JSON logging
+Records are handed to a background thread through a queue, so a log call on
+the event loop never waits on stdout. Every line carries the request ID and
+route of the request that produced it.
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from starlette.requests import Request
+
+from request_context import RequestStats, request_id, request_stats, route, route_name
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+access_logger = logging.getLogger("atal.access")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request's context in the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id.get()
+        if not hasattr(record, "route"):
+            record.route = route.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Formatted before the record crossed the queue
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the traceback out of the message
+
+    The stock prepare() folds the formatted traceback into `msg`; this keeps
+    `msg` to the message itself and carries the traceback as `exc_text`.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Traceback objects pin frames and don't pickle; send the text
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: str = "INFO"):
+    """Route the root logger through a non-blocking queue to a JSON stdout handler"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Flush queued records; call on shutdown"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse 'GET /api/components=0.1,GET /=0' into per-route sample rates"""
+    rates = {}
+    for item in spec.split(","):
+        if "=" in item:
+            key, rate = item.rsplit("=", 1)
+            rates[key.strip()] = float(rate)
+    return rates
+
+
+async def bind_route(request: Request):
+    """App-wide dependency exposing the matched route to log lines inside handlers"""
+    route.set(route_name(request.scope))
+
+
+class RequestLoggingMiddleware:
+    """Assigns request IDs and writes one sampled access-log line per request"""
+
+    def __init__(self, app, sample_rates: Optional[Dict[str, float]] = None, slow_ms: float = 1000.0):
+        self.app = app
+        self.sample_rates = sample_rates or {}
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                incoming_id = value.decode("latin-1")[:64]
+                break
+        current_id = incoming_id or uuid.uuid4().hex
+        stats = RequestStats()
+        id_token = request_id.set(current_id)
+        stats_token = request_stats.set(stats)
+        route_token = route.set(None)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", current_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            name = route_name(scope)
+            route.set(name)
+            if self._should_log(name, status_code, latency_ms):
+                access_logger.info(
+                    "request",
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "latency_ms": round(latency_ms, 2),
+                        "firestore_calls": stats.firestore_calls
+                    }
+                )
+            route.reset(route_token)
+            request_stats.reset(stats_token)
+            request_id.reset(id_token)
+
+    def _should_log(self, name: str, status_code: int, latency_ms: float) -> bool:
+        # Errors and slow requests are always logged
+        if status_code >= 500 or latency_ms >= self.slow_ms:
+            return True
+        rate = self.sample_rates.get(name, 1.0)
+        return rate >= 1.0 or random.random() < rate
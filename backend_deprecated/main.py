@@ -1,22 +1,59 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Response, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, List, Optional, Dict, Any, Set
 import firebase_admin
 from firebase_admin import credentials, firestore
+import hashlib
+import math
 import json
+import logging
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
 import asyncio
 import httpx
 
+import settings
+import archive
+from auth import AuthError, TokenVerifier
+from body_limit import BodySizeLimitMiddleware
+from cache import PartitionedCache
+from circuit_breaker import CircuitBreaker, CircuitOpenError, StaleWhileRevalidate
+from catalog_snapshot import as_utc, read_snapshot, write_snapshot
+from component_facets import ComponentFacets
+from component_graph import ComponentGraph
+from component_replica import ComponentReplica
+from component_resolver import ComponentResolver
+from connection_stats import ConnectionStats, ConnectionStatsMiddleware
+from document_loader import DocumentLoader
+from firestore_tracing import FirestoreProfiler, FirestoreProfilerMiddleware, traced_client
+from idea_catalog import IdeaCatalog
+from idempotency import IdempotencyConflict, IdempotencyStore
+from jobs import InMemoryJobStore, JobQueue, SQLiteJobStore
+from pricing import BomEstimator
+from queries import components_query, projects_query
+import scheduler
+from scheduler import InteractiveLatencyMiddleware
+from log_config import RequestLoggingMiddleware, bind_route, parse_sample_rates, setup_logging, stop_logging
+from shared_cache import SharedCache, TieredCache, default_shared_cache_path
+from tenancy import DEFAULT_TENANT, RoutedClient, current_tenant, for_each_tenant, parse_quotas, valid_tenant
+from traffic_capture import TrafficCaptureMiddleware, TrafficRecorder
+from write_behind import WriteBehindBuffer
+
+# Structured logging
+setup_logging(settings.LOG_LEVEL)
+logger = logging.getLogger("atal")
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Atal Idea Generator API",
     description="AI-powered STEM project generator API",
-    version="1.0.0"
+    version="1.0.0",
+    dependencies=[Depends(bind_route)]
 )
 
 # CORS middleware
@@ -28,8 +65,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Keep-alive connection reuse, per worker process
+connection_stats = ConnectionStats(keep_alive=settings.KEEP_ALIVE_TIMEOUT)
+app.add_middleware(ConnectionStatsMiddleware, stats=connection_stats)
+
+# Reject oversized bodies before they are buffered and parsed
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=settings.MAX_BODY_BYTES)
+
+# Per-route Firestore call profiling (dev and test runs)
+firestore_profiler = FirestoreProfiler(
+    call_budget=settings.FIRESTORE_CALL_BUDGET,
+    repeat_threshold=settings.FIRESTORE_REPEAT_THRESHOLD
+) if settings.FIRESTORE_PROFILING else None
+if firestore_profiler is not None:
+    app.add_middleware(FirestoreProfilerMiddleware, profiler=firestore_profiler)
+
+# Interactive read latency drives backoff of background work
+scheduler.configure(
+    workers={
+        scheduler.INTERACTIVE: settings.INTERACTIVE_WORKERS,
+        scheduler.BATCH: settings.BATCH_WORKERS,
+        scheduler.MAINTENANCE: settings.MAINTENANCE_WORKERS
+    },
+    p95_threshold_ms=settings.INTERACTIVE_P95_THRESHOLD_MS,
+    max_wait=settings.BACKGROUND_MAX_DEFERRAL
+)
+app.add_middleware(InteractiveLatencyMiddleware)
+
+# Opt-in sanitized traffic capture, replayable with replay_traffic.py
+traffic_recorder = TrafficRecorder(settings.TRAFFIC_CAPTURE_PATH) if settings.TRAFFIC_CAPTURE else None
+if traffic_recorder is not None:
+    app.add_middleware(TrafficCaptureMiddleware, recorder=traffic_recorder, sample_rate=settings.TRAFFIC_CAPTURE_SAMPLE)
+
+# Request IDs and access logging; outermost so latency covers everything
+app.add_middleware(
+    RequestLoggingMiddleware,
+    sample_rates=parse_sample_rates(settings.LOG_SAMPLE_RATES),
+    slow_ms=settings.LOG_SLOW_MS
+)
+
 # Security
-security = HTTPBearer()
+security = HTTPBearer(auto_error=False)
+token_verifier = TokenVerifier(settings.FIREBASE_PROJECT_ID)
 
 # Firebase initialization
 # TODO: Replace with your Firebase service account key
@@ -47,19 +124,88 @@ FIREBASE_CONFIG = {
     "client_x509_cert_url": "your-client-cert-url"
 }
 
+# Short-circuits Firestore calls while it is failing or very slow
+data_breaker = CircuitBreaker(
+    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+    slow_call_ms=settings.CIRCUIT_SLOW_CALL_MS
+)
+# Last good reads are partitioned per tenant so a busy school can't evict the others
+stale_reads = StaleWhileRevalidate(data_breaker, cache=PartitionedCache(
+    maxsize=settings.TENANT_CACHE_SIZE,
+    ttl=settings.STALE_READ_TTL,
+    quotas=parse_quotas(settings.TENANT_CACHE_QUOTAS)
+))
+
 # Initialize Firebase (only if not already initialized)
 try:
     if not firebase_admin._apps:
         cred = credentials.Certificate(FIREBASE_CONFIG)
         firebase_admin.initialize_app(cred)
-    db = firestore.client()
-    print("Firebase initialized successfully")
+    # Projects and users live under each tenant; see tenancy.py
+    db = RoutedClient(traced_client(firestore.client(), data_breaker))
+    logger.info("Firebase initialized successfully")
 except Exception as e:
-    print(f"Firebase initialization failed: {e}")
-    print("Running in development mode without Firebase")
+    logger.warning(
+        "Firebase initialization failed; running in development mode without Firebase",
+        extra={"error": str(e)}
+    )
     db = None
 
+# Coalesced single-document readers for hot lookups
+component_loader = DocumentLoader(db, 'components')
+user_loader = DocumentLoader(db, 'users')
+
+# Cache tier shared across worker processes, so every worker sees component writes
+shared_cache = SharedCache(settings.SHARED_CACHE_PATH or default_shared_cache_path()) if settings.SHARED_CACHE else None
+
+# Recently read component documents, keyed by ID
+component_cache = TieredCache('components', shared_cache, maxsize=2048, ttl=300)
+
+# Generated ideas, keyed by a hash of the generation request
+generation_cache = TieredCache('generation', shared_cache, maxsize=512, ttl=settings.GENERATION_CACHE_TTL)
+MAX_BATCH_GET_IDS = 100
+
+# Results of create requests sent with an Idempotency-Key
+idempotent_requests = IdempotencyStore(
+    TieredCache('idempotency', shared_cache, maxsize=settings.IDEMPOTENCY_MAX_KEYS, ttl=settings.IDEMPOTENCY_TTL),
+    claim_ttl=settings.IDEMPOTENCY_CLAIM_TTL
+)
+
+# Alias index from free-form component names to catalog IDs
+component_resolver = ComponentResolver()
+
+# Category, availability and price facet counts
+component_facets = ComponentFacets()
+
+# Nearest-neighbour and template co-occurrence lists per component
+component_graph = ComponentGraph(k=settings.SIMILAR_COMPONENTS_K)
+
+# Bill-of-materials cost estimates from catalog price ranges
+bom_estimator = BomEstimator()
+
+# Newest component updated_at reflected in the indexes above
+catalog_watermark: Optional[datetime] = None
+
+# Idea templates ranked by the project generator
+idea_catalog = IdeaCatalog.from_file(settings.IDEA_TEMPLATES_PATH)
+
+# Optional write-behind buffer for project saves and updates
+project_writes = WriteBehindBuffer(
+    db,
+    'projects',
+    journal_path=settings.WRITE_BEHIND_JOURNAL,
+    flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL,
+    max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+    per_process=settings.WORKERS > 1
+) if settings.PROJECT_WRITE_BEHIND else None
+
 # Pydantic Models
+# Field length caps for user-supplied text
+ShortText = Annotated[str, Field(max_length=200)]
+MAX_SPECIFICATIONS = 64
+MAX_SPECIFICATION_LENGTH = 500
+
 class ComponentSpec(BaseModel):
     microcontroller: Optional[str] = None
     operating_voltage: Optional[str] = None
@@ -126,12 +272,29 @@ class Component(BaseModel):
     updated_at: Optional[datetime] = None
 
 class ComponentCreate(BaseModel):
-    name: str
-    description: str
-    category: str
-    price_range: str
+    name: ShortText
+    description: str = Field(max_length=2000)
+    category: ShortText
+    price_range: str = Field(max_length=50)
     specifications: Optional[Dict[str, str]] = None
 
+    @field_validator('specifications')
+    @classmethod
+    def check_specifications(cls, value):
+        if value is None:
+            return value
+        if len(value) > MAX_SPECIFICATIONS:
+            raise ValueError(f"at most {MAX_SPECIFICATIONS} specifications are allowed")
+        for key, spec in value.items():
+            if len(key) > 100 or len(spec) > MAX_SPECIFICATION_LENGTH:
+                raise ValueError(f"specification '{key[:100]}' is too long")
+        return value
+
+class CostEstimate(BaseModel):
+    min: float
+    max: float
+    unpriced: List[str] = []  # parts without a catalog price
+
 class ProjectIdea(BaseModel):
     id: Optional[str] = None
     title: str
@@ -141,14 +304,33 @@ class ProjectIdea(BaseModel):
     components: List[str]
     category: str
     instructions: List[str]
+    missing_components: List[str] = []
+    component_ids: Dict[str, str] = {}  # component name -> catalog ID, where resolvable
+    estimated_cost: Optional[CostEstimate] = None
     created_at: Optional[datetime] = None
 
+class BatchGetRequest(BaseModel):
+    ids: List[str]
+
+class BatchGetResponse(BaseModel):
+    components: List[Component]
+    missing: List[str]
+
 class GenerateProjectRequest(BaseModel):
     skill: Optional[str] = "beginner"
-    categories: Optional[List[str]] = []
-    components: Optional[List[str]] = []
+    categories: Optional[List[ShortText]] = Field(default=[], max_length=20)
+    components: Optional[List[ShortText]] = Field(default=[], max_length=50)
     time: Optional[str] = "2-5h"
-    notes: Optional[str] = ""
+    notes: Optional[str] = Field(default="", max_length=2000)
+    diversify: Optional[bool] = False  # spread results across components and categories
+
+class GenerationJob(BaseModel):
+    id: str
+    status: str  # queued, running, succeeded, failed
+    result: Optional[List[ProjectIdea]] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
 
 class Project(BaseModel):
     id: Optional[str] = None
@@ -161,7 +343,48 @@ class Project(BaseModel):
     instructions: str
     requirements: List[str]
     notes: Optional[str] = ""
+    requirement_ids: Dict[str, str] = {}  # requirement -> catalog ID, set on save
     user_id: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    estimated_cost: Optional[CostEstimate] = None  # computed per response, not stored
+
+# Caps apply to incoming saves and updates only; projects stored before them must still load
+class ProjectCreate(Project):
+    title: ShortText
+    category: ShortText
+    tags: List[ShortText] = Field(max_length=30)
+    difficulty: ShortText
+    status: ShortText
+    dateSaved: ShortText
+    instructions: str = Field(max_length=20000)
+    requirements: List[ShortText] = Field(max_length=100)
+    notes: Optional[str] = Field(default="", max_length=10000)
+
+class ComponentFacetCounts(BaseModel):
+    total: int
+    category: Dict[str, int]
+    availability: Dict[str, int]
+    price: Dict[str, int]
+
+class SimilarComponent(BaseModel):
+    id: str
+    name: str
+    score: float
+
+class CompatibleComponent(BaseModel):
+    id: str
+    name: str
+    count: int  # idea templates using both parts
+
+class ComponentNeighbors(BaseModel):
+    component_id: str
+    similar: List[SimilarComponent]
+    compatible: List[CompatibleComponent]
+
+class ComponentMatch(BaseModel):
+    query: str
+    component_id: Optional[str] = None
+    score: float = 0.0
 
 class User(BaseModel):
     id: Optional[str] = None
@@ -170,6 +393,15 @@ class User(BaseModel):
     avatar_url: Optional[str] = None
     created_at: Optional[datetime] = None
 
+class UserCreate(User):
+    name: ShortText
+    email: str = Field(max_length=320)
+    avatar_url: Optional[str] = Field(default=None, max_length=2048)
+
+# Stored fields each list response needs, used as query projections
+COMPONENT_FIELDS = [field for field in Component.model_fields if field != 'id']
+PROJECT_FIELDS = [field for field in Project.model_fields if field not in ('id', 'estimated_cost')]
+
 # Default components data
 DEFAULT_COMPONENTS = [
     {
@@ -237,39 +469,449 @@ DEFAULT_COMPONENTS = [
 ]
 
 # Helper Functions
+async def load_components(component_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Resolve component IDs from cache, fetching the misses in one batched read"""
+    ordered_ids = list(dict.fromkeys(component_ids))
+    if component_replica is not None and component_replica.ready:
+        return {component_id: component_replica.get(component_id) for component_id in ordered_ids}
+    
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    misses = []
+    for component_id in ordered_ids:
+        cached = component_cache.get(component_id)
+        if cached is not None:
+            results[component_id] = dict(cached)
+        else:
+            misses.append(component_id)
+
+    if misses:
+        loaded = await component_loader.load_many(misses)
+        for component_id, data in loaded.items():
+            if data is not None:
+                component_cache.set(component_id, data)
+            results[component_id] = data
+
+    return {component_id: results[component_id] for component_id in ordered_ids}
+
+def seed_default_components():
+    """Write the default components if the collection is empty"""
+    components_ref = db.collection('components')
+    docs = components_ref.limit(1).stream()
+    
+    # Check if collection is empty
+    if not any(docs):
+        logger.info("Initializing default components")
+        for comp_data in DEFAULT_COMPONENTS:
+            comp_data['created_at'] = datetime.now(timezone.utc)
+            comp_data['updated_at'] = datetime.now(timezone.utc)
+            components_ref.document(comp_data['id']).set(comp_data)
+        logger.info("Added default components", extra={"count": len(DEFAULT_COMPONENTS)})
+
+def index_component(data: Dict[str, Any]):
+    """Add or refresh a component in the in-memory catalog indexes"""
+    global catalog_watermark
+    component_resolver.add(data['id'], data.get('name', ''))
+    component_facets.add(data)
+    component_graph.add(data)
+    bom_estimator.set_price(data['id'], data.get('price_range'))
+    if isinstance(data.get('updated_at'), datetime):
+        updated_at = as_utc(data['updated_at'])
+        if catalog_watermark is None or updated_at > catalog_watermark:
+            catalog_watermark = updated_at
+
+def unindex_component(component_id: str):
+    component_resolver.remove(component_id)
+    component_facets.remove(component_id)
+    component_graph.remove(component_id)
+    bom_estimator.remove(component_id)
+
+CATALOG_INDEX_FIELDS = ['name', 'description', 'category', 'availability', 'price_range', 'specifications', 'updated_at']
+
+def fetch_catalog_entries(updated_after: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    query = db.collection('components')
+    if updated_after is not None:
+        query = query.where('updated_at', '>', updated_after)
+    docs = query.select(CATALOG_INDEX_FIELDS).stream()
+    return [{'id': doc.id, **doc.to_dict()} for doc in docs]
+
+def fetch_component_ids() -> List[str]:
+    """IDs only; an empty projection returns no field data"""
+    return [doc.id for doc in db.collection('components').select([]).stream()]
+
+async def build_component_indexes() -> bool:
+    """Index every catalog component; the defaults stand in without Firebase
+
+    Returns whether the indexes were restored from the warm-start snapshot.
+    """
+    try:
+        if db is None:
+            components = DEFAULT_COMPONENTS
+        elif await restore_catalog_snapshot():
+            # With the replica on, its first snapshot brings the restored indexes up to date
+            if component_replica is None:
+                asyncio.ensure_future(reconcile_catalog_indexes())
+            return True
+        elif component_replica is not None:
+            # Filled by the replica's first snapshot rather than a separate full read
+            return False
+        else:
+            components = await scheduler.run(scheduler.MAINTENANCE, fetch_catalog_entries)
+        for data in components:
+            index_component(data)
+        logger.info("Indexed catalog components", extra={"count": len(components)})
+    except Exception:
+        logger.exception("Error indexing catalog components")
+    return False
+
+async def restore_catalog_snapshot() -> bool:
+    """Load the catalog indexes from the warm-start snapshot, if there is a usable one"""
+    global catalog_watermark
+    snapshot = await scheduler.run(scheduler.INTERACTIVE, read_snapshot, settings.CATALOG_SNAPSHOT_PATH)
+    if snapshot is None or snapshot[0] is None:
+        return False
+    
+    catalog_watermark, sections = snapshot
+    component_resolver.load_state(sections['resolver'])
+    component_facets.load_state(sections['facets'])
+    component_graph.load_state(sections['graph'])
+    bom_estimator.load_state(sections['prices'])
+    logger.info(
+        "Restored catalog snapshot",
+        extra={"count": len(component_facets), "watermark": catalog_watermark.isoformat()}
+    )
+    return True
+
+async def reconcile_catalog_indexes():
+    """Apply component changes made since the snapshot's watermark"""
+    try:
+        changed = await scheduler.run(scheduler.MAINTENANCE, fetch_catalog_entries, catalog_watermark)
+        for data in changed:
+            index_component(data)
+        
+        # Deletions leave no updated_at behind, so compare ID sets
+        live_ids = set(await scheduler.run(scheduler.MAINTENANCE, fetch_component_ids))
+        removed = prune_catalog_indexes(live_ids)
+        logger.info("Reconciled catalog snapshot", extra={"changed": len(changed), "removed": removed})
+    except Exception:
+        logger.exception("Error reconciling catalog snapshot")
+
+def prune_catalog_indexes(live_ids: Set[str]) -> int:
+    """Drop indexed components that are no longer in the catalog"""
+    removed = [component_id for component_id in component_facets.component_ids() if component_id not in live_ids]
+    for component_id in removed:
+        unindex_component(component_id)
+    return len(removed)
+
+def save_catalog_snapshot():
+    """Write the catalog indexes to the warm-start snapshot file"""
+    if db is None or catalog_watermark is None:
+        return
+    try:
+        write_snapshot(settings.CATALOG_SNAPSHOT_PATH, catalog_watermark, {
+            'resolver': component_resolver.export_state(),
+            'facets': component_facets.export_state(),
+            'graph': component_graph.export_state(),
+            'prices': bom_estimator.export_state()
+        })
+    except Exception:
+        logger.exception("Error writing catalog snapshot")
+
+async def run_catalog_snapshots():
+    """Periodically refresh the warm-start snapshot"""
+    while True:
+        await asyncio.sleep(settings.CATALOG_SNAPSHOT_INTERVAL)
+        save_catalog_snapshot()
+
+def template_component_groups() -> List[List[str]]:
+    """Catalog IDs of the parts each idea template uses together"""
+    return [list(component_resolver.resolve_ids(template["components"]).values()) for template in idea_catalog.templates]
+
+async def rebuild_component_graph():
+    """Recompute the similar / compatible graph off the event loop"""
+    features = component_graph.features()
+    built = await scheduler.run(scheduler.BATCH, component_graph.build, features, template_component_groups())
+    component_graph.install(built)
+    logger.info("Rebuilt component graph", extra={"count": len(component_graph)})
+
+async def run_graph_rebuilds():
+    """Rebuild the component graph whenever the catalog has changed"""
+    while True:
+        await asyncio.sleep(settings.GRAPH_REBUILD_INTERVAL)
+        if component_graph.dirty:
+            try:
+                await rebuild_component_graph()
+            except Exception:
+                logger.exception("Component graph rebuild failed")
+
+# Live copy of the components collection; feeds the catalog indexes as documents change
+component_replica = ComponentReplica(
+    db,
+    'components',
+    on_upsert=index_component,
+    on_remove=unindex_component,
+    on_sync=prune_catalog_indexes
+) if db is not None and settings.COMPONENT_REPLICA else None
+
+def apply_component_write(data: Dict[str, Any]):
+    """Reflect this instance's own component write without waiting for the listener"""
+    if component_replica is not None:
+        component_replica.upsert(dict(data))
+    else:
+        index_component(data)
+
+def apply_component_delete(component_id: str):
+    if component_replica is not None:
+        component_replica.remove(component_id)
+    else:
+        unindex_component(component_id)
+
+def catalog_components(category: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """Replica equivalent of components_query: by name, optionally within one category"""
+    components = [
+        dict(data) for data in component_replica.values()
+        if not category or data.get('category') == category
+    ]
+    components.sort(key=lambda data: data.get('name', ''))
+    return components[:limit]
+
 async def initialize_default_data():
     """Initialize default components if collection is empty"""
     try:
         if db is None:
-            print("Firebase not initialized, skipping default data initialization")
+            logger.info("Firebase not initialized, skipping default data initialization")
             return
-            
-        components_ref = db.collection('components')
-        docs = components_ref.limit(1).stream()
         
-        # Check if collection is empty
-        if not any(docs):
-            print("Initializing default components...")
-            for comp_data in DEFAULT_COMPONENTS:
-                comp_data['created_at'] = datetime.now()
-                comp_data['updated_at'] = datetime.now()
-                components_ref.document(comp_data['id']).set(comp_data)
-            print(f"Added {len(DEFAULT_COMPONENTS)} default components")
+        await scheduler.run(scheduler.MAINTENANCE, seed_default_components)
     except Exception as e:
-        print(f"Error initializing default data: {e}")
+        logger.exception("Error initializing default data")
+
+async def build_project_ideas(request: GenerateProjectRequest) -> List[Dict[str, Any]]:
+    """Rank the idea template catalog against a generation request"""
+    rank = idea_catalog.diverse_top_k if request.diversify else idea_catalog.top_k
+    indices = rank(
+        settings.IDEA_RESULTS_LIMIT,
+        skill=request.skill,
+        categories=request.categories,
+        components=request.components,
+        time=request.time
+    )
+    
+    ideas = []
+    for index in indices:
+        template = idea_catalog.templates[index]
+        ideas.append({
+            "id": str(uuid.uuid4()),
+            "title": template["title"],
+            "description": template["description"],
+            "difficulty": template["difficulty"],
+            "estimatedTime": template["estimatedTime"],
+            "components": list(template["components"]),
+            "category": template["category"],
+            "instructions": list(template["instructions"]),
+            "missing_components": idea_catalog.missing_components(index, request.components),
+            "component_ids": component_resolver.resolve_ids(template["components"]),
+            "created_at": datetime.now()
+        })
+    return ideas
+
+def estimate_cost(names: List[str]) -> Dict[str, Any]:
+    """Min/max cost of a parts list from catalog prices"""
+    resolved = component_resolver.resolve_ids(names)
+    estimate = bom_estimator.estimate(resolved.values())
+    unpriced_ids = set(estimate['unpriced_ids'])
+    return {
+        "min": estimate['min'],
+        "max": estimate['max'],
+        "unpriced": [name for name in names if resolved.get(name) is None or resolved[name] in unpriced_ids]
+    }
+
+def with_cost(project: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy of a project with its current bill-of-materials estimate"""
+    return {**project, 'estimated_cost': estimate_cost(project.get('requirements') or [])}
+
+async def cached_project_ideas(request: GenerateProjectRequest) -> List[Dict[str, Any]]:
+    """Build project ideas, reusing results for identical recent requests"""
+    key = hashlib.sha1(json.dumps(request.dict(), sort_keys=True).encode()).hexdigest()
+    ideas = generation_cache.get(key)
+    if ideas is None:
+        ideas = await build_project_ideas(request)
+        generation_cache.set(key, ideas)
+    # Costs are added per call so cached ideas pick up price changes
+    return [{**idea, 'estimated_cost': estimate_cost(idea['components'])} for idea in ideas]
+
+async def run_generation_job(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Job handler for asynchronous generation requests"""
+    await scheduler.get_scheduler().wait_for_headroom(scheduler.BATCH)
+    ideas = await cached_project_ideas(GenerateProjectRequest(**payload))
+    return jsonable_encoder(ideas)
+
+async def run_archival():
+    """Periodically move stale completed projects into the archive"""
+    while True:
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL)
+        try:
+            # Projects with buffered writes are archived once those writes land
+            has_pending = project_writes.has_pending if project_writes is not None else None
+            await scheduler.run(
+                scheduler.MAINTENANCE, for_each_tenant, db, archive.archive_stale_projects,
+                settings.ARCHIVE_AFTER_DAYS, has_pending
+            )
+        except Exception:
+            logger.exception("Project archival failed")
+
+def job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job record, without the request payload"""
+    return {key: value for key, value in job.items() if key != 'payload'}
+
+# Background generation job queue
+if settings.GENERATION_JOB_STORE == "sqlite":
+    generation_job_store = SQLiteJobStore(settings.GENERATION_JOB_DB, ttl=settings.GENERATION_JOB_TTL)
+else:
+    generation_job_store = InMemoryJobStore(ttl=settings.GENERATION_JOB_TTL)
+generation_jobs = JobQueue(
+    generation_job_store,
+    run_generation_job,
+    workers=settings.GENERATION_JOB_WORKERS,
+    lease=settings.GENERATION_JOB_LEASE
+)
+
+def bind_tenant(tenant: Optional[str]):
+    """Route this request's project and user data to `tenant`"""
+    tenant = tenant or DEFAULT_TENANT
+    if not valid_tenant(tenant):
+        raise HTTPException(status_code=400, detail="Invalid tenant ID")
+    current_tenant.set(tenant)
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    x_tenant_id: Optional[str] = Header(None, max_length=63)
+) -> Optional[Dict[str, Any]]:
+    """Verify the bearer token and bind the caller's tenant; returns None when authentication is disabled"""
+    if not settings.AUTH_ENABLED:
+        bind_tenant(x_tenant_id)
+        return None
+    
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    
+    try:
+        claims = await token_verifier.verify(credentials.credentials)
+    except AuthError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    
+    # Membership comes from a signed claim, so users can't reach another school's data
+    bind_tenant(claims.get(settings.TENANT_CLAIM))
+    return claims
+
+async def run_idempotent(
+    operation: str,
+    key: Optional[str],
+    current_user: Optional[Dict[str, Any]],
+    payload: BaseModel,
+    create
+):
+    """Run `create` once per Idempotency-Key; repeats get the original result"""
+    if not key:
+        return await create()
+    
+    # Keys are per operation, tenant and user, so clients can't collide
+    scoped_key = f"{operation}:{current_tenant.get()}:{current_user['uid'] if current_user is not None else ''}:{key}"
+    fingerprint = hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+    try:
+        return await idempotent_requests.run(scoped_key, fingerprint, create)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+async def serve_read(key, response: Response, fetch):
+    """Fresh data while Firestore is healthy, otherwise the last good copy marked stale"""
+    try:
+        data, stale = await stale_reads.read((current_tenant.get(), *key), fetch)
+    except CircuitOpenError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Data store temporarily unavailable",
+            headers={"Retry-After": str(math.ceil(data_breaker.retry_after()) or 1)}
+        )
+    if stale:
+        response.headers["X-Data-Stale"] = "true"
+    return data
+
+def check_owner(current_user: Optional[Dict[str, Any]], owner_id: Optional[str]):
+    """Reject access to another user's data"""
+    if current_user is not None and owner_id != current_user['uid']:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
 
 # API Endpoints
 
 @app.on_event("startup")
 async def startup_event():
     await initialize_default_data()
+    restored = await build_component_indexes()
+    if component_replica is not None:
+        # Reads fall back to Firestore until the replica is ready, so restored indexes needn't wait for it
+        await component_replica.start(timeout=0 if restored else 10.0)
+    if component_graph.dirty:
+        try:
+            await rebuild_component_graph()
+        except Exception:
+            logger.exception("Component graph build failed")
+    asyncio.ensure_future(run_graph_rebuilds())
+    if settings.CATALOG_SNAPSHOT_INTERVAL > 0:
+        asyncio.ensure_future(run_catalog_snapshots())
+    await generation_jobs.start()
+    if db is not None and settings.ARCHIVE_INTERVAL > 0:
+        asyncio.ensure_future(run_archival())
+    if project_writes is not None:
+        await project_writes.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await generation_jobs.stop()
+    if component_replica is not None:
+        await component_replica.stop()
+    if project_writes is not None:
+        await project_writes.stop()
+    save_catalog_snapshot()
+    if traffic_recorder is not None:
+        traffic_recorder.close()
+    scheduler.get_scheduler().shutdown()
+    stop_logging()
 
 @app.get("/")
 async def root():
     return {"message": "Atal Idea Generator API", "version": "1.0.0"}
 
+@app.get("/api/metrics/connections")
+async def get_connection_metrics():
+    """Connection reuse statistics for this worker"""
+    return {"pid": os.getpid(), **connection_stats.snapshot()}
+
+@app.get("/api/metrics/datastore")
+async def get_datastore_metrics():
+    """Circuit breaker state for the Firestore data layer"""
+    return {"pid": os.getpid(), **data_breaker.snapshot()}
+
+@app.get("/api/debug/firestore")
+async def get_firestore_profile(reset: bool = False):
+    """Per-route Firestore call report; only available with FIRESTORE_PROFILING"""
+    if firestore_profiler is None:
+        raise HTTPException(status_code=404, detail="Firestore profiling is disabled")
+    report = firestore_profiler.report()
+    if reset:
+        firestore_profiler.reset()
+    return report
+
 @app.get("/api/components", response_model=List[Component])
 async def get_components(
+    response: Response,
     category: Optional[str] = None,
     search: Optional[str] = None,
     limit: Optional[int] = 100
@@ -280,20 +922,18 @@ async def get_components(
             # Return default components when Firebase is not available
             components = DEFAULT_COMPONENTS.copy()
         else:
-            components_ref = db.collection('components')
-            query = components_ref.limit(limit)
-            
             # Apply category filter
-            if category and category.lower() != 'all':
-                query = query.where('category', '==', category)
+            if category and category.lower() == 'all':
+                category = None
             
-            docs = query.stream()
-            components = []
-            
-            for doc in docs:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                components.append(data)
+            if component_replica is not None and component_replica.ready:
+                components = catalog_components(category, limit)
+            else:
+                async def fetch():
+                    docs = components_query(db, COMPONENT_FIELDS, category=category, limit=limit).stream()
+                    return [{**doc.to_dict(), 'id': doc.id} for doc in docs]
+                
+                components = await serve_read(('components', category, limit), response, fetch)
         
         # Apply search filter
         if search:
@@ -308,42 +948,103 @@ async def get_components(
         
         return components
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(status_code=500, detail=f"Failed to fetch components: {str(e)}")
 
 @app.post("/api/components", response_model=Component)
-async def create_component(component: ComponentCreate):
+async def create_component(
+    component: ComponentCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+):
     """Create a new component"""
-    try:
+    async def create():
         component_id = str(uuid.uuid4())
         component_data = component.dict()
         component_data.update({
             'id': component_id,
             'availability': 'Available',
-            'created_at': datetime.now(),
-            'updated_at': datetime.now()
+            'created_at': datetime.now(timezone.utc),
+            'updated_at': datetime.now(timezone.utc)
         })
         
         db.collection('components').document(component_id).set(component_data)
+        component_cache.set(component_id, dict(component_data))
+        apply_component_write(component_data)
         return component_data
+    
+    try:
+        return await run_idempotent('create_component', idempotency_key, None, component, create)
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(status_code=500, detail=f"Failed to create component: {str(e)}")
 
+@app.post("/api/components:batchGet", response_model=BatchGetResponse)
+async def batch_get_components(request: BatchGetRequest, response: Response):
+    """Get several components by ID in a single call"""
+    if len(request.ids) > MAX_BATCH_GET_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_GET_IDS} component IDs can be requested at once"
+        )
+
+    try:
+        loaded = await serve_read(
+            ('components:batchGet', tuple(request.ids)),
+            response,
+            lambda: load_components(request.ids)
+        )
+        components = [data for data in loaded.values() if data is not None]
+        missing = [component_id for component_id, data in loaded.items() if data is None]
+        return {"components": components, "missing": missing}
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(status_code=500, detail=f"Failed to fetch components: {str(e)}")
+
+@app.get("/api/components/facets", response_model=ComponentFacetCounts)
+async def get_component_facets(search: Optional[str] = Query(None, max_length=200)):
+    """Component counts by category, availability and price bucket"""
+    return component_facets.counts(search)
+
+@app.get("/api/components/resolve", response_model=List[ComponentMatch])
+async def resolve_components(q: List[str] = Query(..., max_length=50)):
+    """Resolve free-form component names to catalog component IDs"""
+    matches = []
+    for query in q:
+        match = component_resolver.resolve(query[:200])
+        if match is None:
+            matches.append({"query": query, "component_id": None, "score": 0.0})
+        else:
+            matches.append({"query": query, "component_id": match[0], "score": match[1]})
+    return matches
+
 @app.get("/api/components/{component_id}", response_model=Component)
-async def get_component(component_id: str):
+async def get_component(component_id: str, response: Response):
     """Get a specific component by ID"""
+    async def fetch():
+        return (await load_components([component_id]))[component_id]
+    
     try:
-        doc = db.collection('components').document(component_id).get()
-        if not doc.exists:
+        data = await serve_read(('component', component_id), response, fetch)
+        if data is None:
             raise HTTPException(status_code=404, detail="Component not found")
         
-        data = doc.to_dict()
-        data['id'] = doc.id
         return data
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
         raise HTTPException(status_code=500, detail=f"Failed to fetch component: {str(e)}")
 
+@app.get("/api/components/{component_id}/similar", response_model=ComponentNeighbors)
+async def get_similar_components(component_id: str, limit: int = Query(8, ge=1, le=50)):
+    """Similar components and parts commonly used alongside this one"""
+    neighbors = component_graph.neighbors(component_id, limit)
+    if neighbors is None:
+        raise HTTPException(status_code=404, detail="Component not found")
+    return {"component_id": component_id, **neighbors}
+
 @app.put("/api/components/{component_id}", response_model=Component)
 async def update_component(component_id: str, component: ComponentCreate):
     """Update a component"""
@@ -355,7 +1056,7 @@ async def update_component(component_id: str, component: ComponentCreate):
             raise HTTPException(status_code=404, detail="Component not found")
         
         component_data = component.dict()
-        component_data['updated_at'] = datetime.now()
+        component_data['updated_at'] = datetime.now(timezone.utc)
         
         doc_ref.update(component_data)
         
@@ -363,6 +1064,9 @@ async def update_component(component_id: str, component: ComponentCreate):
         updated_doc = doc_ref.get()
         data = updated_doc.to_dict()
         data['id'] = updated_doc.id
+        component_cache.delete(component_id)
+        component_cache.set(component_id, dict(data))
+        apply_component_write(data)
         return data
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -380,6 +1084,8 @@ async def delete_component(component_id: str):
             raise HTTPException(status_code=404, detail="Component not found")
         
         doc_ref.delete()
+        component_cache.delete(component_id)
+        apply_component_delete(component_id)
         return {"message": "Component deleted successfully"}
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -387,144 +1093,199 @@ async def delete_component(component_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to delete component: {str(e)}")
 
 @app.post("/api/projects/generate", response_model=List[ProjectIdea])
-async def generate_project_ideas(request: GenerateProjectRequest):
+async def generate_project_ideas(
+    request: GenerateProjectRequest,
+    run_async: bool = Query(False, alias="async")
+):
     """Generate AI project ideas based on user preferences"""
     try:
-        # Mock AI generation for now - replace with actual AI service
-        await asyncio.sleep(0.5)  # Simulate API delay
-        
-        components = request.components or ["ESP32", "DHT22", "Servo Motor"]
-        categories = request.categories or ["IoT", "Automation", "Environmental"]
-        difficulty = request.skill or "beginner"
-        time = request.time or "2-5h"
-        
-        # Generate mock ideas
-        ideas = [
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Smart Home Air Quality Monitor",
-                "description": "Build a connected monitor that tracks temperature and humidity, displays status, and sends alerts when thresholds are exceeded.",
-                "difficulty": difficulty,
-                "estimatedTime": time,
-                "components": components + ["OLED Display"],
-                "category": categories[0] if categories else "IoT",
-                "instructions": [
-                    "Wire the sensor to the microcontroller and verify readings via serial monitor.",
-                    "Display live metrics on the OLED with color-coded thresholds.",
-                    "Push readings to a cloud endpoint and configure alert rules.",
-                    "Enclose the device and test in different rooms."
-                ],
-                "created_at": datetime.now()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Automated Plant Watering System",
-                "description": "Create a soil-moisture-based watering setup that irrigates plants automatically and logs activity.",
-                "difficulty": difficulty,
-                "estimatedTime": time,
-                "components": components + ["Soil Moisture Sensor", "Relay Module", "Pump"],
-                "category": "Automation",
-                "instructions": [
-                    "Calibrate the moisture sensor to determine dry thresholds.",
-                    "Control a pump using a relay and implement safety delays.",
-                    "Log watering events and moisture trends for analysis.",
-                    "Add a manual override and status LED."
-                ],
-                "created_at": datetime.now()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Obstacle-Avoiding Robot",
-                "description": "Assemble a simple robot that navigates autonomously by detecting obstacles and adjusting its path.",
-                "difficulty": difficulty,
-                "estimatedTime": time,
-                "components": components + ["Ultrasonic Sensor", "Motor Driver"],
-                "category": "Robotics",
-                "instructions": [
-                    "Mount motors and connect the driver to the controller.",
-                    "Integrate the ultrasonic sensor and read distance values.",
-                    "Implement basic avoidance logic with turn-and-forward behavior.",
-                    "Tune speed and sensitivity; test in a small course."
-                ],
-                "created_at": datetime.now()
-            }
-        ]
+        if run_async:
+            job = await generation_jobs.submit(request.dict())
+            return JSONResponse(status_code=202, content=job_response(job))
         
-        return ideas
+        return await cached_project_ideas(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate project ideas: {str(e)}")
 
+@app.get("/api/projects/generate/jobs/{job_id}", response_model=GenerationJob)
+async def get_generation_job(job_id: str, wait: float = 0):
+    """Get a generation job, optionally long-polling until it finishes"""
+    timeout = min(max(wait, 0), settings.GENERATION_JOB_MAX_WAIT)
+    job = await generation_jobs.wait(job_id, timeout)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return job_response(job)
+
 @app.get("/api/projects", response_model=List[Project])
-async def get_projects(user_id: Optional[str] = None):
-    """Get all saved projects for a user"""
+async def get_projects(
+    response: Response,
+    user_id: Optional[str] = None,
+    include_archived: bool = False,
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+):
+    """Get all saved projects for a user; archived ones only on request"""
+    if current_user is not None:
+        if user_id is not None:
+            check_owner(current_user, user_id)
+        user_id = current_user['uid']
+    
+    async def fetch():
+        docs = projects_query(db, PROJECT_FIELDS, user_id=user_id).stream()
+        return {doc.id: {**doc.to_dict(), 'id': doc.id} for doc in docs}
+    
+    async def fetch_archived():
+        return archive.get_archived_projects(db, user_id)
+    
     try:
-        projects_ref = db.collection('projects')
+        projects = dict(await serve_read(('projects', user_id), response, fetch))
         
-        if user_id:
-            query = projects_ref.where('user_id', '==', user_id)
+        # Overlay writes that are still buffered so users see their own edits
+        if project_writes is not None:
+            for data in project_writes.pending_items():
+                merged = {**projects.get(data['id'], {}), **data}
+                if user_id is None or merged.get('user_id') == user_id:
+                    projects[data['id']] = merged
+            result = sorted(projects.values(), key=lambda p: p.get('dateSaved', ''), reverse=True)
         else:
-            query = projects_ref
-        
-        docs = query.stream()
-        projects = []
+            result = list(projects.values())
         
-        for doc in docs:
-            data = doc.to_dict()
-            data['id'] = doc.id
-            projects.append(data)
-        
-        return projects
+        if include_archived:
+            result.extend(await serve_read(('archived_projects', user_id), response, fetch_archived))
+        return [with_cost(project) for project in result]
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(status_code=500, detail=f"Failed to fetch projects: {str(e)}")
 
+@app.get("/api/projects/archived", response_model=List[Project])
+async def get_archived_projects(
+    user_id: Optional[str] = None,
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+):
+    """Get archived projects for a user"""
+    if current_user is not None:
+        if user_id is not None:
+            check_owner(current_user, user_id)
+        user_id = current_user['uid']
+    
+    try:
+        return [with_cost(project) for project in archive.get_archived_projects(db, user_id)]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch archived projects: {str(e)}")
+
+@app.post("/api/projects/{project_id}/restore", response_model=Project)
+async def restore_project(
+    project_id: str,
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+):
+    """Move an archived project back into the active project list"""
+    try:
+        data = archive.load_archived_project(db, project_id)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Archived project not found")
+        check_owner(current_user, data.get('user_id'))
+        
+        return with_cost(archive.restore_project(db, data))
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(status_code=500, detail=f"Failed to restore project: {str(e)}")
+
 @app.post("/api/projects", response_model=Project)
-async def save_project(project: Project):
+async def save_project(
+    project: ProjectCreate,
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+):
     """Save a new project"""
-    try:
+    async def create():
         project_id = str(uuid.uuid4())
-        project_data = project.dict()
+        project_data = project.dict(exclude={'estimated_cost'})
+        if current_user is not None:
+            project_data['user_id'] = current_user['uid']
         project_data.update({
             'id': project_id,
-            'dateSaved': datetime.now().isoformat()
+            'dateSaved': datetime.now().isoformat(),
+            'requirement_ids': component_resolver.resolve_ids(project.requirements),
+            'updated_at': datetime.now()
         })
         
-        db.collection('projects').document(project_id).set(project_data)
+        if project_writes is not None:
+            await project_writes.put(project_id, project_data)
+        else:
+            db.collection('projects').document(project_id).set(project_data)
         return project_data
+    
+    try:
+        return with_cost(await run_idempotent('save_project', idempotency_key, current_user, project, create))
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(status_code=500, detail=f"Failed to save project: {str(e)}")
 
 @app.put("/api/projects/{project_id}", response_model=Project)
-async def update_project(project_id: str, project: Project):
+async def update_project(
+    project_id: str,
+    project: ProjectCreate,
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+):
     """Update a project"""
     try:
+        project_data = project.dict(exclude={'estimated_cost'})
+        project_data['requirement_ids'] = component_resolver.resolve_ids(project.requirements)
+        project_data['updated_at'] = datetime.now()
+        if current_user is not None:
+            project_data['user_id'] = current_user['uid']
+        
+        if project_writes is not None:
+            existing = project_writes.get(project_id)
+            if existing is None:
+                doc = db.collection('projects').document(project_id).get()
+                if not doc.exists:
+                    raise HTTPException(status_code=404, detail="Project not found")
+                existing = doc.to_dict()
+            check_owner(current_user, existing.get('user_id'))
+            
+            await project_writes.put(project_id, project_data)
+            return with_cost({**existing, **project_data, 'id': project_id})
+        
         doc_ref = db.collection('projects').document(project_id)
         doc = doc_ref.get()
         
         if not doc.exists:
             raise HTTPException(status_code=404, detail="Project not found")
+        check_owner(current_user, doc.to_dict().get('user_id'))
         
-        project_data = project.dict()
         doc_ref.update(project_data)
         
         # Return updated project
         updated_doc = doc_ref.get()
         data = updated_doc.to_dict()
         data['id'] = updated_doc.id
-        return data
+        return with_cost(data)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
         raise HTTPException(status_code=500, detail=f"Failed to update project: {str(e)}")
 
 @app.delete("/api/projects/{project_id}")
-async def delete_project(project_id: str):
+async def delete_project(
+    project_id: str,
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+):
     """Delete a project"""
     try:
         doc_ref = db.collection('projects').document(project_id)
+        buffered = project_writes.get(project_id) if project_writes is not None else None
         doc = doc_ref.get()
         
-        if not doc.exists:
+        if not doc.exists and buffered is None:
             raise HTTPException(status_code=404, detail="Project not found")
+        owner_id = (buffered or {}).get('user_id') or (doc.to_dict() or {}).get('user_id')
+        check_owner(current_user, owner_id)
+        
+        if project_writes is not None:
+            await project_writes.discard(project_id)
         
         doc_ref.delete()
         return {"message": "Project deleted successfully"}
@@ -534,10 +1295,15 @@ async def delete_project(project_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to delete project: {str(e)}")
 
 @app.post("/api/users", response_model=User)
-async def create_user(user: User):
+async def create_user(
+    user: UserCreate,
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+):
     """Create a new user"""
-    try:
-        user_id = str(uuid.uuid4())
+    async def create():
+        # Authenticated users get a profile keyed by their account ID
+        user_id = current_user['uid'] if current_user is not None else str(uuid.uuid4())
         user_data = user.dict()
         user_data.update({
             'id': user_id,
@@ -546,19 +1312,27 @@ async def create_user(user: User):
         
         db.collection('users').document(user_id).set(user_data)
         return user_data
+    
+    try:
+        return await run_idempotent('create_user', idempotency_key, current_user, user, create)
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(status_code=500, detail=f"Failed to create user: {str(e)}")
 
 @app.get("/api/users/{user_id}", response_model=User)
-async def get_user(user_id: str):
+async def get_user(
+    user_id: str,
+    response: Response,
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+):
     """Get user by ID"""
+    check_owner(current_user, user_id)
     try:
-        doc = db.collection('users').document(user_id).get()
-        if not doc.exists:
+        data = await serve_read(('user', user_id), response, lambda: user_loader.load(user_id))
+        if data is None:
             raise HTTPException(status_code=404, detail="User not found")
         
-        data = doc.to_dict()
-        data['id'] = doc.id
         return data
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -567,4 +1341,16 @@ async def get_user(user_id: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run(
+        # Worker processes import the app themselves, so pass it by name
+        "main:app" if settings.WORKERS > 1 else app,
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WORKERS,
+        loop=settings.LOOP,
+        http=settings.HTTP,
+        timeout_keep_alive=settings.KEEP_ALIVE_TIMEOUT,
+        backlog=settings.BACKLOG,
+        limit_concurrency=settings.LIMIT_CONCURRENCY or None,
+        access_log=settings.ACCESS_LOG
+    )
@@ -0,0 +1,101 @@
+"""
+Component price ranges
+Catalog prices are free text such as "$20-30", "$5" or "₹150 - ₹300". These
+helpers turn them into numeric bounds and coarse buckets for filtering, and
+total them into bill-of-materials estimates.
+"""
+
+import re
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+# (bucket name, exclusive upper bound of the low price)
+PRICE_BUCKETS = [
+    ("under-5", 5.0),
+    ("5-15", 15.0),
+    ("15-30", 30.0),
+    ("30-plus", float("inf"))
+]
+UNKNOWN_BUCKET = "unknown"
+
+
+def parse_price_range(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(low, high) from a price range string, or None if it has no numbers"""
+    if not text:
+        return None
+    numbers = [float(number) for number in _NUMBER.findall(text.replace(',', ''))]
+    if not numbers:
+        return None
+    return min(numbers[:2]), max(numbers[:2])
+
+
+def price_bucket(text: Optional[str]) -> str:
+    """Bucket name for a price range, by its low end"""
+    bounds = parse_price_range(text)
+    if bounds is None:
+        return UNKNOWN_BUCKET
+    for name, upper in PRICE_BUCKETS:
+        if bounds[0] < upper:
+            return name
+    return UNKNOWN_BUCKET
+
+
+class BomEstimator:
+    """Min/max bill-of-materials cost per component set, memoized until a price changes"""
+
+    def __init__(self, memo_size: int = 4096):
+        self.memo_size = memo_size
+        self._prices: Dict[str, Optional[Tuple[float, float]]] = {}
+        self._memo: Dict[FrozenSet[str], Dict[str, Any]] = {}
+        # component_id -> memoized sets containing it, for invalidation
+        self._sets_by_component: Dict[str, Set[FrozenSet[str]]] = {}
+
+    def set_price(self, component_id: str, price_range: Optional[str]):
+        bounds = parse_price_range(price_range)
+        if component_id in self._prices and self._prices[component_id] == bounds:
+            return
+        self._prices[component_id] = bounds
+        self._invalidate(component_id)
+
+    def remove(self, component_id: str):
+        self._prices.pop(component_id, None)
+        self._invalidate(component_id)
+
+    def export_state(self) -> Dict[str, Any]:
+        return {"prices": self._prices}
+
+    def load_state(self, state: Dict[str, Any]):
+        self._prices = state["prices"]
+        self._memo.clear()
+        self._sets_by_component.clear()
+
+    def estimate(self, component_ids: Iterable[str]) -> Dict[str, Any]:
+        """{"min", "max", "unpriced_ids"} summed over the distinct components"""
+        key = frozenset(component_ids)
+        estimate = self._memo.get(key)
+        if estimate is not None:
+            return estimate
+
+        low = high = 0.0
+        unpriced = []
+        for component_id in sorted(key):
+            bounds = self._prices.get(component_id)
+            if bounds is None:
+                unpriced.append(component_id)
+            else:
+                low += bounds[0]
+                high += bounds[1]
+        estimate = {"min": round(low, 2), "max": round(high, 2), "unpriced_ids": unpriced}
+
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+            self._sets_by_component.clear()
+        self._memo[key] = estimate
+        for component_id in key:
+            self._sets_by_component.setdefault(component_id, set()).add(key)
+        return estimate
+
+    def _invalidate(self, component_id: str):
+        for key in self._sets_by_component.pop(component_id, ()):
+            self._memo.pop(key, None)
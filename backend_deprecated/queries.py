@@ -0,0 +1,82 @@
+"""
+Firestore list queries and the composite indexes they need
+Every list query has a deterministic order and a field projection, and each
+filter + order combination has a matching entry in INDEXES. Collection-scoped
+indexes match by collection ID, so they also cover every tenant's
+tenants/{tenant}/projects copy. Regenerate the index file after changing a
+query:
+
+    python queries.py > firestore.indexes.json
+"""
+
+import json
+from typing import Iterable, Optional
+
+# Composite indexes backing the queries below, in firestore.indexes.json form
+INDEXES = [
+    {
+        "collectionGroup": "components",
+        "queryScope": "COLLECTION",
+        "fields": [
+            {"fieldPath": "category", "order": "ASCENDING"},
+            {"fieldPath": "name", "order": "ASCENDING"}
+        ]
+    },
+    {
+        "collectionGroup": "projects",
+        "queryScope": "COLLECTION",
+        "fields": [
+            {"fieldPath": "user_id", "order": "ASCENDING"},
+            {"fieldPath": "dateSaved", "order": "DESCENDING"}
+        ]
+    },
+    # Archival sweeps (archive.py)
+    {
+        "collectionGroup": "projects",
+        "queryScope": "COLLECTION",
+        "fields": [
+            {"fieldPath": "status", "order": "ASCENDING"},
+            {"fieldPath": "updated_at", "order": "ASCENDING"}
+        ]
+    },
+    {
+        "collectionGroup": "projects",
+        "queryScope": "COLLECTION",
+        "fields": [
+            {"fieldPath": "status", "order": "ASCENDING"},
+            {"fieldPath": "dateSaved", "order": "ASCENDING"}
+        ]
+    },
+    {
+        "collectionGroup": "archived_projects",
+        "queryScope": "COLLECTION",
+        "fields": [
+            {"fieldPath": "user_id", "order": "ASCENDING"},
+            {"fieldPath": "archived_at", "order": "DESCENDING"}
+        ]
+    }
+]
+
+
+def components_query(db, fields: Iterable[str], category: Optional[str] = None, limit: int = 100):
+    """Components ordered by name, optionally within one category"""
+    query = db.collection('components')
+    if category:
+        query = query.where('category', '==', category)
+    return query.order_by('name').select(list(fields)).limit(limit)
+
+
+def projects_query(db, fields: Iterable[str], user_id: Optional[str] = None):
+    """Projects, newest first, optionally for one user"""
+    query = db.collection('projects')
+    if user_id:
+        query = query.where('user_id', '==', user_id)
+    return query.order_by('dateSaved', direction='DESCENDING').select(list(fields))
+
+
+def index_config() -> dict:
+    return {"indexes": INDEXES, "fieldOverrides": []}
+
+
+if __name__ == "__main__":
+    print(json.dumps(index_config(), indent=2))
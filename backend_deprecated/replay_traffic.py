@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Replay a captured traffic trace against the app with a fake Firestore
+
+Reads a trace written by TrafficCaptureMiddleware (TRAFFIC_CAPTURE=true),
+seeds an in-memory Firestore with the documents the trace refers to, then
+drives the in-process app at the captured pace, a multiple of it, or as fast
+as the concurrency limit allows, and reports latency percentiles per route
+next to the latencies observed at capture time.
+
+Usage: python replay_traffic.py TRACE [--speed 1|10|max] [--concurrency N]
+                                      [--firestore-latency-ms MS] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+# Settings are read when main is imported, so configure the replay run first
+_scratch = tempfile.mkdtemp(prefix="atal-replay-")
+for name, value in {
+    "AUTH_ENABLED": "false",
+    "COMPONENT_REPLICA": "false",
+    "TRAFFIC_CAPTURE": "false",
+    "SHARED_CACHE": "false",
+    "GENERATION_JOB_STORE": "memory",
+    "ARCHIVE_INTERVAL": "0",
+    "CATALOG_SNAPSHOT_INTERVAL": "0",
+    "CATALOG_SNAPSHOT_PATH": os.path.join(_scratch, "catalog.snapshot"),
+    "WRITE_BEHIND_JOURNAL": os.path.join(_scratch, "project_writes.journal"),
+    "LOG_LEVEL": "WARNING"
+}.items():
+    os.environ.setdefault(name, value)
+
+import httpx
+import numpy as np
+
+import main
+from fake_firestore import FakeFirestore
+from firestore_tracing import traced_client
+from tenancy import DEFAULT_TENANT, RoutedClient, use_tenant
+
+# Collection backing each route's path parameter
+PATH_PARAM_COLLECTIONS = {
+    "component_id": "components",
+    "project_id": "projects",
+    "user_id": "users"
+}
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return sorted((entry for entry in entries if entry.get("r")), key=lambda entry: entry["t"])
+
+
+def synthesize(shape: Any) -> Any:
+    """A JSON value with the captured shape"""
+    if isinstance(shape, dict):
+        if set(shape) == {"str"}:
+            return "x" * shape["str"]
+        if set(shape) == {"num"}:
+            return 1 if shape["num"] == "int" else 1.0
+        if set(shape) == {"list", "len"}:
+            return [synthesize(item) for item in shape["list"]]
+        return {key: synthesize(value) for key, value in shape.items()}
+    return shape
+
+
+def seed_documents(fake: FakeFirestore, entries: List[Dict[str, Any]]):
+    """Create a plausible document for every ID the trace reads or updates"""
+    db = RoutedClient(fake)
+    now = main.datetime.now()
+    for entry in entries:
+        for name, doc_id in entry.get("p", {}).items():
+            collection = PATH_PARAM_COLLECTIONS.get(name)
+            if collection is None:
+                continue
+            with use_tenant(entry.get("tenant", DEFAULT_TENANT)):
+                ref = db.collection(collection).document(doc_id)
+            if ref._read().exists:
+                continue
+            if collection == "components":
+                data = {
+                    "name": f"Part {doc_id}", "description": "Replay component", "category": "Sensors",
+                    "price_range": "$5-10", "availability": "Available", "created_at": now, "updated_at": now
+                }
+            elif collection == "projects":
+                data = {
+                    "title": f"Project {doc_id}", "category": "IoT", "tags": [], "difficulty": "beginner",
+                    "status": "saved", "dateSaved": now.isoformat(), "instructions": "", "requirements": [],
+                    "notes": "", "user_id": None, "updated_at": now
+                }
+            else:
+                data = {"name": f"User {doc_id}", "email": f"{doc_id}@example.com", "created_at": now}
+            ref._write(data)
+
+
+def install_fake_firestore(fake: FakeFirestore):
+    db = RoutedClient(traced_client(fake, main.data_breaker))
+    main.db = db
+    main.component_loader.db = db
+    main.user_loader.db = db
+    if main.project_writes is not None:
+        main.project_writes.db = db
+
+
+def build_request(entry: Dict[str, Any]) -> Dict[str, Any]:
+    path = entry["r"]
+    for name, value in entry.get("p", {}).items():
+        path = path.replace("{" + name + "}", value)
+    request = {"method": entry["m"], "url": path, "params": [tuple(item) for item in entry.get("q", [])]}
+    if "b" in entry:
+        request["json"] = synthesize(entry["b"])
+    headers = {}
+    if "idem" in entry:
+        headers["Idempotency-Key"] = entry["idem"]
+    if "tenant" in entry:
+        headers["X-Tenant-ID"] = entry["tenant"]
+    if headers:
+        request["headers"] = headers
+    return request
+
+
+async def replay(entries: List[Dict[str, Any]], speed: float, concurrency: int) -> Dict[str, Any]:
+    results = defaultdict(list)
+    captured = defaultdict(list)
+    errors = defaultdict(int)
+    limiter = asyncio.Semaphore(concurrency)
+
+    await main.app.router.startup()
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=None) as client:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+
+            async def fire(entry):
+                if speed:
+                    delay = entry["t"] / speed - (loop.time() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                key = f"{entry['m']} {entry['r']}"
+                async with limiter:
+                    request_started = time.perf_counter()
+                    response = await client.request(**build_request(entry))
+                    results[key].append((time.perf_counter() - request_started) * 1000)
+                captured[key].append(entry["ms"])
+                if response.status_code >= 500:
+                    errors[key] += 1
+
+            await asyncio.gather(*(fire(entry) for entry in entries))
+            elapsed = loop.time() - started
+    finally:
+        await main.app.router.shutdown()
+
+    return {"elapsed_s": elapsed, "routes": results, "captured": captured, "errors": errors}
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    p50, p90, p99 = (float(value) for value in np.percentile(values, [50, 90, 99]))
+    return {"p50": round(p50, 2), "p90": round(p90, 2), "p99": round(p99, 2), "max": round(max(values), 2)}
+
+
+def report(outcome: Dict[str, Any]) -> Dict[str, Any]:
+    routes = {}
+    for key, latencies in sorted(outcome["routes"].items(), key=lambda item: -len(item[1])):
+        routes[key] = {
+            "requests": len(latencies),
+            "errors": outcome["errors"].get(key, 0),
+            "replay_ms": percentiles(latencies),
+            "captured_ms": percentiles(outcome["captured"][key])
+        }
+    everything = [latency for latencies in outcome["routes"].values() for latency in latencies]
+    total = len(everything)
+    return {
+        "requests": total,
+        "elapsed_s": round(outcome["elapsed_s"], 3),
+        "throughput_rps": round(total / outcome["elapsed_s"], 1) if outcome["elapsed_s"] else 0.0,
+        "overall_ms": percentiles(everything) if everything else {},
+        "routes": routes
+    }
+
+
+def print_report(summary: Dict[str, Any]):
+    print(
+        f"{summary['requests']} requests in {summary['elapsed_s']}s "
+        f"({summary['throughput_rps']} req/s), overall {summary['overall_ms']}"
+    )
+    print(f"{'route':48} {'n':>6} {'5xx':>5} {'p50':>8} {'p90':>8} {'p99':>8} {'cap p50':>8} {'cap p99':>8}")
+    for key, route in summary["routes"].items():
+        replayed, observed = route["replay_ms"], route["captured_ms"]
+        print(
+            f"{key[:48]:48} {route['requests']:>6} {route['errors']:>5} "
+            f"{replayed['p50']:>8.2f} {replayed['p90']:>8.2f} {replayed['p99']:>8.2f} "
+            f"{observed['p50']:>8.2f} {observed['p99']:>8.2f}"
+        )
+
+
+def main_cli(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Replay a captured traffic trace offline")
+    parser.add_argument("trace")
+    parser.add_argument("--speed", default="1", help="pace multiplier (1, 10, ...) or 'max'")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--firestore-latency-ms", type=float, default=5.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    entries = load_trace(args.trace)
+    if not entries:
+        sys.exit(f"No replayable requests in {args.trace}")
+
+    fake = FakeFirestore(latency_ms=args.firestore_latency_ms)
+    seed_documents(fake, entries)
+    install_fake_firestore(fake)
+
+    speed = 0.0 if args.speed == "max" else float(args.speed)
+    summary = report(asyncio.run(replay(entries, speed, args.concurrency)))
+    summary["firestore_calls"] = fake.calls
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+        print(f"Firestore round trips: {fake.calls}")
+
+
+if __name__ == "__main__":
+    main_cli(sys.argv[1:])
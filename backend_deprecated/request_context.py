@@ -0,0 +1,30 @@
+"""
+Per-request context shared by logging and Firestore instrumentation
+"""
+
+import contextvars
+from collections import Counter
+from typing import Optional
+
+request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+route: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("route", default=None)
+
+
+class RequestStats:
+    """Mutable counters for the request currently being served"""
+
+    def __init__(self):
+        self.firestore_calls = 0
+        self.firestore_ms = 0.0
+        # (operation, collection) -> count, for spotting per-item calls in loops
+        self.firestore_ops: Counter = Counter()
+
+
+request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def route_name(scope) -> str:
+    """'METHOD /path/{template}' for routed requests, the raw path otherwise"""
+    matched = scope.get("route")
+    return f"{scope['method']} {matched.path if matched is not None else scope['path']}"
+
@@ -0,0 +1,154 @@
+"""
+Priority scheduling for blocking work
+Blocking calls run on one of three bounded thread pools (interactive, batch,
+maintenance) instead of sharing the default executor. Batch and maintenance
+work waits while the p95 latency of recent interactive requests is above a
+threshold, so background jobs back off whenever user-facing reads slow down,
+but never for longer than max_wait, so it can't be starved indefinitely.
+"""
+
+import asyncio
+import contextvars
+import functools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+MAINTENANCE = "maintenance"
+
+# Maintenance yields earlier than batch work
+_THRESHOLD_FACTORS = {BATCH: 1.0, MAINTENANCE: 0.75}
+
+
+class LatencyTracker:
+    """Rolling p95 of request latencies over a time window"""
+
+    def __init__(self, window: float = 10.0, max_samples: int = 2048, refresh: float = 0.1):
+        self.window = window
+        self.refresh = refresh
+        self._samples: deque = deque(maxlen=max_samples)
+        self._p95 = 0.0
+        self._computed_at = 0.0
+
+    def observe(self, latency_ms: float):
+        self._samples.append((time.monotonic(), latency_ms))
+
+    def p95(self) -> float:
+        now = time.monotonic()
+        if now - self._computed_at >= self.refresh:
+            cutoff = now - self.window
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            latencies = sorted(latency for _, latency in self._samples)
+            self._p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+            self._computed_at = now
+        return self._p95
+
+
+class PriorityScheduler:
+    """Bounded executors per priority class with latency-driven backoff"""
+
+    def __init__(
+        self,
+        workers: Optional[Dict[str, int]] = None,
+        p95_threshold_ms: float = 250.0,
+        max_backoff: float = 2.0,
+        max_wait: float = 30.0
+    ):
+        workers = {INTERACTIVE: 16, BATCH: 4, MAINTENANCE: 1, **(workers or {})}
+        self.p95_threshold_ms = p95_threshold_ms
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self.latency = LatencyTracker()
+        self._executors = {
+            priority: ThreadPoolExecutor(max_workers=count, thread_name_prefix=priority)
+            for priority, count in workers.items()
+        }
+
+    async def run(self, priority: str, func: Callable[..., Any], *args) -> Any:
+        """Run a blocking call on the priority's executor, keeping the request context"""
+        if priority != INTERACTIVE:
+            await self.wait_for_headroom(priority)
+        return await self.execute(priority, func, *args)
+
+    async def execute(self, priority: str, func: Callable[..., Any], *args) -> Any:
+        """Like run(), without waiting for headroom first"""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executors[priority], functools.partial(context.run, func, *args))
+
+    async def wait_for_headroom(self, priority: str):
+        """Sleep with exponential backoff while interactive traffic is slow, up to max_wait in total"""
+        threshold = self.p95_threshold_ms * _THRESHOLD_FACTORS.get(priority, 1.0)
+        delay = 0.01
+        deadline = time.monotonic() + self.max_wait
+        while self.latency.p95() > threshold:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.max_backoff)
+
+    def shutdown(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+
+
+_scheduler: Optional[PriorityScheduler] = None
+
+
+def configure(**kwargs) -> PriorityScheduler:
+    """Replace the process-wide scheduler"""
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown()
+    _scheduler = PriorityScheduler(**kwargs)
+    return _scheduler
+
+
+def get_scheduler() -> PriorityScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PriorityScheduler()
+    return _scheduler
+
+
+async def run(priority: str, func: Callable[..., Any], *args) -> Any:
+    return await get_scheduler().run(priority, func, *args)
+
+
+def _is_long_poll(scope) -> bool:
+    """GETs with ?wait=N>0 (e.g. job polls) are slow by design, not because the server is"""
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("wait", [])
+    try:
+        return any(float(value) > 0 for value in values)
+    except ValueError:
+        return False
+
+
+class InteractiveLatencyMiddleware:
+    """Feeds GET request latencies into the scheduler's backoff signal"""
+
+    def __init__(self, app, excluded_prefixes=("/api/debug", "/api/metrics")):
+        self.app = app
+        self.excluded_prefixes = excluded_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or scope["path"].startswith(self.excluded_prefixes)
+            or _is_long_poll(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            get_scheduler().latency.observe((time.perf_counter() - start) * 1000)
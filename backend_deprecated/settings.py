@@ -0,0 +1,113 @@
+"""
+Backend runtime settings
+Values are read from the environment or a .env file via python-decouple.
+"""
+
+import os
+
+from decouple import config
+
+# Server process layout
+HOST = config("HOST", default="0.0.0.0")
+PORT = config("PORT", default=8001, cast=int)
+WORKERS = config("WORKERS", default=1, cast=int)
+
+# uvicorn tuning; uvloop and httptools come with uvicorn[standard]
+LOOP = config("LOOP", default="auto")  # auto, uvloop or asyncio
+HTTP = config("HTTP", default="auto")  # auto, httptools or h11
+KEEP_ALIVE_TIMEOUT = config("KEEP_ALIVE_TIMEOUT", default=30, cast=int)
+BACKLOG = config("BACKLOG", default=2048, cast=int)
+LIMIT_CONCURRENCY = config("LIMIT_CONCURRENCY", default=0, cast=int)  # 0 = unlimited
+ACCESS_LOG = config("ACCESS_LOG", default=True, cast=bool)
+
+# Cache tier shared by worker processes; used automatically when WORKERS > 1
+SHARED_CACHE = config("SHARED_CACHE", default=WORKERS > 1, cast=bool)
+SHARED_CACHE_PATH = config("SHARED_CACHE_PATH", default="")
+GENERATION_CACHE_TTL = config("GENERATION_CACHE_TTL", default=300, cast=float)
+
+# Structured logging; sample rates look like "GET /api/components=0.1,GET /=0"
+LOG_LEVEL = config("LOG_LEVEL", default="INFO")
+LOG_SAMPLE_RATES = config("LOG_SAMPLE_RATES", default="")
+LOG_SLOW_MS = config("LOG_SLOW_MS", default=1000, cast=float)
+
+# Firestore call profiling for dev and test runs
+FIRESTORE_PROFILING = config("FIRESTORE_PROFILING", default=False, cast=bool)
+FIRESTORE_CALL_BUDGET = config("FIRESTORE_CALL_BUDGET", default=5, cast=int)
+FIRESTORE_REPEAT_THRESHOLD = config("FIRESTORE_REPEAT_THRESHOLD", default=3, cast=int)
+
+# Archival of completed projects; an interval of 0 disables the background sweep
+ARCHIVE_AFTER_DAYS = config("ARCHIVE_AFTER_DAYS", default=180, cast=int)
+ARCHIVE_INTERVAL = config("ARCHIVE_INTERVAL", default=86400, cast=float)
+
+# Priority scheduling of blocking work; batch and maintenance work backs off
+# while interactive p95 latency is above the threshold
+INTERACTIVE_WORKERS = config("INTERACTIVE_WORKERS", default=16, cast=int)
+BATCH_WORKERS = config("BATCH_WORKERS", default=4, cast=int)
+MAINTENANCE_WORKERS = config("MAINTENANCE_WORKERS", default=1, cast=int)
+INTERACTIVE_P95_THRESHOLD_MS = config("INTERACTIVE_P95_THRESHOLD_MS", default=250, cast=float)
+# Longest a background task defers to slow interactive traffic before running anyway, in seconds
+BACKGROUND_MAX_DEFERRAL = config("BACKGROUND_MAX_DEFERRAL", default=30, cast=float)
+
+# Keep a listener-fed in-memory replica of the components collection
+COMPONENT_REPLICA = config("COMPONENT_REPLICA", default=True, cast=bool)
+
+# Similar / compatible component graph; rebuilt in the background after catalog changes
+SIMILAR_COMPONENTS_K = config("SIMILAR_COMPONENTS_K", default=8, cast=int)
+GRAPH_REBUILD_INTERVAL = config("GRAPH_REBUILD_INTERVAL", default=30, cast=float)
+
+# Warm-start snapshot of the catalog indexes; an interval of 0 only writes on shutdown
+CATALOG_SNAPSHOT_PATH = config("CATALOG_SNAPSHOT_PATH", default="catalog.snapshot")
+CATALOG_SNAPSHOT_INTERVAL = config("CATALOG_SNAPSHOT_INTERVAL", default=300, cast=float)
+
+# Idempotency-Key results for create endpoints
+IDEMPOTENCY_TTL = config("IDEMPOTENCY_TTL", default=86400, cast=float)
+IDEMPOTENCY_MAX_KEYS = config("IDEMPOTENCY_MAX_KEYS", default=10000, cast=int)
+# How long a worker running a keyed request holds it before other workers take over
+IDEMPOTENCY_CLAIM_TTL = config("IDEMPOTENCY_CLAIM_TTL", default=60, cast=float)
+
+# Circuit breaker around Firestore; reads fall back to their last good result
+CIRCUIT_FAILURE_THRESHOLD = config("CIRCUIT_FAILURE_THRESHOLD", default=5, cast=int)
+CIRCUIT_RESET_TIMEOUT = config("CIRCUIT_RESET_TIMEOUT", default=30, cast=float)
+CIRCUIT_SLOW_CALL_MS = config("CIRCUIT_SLOW_CALL_MS", default=5000, cast=float)
+STALE_READ_TTL = config("STALE_READ_TTL", default=86400, cast=float)
+
+# Per-tenant storage; the tenant comes from this token claim (or X-Tenant-ID without auth).
+# Stale-read cache entries per tenant, with overrides like "big-school=16384,pilot=256"
+TENANT_CLAIM = config("TENANT_CLAIM", default="tenant")
+TENANT_CACHE_SIZE = config("TENANT_CACHE_SIZE", default=4096, cast=int)
+TENANT_CACHE_QUOTAS = config("TENANT_CACHE_QUOTAS", default="")
+
+# Sanitized traffic capture for replay_traffic.py (off by default)
+TRAFFIC_CAPTURE = config("TRAFFIC_CAPTURE", default=False, cast=bool)
+TRAFFIC_CAPTURE_PATH = config("TRAFFIC_CAPTURE_PATH", default="traffic.jsonl")
+TRAFFIC_CAPTURE_SAMPLE = config("TRAFFIC_CAPTURE_SAMPLE", default=1.0, cast=float)
+
+# Largest request body accepted before parsing, in bytes
+MAX_BODY_BYTES = config("MAX_BODY_BYTES", default=256 * 1024, cast=int)
+
+# Bearer-token authentication for project and user routes
+AUTH_ENABLED = config("AUTH_ENABLED", default=True, cast=bool)
+FIREBASE_PROJECT_ID = config("FIREBASE_PROJECT_ID", default="your-project-id")
+
+# Write-behind buffering for project saves and updates
+PROJECT_WRITE_BEHIND = config("PROJECT_WRITE_BEHIND", default=False, cast=bool)
+WRITE_BEHIND_FLUSH_INTERVAL = config("WRITE_BEHIND_FLUSH_INTERVAL", default=0.5, cast=float)
+WRITE_BEHIND_MAX_PENDING = config("WRITE_BEHIND_MAX_PENDING", default=200, cast=int)
+WRITE_BEHIND_JOURNAL = config("WRITE_BEHIND_JOURNAL", default="project_writes.journal")
+
+# Background generation jobs
+GENERATION_JOB_WORKERS = config("GENERATION_JOB_WORKERS", default=4, cast=int)
+# memory or sqlite; jobs must be visible to every worker when there are several
+GENERATION_JOB_STORE = config("GENERATION_JOB_STORE", default="sqlite" if WORKERS > 1 else "memory")
+GENERATION_JOB_DB = config("GENERATION_JOB_DB", default="generation_jobs.sqlite3")
+GENERATION_JOB_TTL = config("GENERATION_JOB_TTL", default=3600, cast=float)
+GENERATION_JOB_MAX_WAIT = config("GENERATION_JOB_MAX_WAIT", default=30, cast=float)
+# A running job is picked up by another worker if its owner stops renewing this lease
+GENERATION_JOB_LEASE = config("GENERATION_JOB_LEASE", default=60, cast=float)
+
+# Project idea template catalog
+IDEA_TEMPLATES_PATH = config(
+    "IDEA_TEMPLATES_PATH",
+    default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "idea_templates.json")
+)
+IDEA_RESULTS_LIMIT = config("IDEA_RESULTS_LIMIT", default=6, cast=int)
@@ -0,0 +1,210 @@
+"""
+Cache tier shared by all worker processes on one host
+Entries live in a SQLite file (on /dev/shm when available, so it stays in
+memory) inside a directory only this user can access. Values are stored as
+JSON, never pickled, so a tampered file can't run code in the workers. Each
+namespace carries a version number; bumping it tells every worker to drop its
+local copies on its next read.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional
+
+from cache import TTLCache
+
+
+def _encode(value: Any):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Cannot share value of type {type(value).__name__}")
+
+
+def _decode(obj: Dict[str, Any]):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def private_directory(path: str) -> str:
+    """Create `path` as a 0700 directory, refusing one owned by someone else"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not os.path.isdir(path) or os.path.islink(path) or info.st_uid != os.getuid():
+        raise PermissionError(f"Shared cache directory {path} is not owned by this user")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+def default_shared_cache_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    directory = private_directory(os.path.join(base, f"atal-idea-cache-{os.getuid()}"))
+    return os.path.join(directory, "cache.sqlite3")
+
+
+class SharedCache:
+    """Cross-process key/value store with per-namespace versions"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS versions (namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        try:
+            return json.loads(row[0], object_hook=_decode)
+        except ValueError:
+            # e.g. an entry written by an older, pickling version
+            return None
+
+    def set(self, key: str, value: Any, ttl: float):
+        blob = json.dumps(value, default=_encode, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, blob, time.time() + ttl)
+            )
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        """Store `value` only if `key` is absent or expired; True if it was stored"""
+        blob = json.dumps(value, default=_encode, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO entries (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE entries.expires_at <= ?",
+                (key, blob, now + ttl, now)
+            )
+        return cursor.rowcount == 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def version(self, namespace: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM versions WHERE namespace = ?", (namespace,)
+            ).fetchone()
+        return row[0] if row is not None else 0
+
+    def bump(self, namespace: str, clear_entries: bool = False) -> int:
+        """Advance a namespace's version, optionally dropping its shared entries"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO versions (namespace, version) VALUES (?, 1) "
+                    "ON CONFLICT(namespace) DO UPDATE SET version = version + 1",
+                    (namespace,)
+                )
+                if clear_entries:
+                    self._conn.execute(
+                        "DELETE FROM entries WHERE key >= ? AND key < ?",
+                        (f"{namespace}:", f"{namespace};")
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            row = self._conn.execute(
+                "SELECT version FROM versions WHERE namespace = ?", (namespace,)
+            ).fetchone()
+        return row[0]
+
+
+class TieredCache:
+    """Process-local TTL cache backed by an optional shared tier
+
+    Without a shared tier this behaves exactly like TTLCache.
+    """
+
+    def __init__(self, namespace: str, shared: Optional[SharedCache] = None, maxsize: int = 1024, ttl: float = 300.0):
+        self.namespace = namespace
+        self.shared = shared
+        self.ttl = ttl
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._seen_version = shared.version(namespace) if shared is not None else 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        self._sync_version()
+        value = self._local.get(key)
+        if value is not None:
+            return value
+
+        if self.shared is not None:
+            value = self.shared.get(self._shared_key(key))
+            if value is not None:
+                self._local.set(key, value)
+                return value
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if self.shared is not None:
+            # A value read before another worker's invalidation must not be republished
+            if self.shared.version(self.namespace) != self._seen_version:
+                self._sync_version()
+                return
+            self.shared.set(self._shared_key(key), value, ttl)
+        self._local.set(key, value, ttl)
+
+    def delete(self, key: Hashable):
+        """Drop one key here and tell the other workers to refresh"""
+        self._local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(key))
+            self._seen_version = self.shared.bump(self.namespace)
+            self._local.clear()
+
+    def claim(self, key: Hashable, ttl: float) -> bool:
+        """Take a cross-worker claim on `key` for `ttl` seconds; always granted without a shared tier"""
+        if self.shared is None:
+            return True
+        return self.shared.add(self._claim_key(key), True, ttl)
+
+    def release(self, key: Hashable):
+        if self.shared is not None:
+            self.shared.delete(self._claim_key(key))
+
+    def invalidate(self):
+        """Drop every entry in this namespace across all workers"""
+        self._local.clear()
+        if self.shared is not None:
+            self._seen_version = self.shared.bump(self.namespace, clear_entries=True)
+
+    def _sync_version(self):
+        if self.shared is None:
+            return
+        version = self.shared.version(self.namespace)
+        if version != self._seen_version:
+            self._local.clear()
+            self._seen_version = version
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _claim_key(self, key: Hashable) -> str:
+        # Outside the namespace's entry range, so invalidation leaves live claims alone
+        return f"{self.namespace}!claim:{key}"
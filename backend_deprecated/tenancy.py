@@ -0,0 +1,88 @@
+"""
+Tenant-scoped Firestore collections
+Each school or organization keeps its own projects, archived projects and
+users under tenants/{tenant}/..., so one tenant's list queries and indexes
+never scan another's documents. The default tenant stays in the original
+top-level collections, which keeps single-school deployments unchanged. The
+component catalog is shared by every tenant.
+
+Routing happens in the data layer: RoutedClient resolves tenant-scoped
+collection names against the tenant bound to the current request, so handlers
+keep calling db.collection('projects'). Background work that serves several
+tenants binds each one in turn with use_tenant() or for_each_tenant().
+"""
+
+import contextvars
+import re
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+
+DEFAULT_TENANT = "default"
+TENANTS_COLLECTION = "tenants"
+# Collections stored per tenant; anything else is shared
+TENANT_COLLECTIONS = frozenset({"projects", "archived_projects", "users"})
+
+# Usable as a Firestore document ID and in cache and journal keys
+_TENANT_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+current_tenant: contextvars.ContextVar[str] = contextvars.ContextVar("tenant", default=DEFAULT_TENANT)
+
+
+def valid_tenant(tenant: str) -> bool:
+    return bool(_TENANT_ID.match(tenant))
+
+
+def tenant_for(collection: str) -> str:
+    """The tenant whose copy of `collection` the current request reads"""
+    return current_tenant.get() if collection in TENANT_COLLECTIONS else DEFAULT_TENANT
+
+
+@contextmanager
+def use_tenant(tenant: str):
+    """Route data access inside the block to `tenant`"""
+    token = current_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        current_tenant.reset(token)
+
+
+def parse_quotas(spec: str) -> Dict[str, int]:
+    """Parse 'big-school=8192,pilot=128' into per-tenant sizes"""
+    quotas = {}
+    for item in spec.split(","):
+        if "=" in item:
+            tenant, size = item.rsplit("=", 1)
+            quotas[tenant.strip()] = int(size)
+    return quotas
+
+
+class RoutedClient:
+    """Firestore client whose tenant-scoped collections resolve to the current tenant"""
+
+    def __init__(self, db):
+        self._db = db
+
+    def collection(self, name: str):
+        tenant = tenant_for(name)
+        if tenant == DEFAULT_TENANT:
+            return self._db.collection(name)
+        return self._db.collection(TENANTS_COLLECTION).document(tenant).collection(name)
+
+    def tenants(self) -> List[str]:
+        """Every tenant with stored data, the default one first"""
+        # Tenant documents exist only as parents of their collections, so list references
+        refs = self._db.collection(TENANTS_COLLECTION).list_documents()
+        return [DEFAULT_TENANT] + sorted(ref.id for ref in refs if ref.id != DEFAULT_TENANT)
+
+    def __getattr__(self, name: str):
+        return getattr(self._db, name)
+
+
+def for_each_tenant(db: RoutedClient, func: Callable[..., Any], *args) -> Dict[str, Any]:
+    """Run `func(db, *args)` once per tenant, bound to that tenant; results by tenant"""
+    results = {}
+    for tenant in db.tenants():
+        with use_tenant(tenant):
+            results[tenant] = func(db, *args)
+    return results
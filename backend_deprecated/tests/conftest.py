@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Tests import the backend modules the way main.py does, by bare name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings are read when main is imported: no Firebase auth, background sweeps or files in the tree
+_scratch = tempfile.mkdtemp(prefix="atal-tests-")
+for name, value in {
+    "AUTH_ENABLED": "false",
+    "COMPONENT_REPLICA": "false",
+    "TRAFFIC_CAPTURE": "false",
+    "SHARED_CACHE": "false",
+    "GENERATION_JOB_STORE": "memory",
+    "ARCHIVE_INTERVAL": "0",
+    "CATALOG_SNAPSHOT_INTERVAL": "0",
+    "CATALOG_SNAPSHOT_PATH": os.path.join(_scratch, "catalog.snapshot"),
+    "WRITE_BEHIND_JOURNAL": os.path.join(_scratch, "project_writes.journal"),
+    "LOG_LEVEL": "WARNING"
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """An empty fake Firestore installed behind the app"""
+    import main
+    from fake_firestore import FakeFirestore
+    from tenancy import RoutedClient
+
+    fake = FakeFirestore()
+    db = RoutedClient(fake)
+    monkeypatch.setattr(main, "db", db)
+    monkeypatch.setattr(main.component_loader, "db", db)
+    monkeypatch.setattr(main.user_loader, "db", db)
+    main.stale_reads._last_good.clear()
+    main.component_cache.invalidate()
+    return fake
+
+
+@pytest.fixture
+def api():
+    """Send one request to the in-process app"""
+    import httpx
+    import main
+
+    def request(method, url, **kwargs):
+        async def send():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+
+        return asyncio.run(send())
+
+    return request
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import archive
+from fake_firestore import FakeFirestore
+from write_behind import WriteBehindBuffer
+
+
+def seed(db, *doc_ids, days_old=400):
+    updated_at = datetime.now() - timedelta(days=days_old)
+    for doc_id in doc_ids:
+        db.collection("projects").document(doc_id)._write({
+            "title": doc_id, "status": "completed", "user_id": "u1", "updated_at": updated_at
+        })
+
+
+def active_ids(db):
+    return sorted(doc.id for doc in db.collection("projects").stream())
+
+
+def stored_notes(db, doc_id):
+    return db.collection("projects").document(doc_id)._read().to_dict()["notes"]
+
+
+def test_stale_completed_projects_move_to_the_archive():
+    db = FakeFirestore()
+    seed(db, "old")
+    seed(db, "recent", days_old=1)
+
+    assert archive.archive_stale_projects(db, 180) == 1
+    assert active_ids(db) == ["recent"]
+    assert archive.load_archived_project(db, "old")["title"] == "old"
+
+
+def test_projects_with_pending_writes_are_skipped(monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_BATCH_SIZE", 2)
+    db = FakeFirestore()
+    seed(db, "p1", "p2", "p3", "p4", "p5")
+    pending = {"p1", "p2", "p4"}
+
+    # Skipped projects still match the query; the sweep must page past them
+    assert archive.archive_stale_projects(db, 180, lambda doc_id: doc_id in pending) == 2
+    assert active_ids(db) == ["p1", "p2", "p4"]
+
+
+def test_project_changed_after_it_was_read_is_not_archived():
+    db = FakeFirestore()
+    seed(db, "p1", "p2")
+    docs = list(db.collection("projects").stream())
+    db.collection("projects").document("p1").update({"notes": "edited meanwhile"})
+
+    with pytest.raises(ValueError):
+        archive._move_to_archive(db, docs)
+    assert active_ids(db) == ["p1", "p2"]
+    assert stored_notes(db, "p1") == "edited meanwhile"
+    assert archive.load_archived_project(db, "p2") is None
+
+
+def test_write_behind_reports_writes_until_they_are_committed(tmp_path):
+    db = FakeFirestore(latency_ms=100)
+    buffer = WriteBehindBuffer(db, "projects", str(tmp_path / "writes.journal"), flush_interval=60)
+    seen_while_committing = []
+
+    async def scenario():
+        await buffer.start()
+        await buffer.put("p1", {"notes": "buffered"})
+        assert buffer.has_pending("p1") and not buffer.has_pending("p2")
+
+        flushing = asyncio.ensure_future(buffer.flush(backoff=False))
+        await asyncio.sleep(0.05)
+        seen_while_committing.append(buffer.has_pending("p1"))
+        await flushing
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert seen_while_committing == [True]
+    assert not buffer.has_pending("p1")
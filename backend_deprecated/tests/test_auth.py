@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+from jose import jwt
+
+from auth import AuthError, TokenVerifier
+from bench_auth import KEY_ID, PROJECT_ID, make_signing_key, make_token
+
+PRIVATE_PEM, JWKS = make_signing_key()
+
+
+def verifier():
+    verifier = TokenVerifier(PROJECT_ID)
+    verifier.set_keys(JWKS)
+    return verifier
+
+
+def sign(**overrides):
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}", "aud": PROJECT_ID, "sub": "u1",
+        "iat": now, "exp": now + 3600, **overrides
+    }
+    return jwt.encode(claims, PRIVATE_PEM, algorithm="RS256", headers={"kid": KEY_ID})
+
+
+def test_valid_tokens_are_verified_once_then_cached(monkeypatch):
+    tokens = verifier()
+    token = make_token(PRIVATE_PEM, "u1")
+    assert asyncio.run(tokens.verify(token))["uid"] == "u1"
+
+    def fail(token):
+        raise AssertionError("signature checked again")
+
+    monkeypatch.setattr(tokens, "_verify_uncached", fail)
+    assert asyncio.run(tokens.verify(token))["uid"] == "u1"
+
+
+@pytest.mark.parametrize("claims", [
+    {"aud": "another-project"},
+    {"iss": "https://securetoken.google.com/another-project"},
+    {"exp": int(time.time()) - 3600},
+    {"sub": ""}
+])
+def test_tokens_for_another_project_expired_or_without_subject_are_rejected(claims):
+    with pytest.raises(AuthError):
+        asyncio.run(verifier().verify(sign(**claims)))
+
+
+def test_malformed_and_unsigned_tokens_are_rejected():
+    tokens = verifier()
+    unsigned = jwt.encode({"sub": "u1"}, "secret", algorithm="HS256", headers={"kid": KEY_ID})
+    with pytest.raises(AuthError, match="Malformed"):
+        asyncio.run(tokens.verify("not-a-token"))
+    with pytest.raises(AuthError, match="algorithm"):
+        asyncio.run(tokens.verify(unsigned))
+
+
+def test_rejections_are_cached_briefly(monkeypatch):
+    tokens = verifier()
+    token = sign(aud="another-project")
+    with pytest.raises(AuthError):
+        asyncio.run(tokens.verify(token))
+
+    def fail(token):
+        raise AssertionError("rejected token checked again")
+
+    monkeypatch.setattr(tokens, "_verify_uncached", fail)
+    with pytest.raises(AuthError, match="Invalid token"):
+        asyncio.run(tokens.verify(token))
+
+
+def test_cached_keys_keep_serving_when_the_key_endpoint_is_down():
+    tokens = TokenVerifier(PROJECT_ID, jwks_url="http://127.0.0.1:9/jwks")
+    tokens.set_keys(JWKS, max_age=0)
+    # Expired keys with an unreachable endpoint: the keys we have still work
+    assert asyncio.run(tokens.verify(make_token(PRIVATE_PEM, "u1")))["uid"] == "u1"
+
+    without_keys = TokenVerifier(PROJECT_ID, jwks_url="http://127.0.0.1:9/jwks")
+    with pytest.raises(AuthError, match="signing keys"):
+        asyncio.run(without_keys.verify(make_token(PRIVATE_PEM, "u1")))
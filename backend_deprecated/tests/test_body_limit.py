@@ -0,0 +1,51 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI, Request
+
+from body_limit import BodySizeLimitMiddleware
+
+
+def limited_app(max_bytes):
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=max_bytes)
+    return app
+
+
+def post(app, content):
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/echo", content=content)
+
+    return asyncio.run(send())
+
+
+def chunks(*sizes):
+    async def stream():
+        for size in sizes:
+            yield b"x" * size
+
+    return stream()
+
+
+def test_bodies_within_the_limit_pass():
+    assert post(limited_app(100), b"x" * 100).json() == {"size": 100}
+    assert post(limited_app(100), chunks(50, 50)).json() == {"size": 100}
+
+
+def test_declared_length_over_the_limit_is_rejected_before_reading():
+    response = post(limited_app(100), b"x" * 101)
+    assert response.status_code == 413
+    assert response.headers["connection"] == "close"
+
+
+def test_chunked_body_is_cut_off_once_it_passes_the_limit():
+    response = post(limited_app(100), chunks(60, 60, 60))
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body exceeds 100 bytes"}
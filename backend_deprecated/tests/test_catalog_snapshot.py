@@ -0,0 +1,197 @@
+import asyncio
+import json
+import pickle
+import struct
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+import main
+from catalog_snapshot import MAGIC, SNAPSHOT_VERSION, as_utc, read_snapshot, write_snapshot
+from component_facets import ComponentFacets
+from component_graph import ComponentGraph
+from component_replica import ComponentReplica
+from component_resolver import ComponentResolver
+from pricing import BomEstimator
+
+
+def test_naive_values_are_utc():
+    # The Firestore client hands back naive datetimes that are already UTC
+    assert as_utc(datetime(2024, 5, 1, 12, 0)) == datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_aware_values_are_converted():
+    local = datetime(2024, 5, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert as_utc(local) == datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    assert as_utc(local).tzinfo == timezone.utc
+
+
+def test_watermark_and_sections_round_trip(tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    watermark = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    write_snapshot(path, watermark, {"resolver": {"names": ["arduino uno"]}, "prices": {"1": (5.0, 10.0)}})
+
+    restored_watermark, sections = read_snapshot(path)
+    assert restored_watermark == watermark
+    assert sections == {"resolver": {"names": ["arduino uno"]}, "prices": {"1": (5.0, 10.0)}}
+
+
+def test_index_types_survive_the_round_trip(tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    scores = np.arange(6, dtype=np.float32).reshape(2, 3)
+    state = {
+        "counts": Counter({"Sensors": 2}),
+        "postings": {" ar": {0, 3}},
+        "slots": [("arduino-uno", 5), None],
+        "built": (["a", "b"], scores, np.full((0, 3), -1, dtype=np.int32))
+    }
+    write_snapshot(path, None, {"index": state})
+
+    restored = read_snapshot(path)[1]["index"]
+    assert restored["counts"] == Counter({"Sensors": 2}) and isinstance(restored["counts"], Counter)
+    assert restored["postings"] == {" ar": {0, 3}}
+    assert restored["slots"] == [("arduino-uno", 5), None]
+    assert restored["built"][0] == ["a", "b"]
+    assert restored["built"][1].dtype == np.float32 and np.array_equal(restored["built"][1], scores)
+    assert restored["built"][2].shape == (0, 3)
+
+
+class Planted:
+    ran = False
+
+    def __reduce__(self):
+        return setattr, (Planted, "ran", True)
+
+
+def test_planted_pickles_are_never_loaded(tmp_path):
+    path = tmp_path / "catalog.snapshot"
+    payload = pickle.dumps(Planted())
+    header = json.dumps({"watermark": None, "sections": {"resolver": [0, len(payload)]}, "arrays": []}).encode()
+    path.write_bytes(struct.pack("<8sII", MAGIC, SNAPSHOT_VERSION, len(header)) + header + payload)
+
+    assert read_snapshot(str(path)) is None
+    assert not Planted.ran
+
+
+def test_object_arrays_are_rejected(tmp_path):
+    path = tmp_path / "catalog.snapshot"
+    section = b'{"__array__":0}'
+    header = json.dumps({
+        "watermark": None, "sections": {"graph": [0, len(section)]}, "arrays": [[len(section), "|O", [1]]]
+    }).encode()
+    path.write_bytes(struct.pack("<8sII", MAGIC, SNAPSHOT_VERSION, len(header)) + header + section + bytes(8))
+
+    assert read_snapshot(str(path)) is None
+
+
+def test_missing_snapshot_is_none(tmp_path):
+    assert read_snapshot(str(tmp_path / "missing.snapshot")) is None
+
+
+def test_outdated_or_corrupt_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "catalog.snapshot"
+    write_snapshot(str(path), datetime.now(timezone.utc), {"resolver": {}})
+    data = bytearray(path.read_bytes())
+
+    struct.pack_into("<I", data, 8, 0)
+    path.write_bytes(bytes(data))
+    assert read_snapshot(str(path)) is None
+
+    path.write_bytes(b"not a snapshot")
+    assert read_snapshot(str(path)) is None
+
+
+@pytest.fixture
+def catalog(fake_db, monkeypatch, tmp_path):
+    """Empty catalog indexes in main, snapshotting to a scratch file"""
+    def reset():
+        monkeypatch.setattr(main, "component_resolver", ComponentResolver())
+        monkeypatch.setattr(main, "component_facets", ComponentFacets())
+        monkeypatch.setattr(main, "component_graph", ComponentGraph(k=4))
+        monkeypatch.setattr(main, "bom_estimator", BomEstimator())
+        monkeypatch.setattr(main, "catalog_watermark", None)
+
+    monkeypatch.setattr(main.settings, "CATALOG_SNAPSHOT_PATH", str(tmp_path / "catalog.snapshot"))
+    reset()
+    return reset
+
+
+def store_component(fake_db, component_id, name, updated_at):
+    # Stored the way the Firestore client returns it: naive, in UTC
+    fake_db.collection("components").document(component_id)._write({
+        "name": name, "description": name, "category": "Sensors", "availability": "Available",
+        "price_range": "$5-10", "updated_at": updated_at.replace(tzinfo=None)
+    })
+
+
+def test_restarted_worker_restores_the_snapshot_and_catches_up(fake_db, catalog):
+    written = datetime.now(timezone.utc) - timedelta(hours=1)
+    store_component(fake_db, "dht22", "DHT22 Sensor", written)
+    store_component(fake_db, "esp32", "ESP32 Board", written)
+    for data in main.fetch_catalog_entries():
+        main.index_component(data)
+    assert main.catalog_watermark == written
+    main.save_catalog_snapshot()
+
+    # While the worker is down one part changes, one is removed and one is added
+    store_component(fake_db, "esp32", "ESP32 DevKit", written + timedelta(minutes=1))
+    fake_db.collection("components").document("dht22")._remove()
+    store_component(fake_db, "servo", "Servo Motor", written + timedelta(minutes=2))
+
+    catalog()
+
+    async def restart():
+        assert await main.restore_catalog_snapshot()
+        restored = sorted(main.component_facets.component_ids())
+        await main.reconcile_catalog_indexes()
+        return restored
+
+    assert asyncio.run(restart()) == ["dht22", "esp32"]
+    assert sorted(main.component_facets.component_ids()) == ["esp32", "servo"]
+    assert main.component_resolver.resolve("esp32 devkit")[0] == "esp32"
+    assert main.component_resolver.resolve("dht22") is None
+    assert main.catalog_watermark == written + timedelta(minutes=2)
+
+
+def test_with_the_replica_on_a_restored_snapshot_is_reconciled_by_its_first_snapshot(fake_db, catalog, monkeypatch):
+    from test_component_replica import Doc, Listener
+
+    written = datetime.now(timezone.utc) - timedelta(hours=1)
+    store_component(fake_db, "dht22", "DHT22 Sensor", written)
+    store_component(fake_db, "esp32", "ESP32 Board", written)
+    for data in main.fetch_catalog_entries():
+        main.index_component(data)
+    main.save_catalog_snapshot()
+    catalog()
+
+    listener = Listener()
+    replica = ComponentReplica(
+        None, "components", on_upsert=main.index_component, on_remove=main.unindex_component,
+        on_sync=main.prune_catalog_indexes, subscribe=listener
+    )
+    monkeypatch.setattr(main, "component_replica", replica)
+
+    async def restart():
+        calls_before = fake_db.calls
+        assert await main.build_component_indexes()
+        await asyncio.sleep(0.01)
+        # No catalog reads beside the replica's listener
+        assert fake_db.calls == calls_before
+        await asyncio.wait_for(replica.start(timeout=0), timeout=0.1)
+        restored = sorted(main.component_facets.component_ids())
+
+        # dht22 was deleted and servo added while the worker was down
+        listener.watches[0].emit([
+            Doc("esp32", name="ESP32 DevKit", category="Sensors", price_range="$5-10"),
+            Doc("servo", name="Servo Motor", category="Sensors", price_range="$5-10")
+        ])
+        await asyncio.sleep(0.01)
+        await replica.stop()
+        return restored
+
+    assert asyncio.run(restart()) == ["dht22", "esp32"]
+    assert sorted(main.component_facets.component_ids()) == ["esp32", "servo"]
+    assert main.component_resolver.resolve("esp32 devkit")[0] == "esp32"
+    assert main.component_resolver.resolve("dht22") is None
@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+
+import main
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, StaleWhileRevalidate
+from firestore_tracing import traced_client
+from tenancy import RoutedClient
+
+
+def test_opens_after_consecutive_failures_only():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success(5)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert 59 < breaker.retry_after() <= 60
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_ms=100)
+    breaker.record_success(150)
+    breaker.record_success(150)
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == HALF_OPEN
+
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success(1)
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_and_a_lost_probe_expires():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    breaker.before_call()
+    # The probe never reports back; after another timeout a new one may go
+    time.sleep(0.06)
+    breaker.before_call()
+
+
+def test_stale_reads_serve_the_last_good_result_and_revalidate():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    reads = StaleWhileRevalidate(breaker)
+    responses = [{"v": 1}, RuntimeError("down"), {"v": 2}]
+
+    async def fetch():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def scenario():
+        fresh = await reads.read("key", fetch)
+        stale = await reads.read("key", fetch)
+        await asyncio.sleep(0.01)
+        return fresh, stale, reads._last_good.get("key")
+
+    fresh, stale, refreshed = asyncio.run(scenario())
+    assert fresh == ({"v": 1}, False)
+    assert stale == ({"v": 1}, True)
+    assert refreshed == {"v": 2}
+
+
+def test_failed_read_without_a_last_good_result_raises():
+    reads = StaleWhileRevalidate(CircuitBreaker())
+
+    async def fetch():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(reads.read("key", fetch))
+
+
+def test_open_breaker_serves_stale_users_or_503(fake_db, api, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    db = RoutedClient(traced_client(fake_db, breaker))
+    monkeypatch.setattr(main, "data_breaker", breaker)
+    monkeypatch.setattr(main, "stale_reads", StaleWhileRevalidate(breaker))
+    monkeypatch.setattr(main.user_loader, "db", db)
+    fake_db.collection("users").document("u1")._write({"name": "Ada", "email": "ada@example.com"})
+
+    assert api("GET", "/api/users/u1").status_code == 200
+    breaker.record_failure()
+
+    stale = api("GET", "/api/users/u1")
+    assert stale.status_code == 200
+    assert stale.headers["X-Data-Stale"] == "true"
+    assert stale.json()["name"] == "Ada"
+
+    unavailable = api("GET", "/api/users/u2")
+    assert unavailable.status_code == 503
+    assert 1 <= int(unavailable.headers["Retry-After"]) <= 60
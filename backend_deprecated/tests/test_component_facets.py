@@ -0,0 +1,58 @@
+from component_facets import ComponentFacets
+
+
+def component(component_id, category="Sensors", availability="Available", price_range="$5-10", name=None):
+    return {
+        "id": component_id, "name": name or component_id, "description": "", "category": category,
+        "availability": availability, "price_range": price_range
+    }
+
+
+def recount(components, search=None):
+    """Facet counts built from scratch, for comparison"""
+    facets = ComponentFacets()
+    for data in components:
+        facets.add(data)
+    return facets.counts(search)
+
+
+def test_counts_follow_adds_changes_and_removals():
+    facets = ComponentFacets()
+    facets.add(component("dht22"))
+    facets.add(component("esp32", category="Microcontrollers", price_range="$8"))
+    facets.add(component("servo", category="Actuators", availability="Out of Stock", price_range="$20"))
+    facets.add(component("esp32", category="Microcontrollers", price_range="$40"))
+    facets.remove("servo")
+    facets.remove("missing")
+
+    assert facets.counts() == {
+        "total": 2,
+        "category": {"Sensors": 1, "Microcontrollers": 1},
+        "availability": {"Available": 2},
+        "price": {"5-15": 1, "30-plus": 1}
+    }
+    rebuilt = recount([component("dht22"), component("esp32", category="Microcontrollers", price_range="$40")])
+    assert facets.counts() == rebuilt
+
+
+def test_search_narrows_counts_like_the_list_endpoint():
+    facets = ComponentFacets()
+    facets.add(component("dht22", name="DHT22 Humidity Sensor"))
+    facets.add(component("esp32", category="Microcontrollers", name="ESP32", price_range=None))
+
+    assert facets.counts("humidity") == {
+        "total": 1, "category": {"Sensors": 1}, "availability": {"Available": 1}, "price": {"5-15": 1}
+    }
+    assert facets.counts("micro")["price"] == {"unknown": 1}
+    assert facets.counts("nothing")["total"] == 0
+
+
+def test_state_round_trips_through_a_snapshot():
+    facets = ComponentFacets()
+    facets.add(component("dht22"))
+    restored = ComponentFacets()
+    restored.load_state(facets.export_state())
+    restored.add(component("esp32"))
+
+    assert restored.counts()["category"] == {"Sensors": 2}
+    assert sorted(restored.component_ids()) == ["dht22", "esp32"]
@@ -0,0 +1,65 @@
+import numpy as np
+
+import component_graph
+from component_graph import ComponentGraph
+
+CATALOG = [
+    {"id": "dht22", "name": "DHT22", "description": "Temperature and humidity sensor", "category": "Sensors"},
+    {"id": "dht11", "name": "DHT11", "description": "Basic temperature and humidity sensor", "category": "Sensors"},
+    {"id": "bmp280", "name": "BMP280", "description": "Barometric pressure sensor", "category": "Sensors"},
+    {"id": "servo", "name": "Servo Motor", "description": "Rotary actuator", "category": "Actuators"},
+    {"id": "esp32", "name": "ESP32", "description": "Wi-Fi microcontroller", "category": "Microcontrollers"}
+]
+TEMPLATES = [["esp32", "dht22"], ["esp32", "dht22", "servo"], ["esp32", "servo"], ["esp32", "unknown-part"]]
+
+
+def built_graph(k=3, components=CATALOG):
+    graph = ComponentGraph(k=k)
+    for data in components:
+        graph.add(data)
+    graph.install(graph.build(graph.features(), TEMPLATES))
+    return graph
+
+
+def test_similar_components_share_category_and_words():
+    similar = built_graph().neighbors("dht22")["similar"]
+    assert [item["id"] for item in similar[:2]] == ["dht11", "bmp280"]
+    assert "dht22" not in [item["id"] for item in similar]
+    assert similar[0]["name"] == "DHT11"
+    assert [item["score"] for item in similar] == sorted((item["score"] for item in similar), reverse=True)
+
+
+def test_compatible_components_come_from_templates():
+    graph = built_graph()
+    assert graph.neighbors("esp32")["compatible"] == [
+        {"id": "dht22", "name": "DHT22", "count": 2}, {"id": "servo", "name": "Servo Motor", "count": 2}
+    ]
+    assert graph.neighbors("bmp280")["compatible"] == []
+    assert graph.neighbors("unknown-part") is None
+
+
+def test_blocked_similarity_matches_a_single_block(monkeypatch):
+    whole = built_graph().build(built_graph().features(), TEMPLATES)
+    monkeypatch.setattr(component_graph, "BLOCK_ROWS", 2)
+    blocked = built_graph().build(built_graph().features(), TEMPLATES)
+
+    assert whole[0] == blocked[0]
+    for a, b in zip(whole[1:], blocked[1:]):
+        assert np.allclose(a, b)
+
+
+def test_changes_mark_the_graph_dirty_and_removed_parts_drop_out():
+    graph = built_graph()
+    assert not graph.dirty
+    graph.add(CATALOG[0])
+    assert not graph.dirty
+
+    graph.remove("dht11")
+    assert graph.dirty
+    # Until the next rebuild, lookups skip the removed component
+    assert "dht11" not in [item["id"] for item in graph.neighbors("dht22")["similar"]]
+    assert graph.neighbors("dht11") is None
+
+
+def test_a_single_component_has_no_neighbours():
+    assert built_graph(components=CATALOG[:1]).neighbors("dht22") == {"similar": [], "compatible": []}
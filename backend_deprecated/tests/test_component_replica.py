@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from component_replica import ComponentReplica
+
+
+class Doc:
+    def __init__(self, doc_id, **data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+def change(kind, doc):
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=doc)
+
+
+class Watch:
+    def __init__(self, callback):
+        self.callback = callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+
+    def emit(self, documents, changes=()):
+        # Listener callbacks arrive on a background thread
+        thread = threading.Thread(target=self.callback, args=(documents, list(changes), None))
+        thread.start()
+        thread.join()
+
+
+class Listener:
+    def __init__(self):
+        self.watches = []
+
+    def __call__(self, callback):
+        self.watches.append(Watch(callback))
+        return self.watches[-1]
+
+
+def test_snapshots_and_changes_flow_into_the_replica_and_hooks():
+    listener = Listener()
+    upserts, removals = [], []
+    replica = ComponentReplica(
+        None, "components", on_upsert=lambda data: upserts.append(data["id"]), on_remove=removals.append,
+        subscribe=listener
+    )
+
+    async def scenario():
+        start = asyncio.ensure_future(replica.start(timeout=1))
+        await asyncio.sleep(0)
+        listener.watches[0].emit([Doc("esp32", name="ESP32"), Doc("dht22", name="DHT22")])
+        await start
+        assert replica.ready
+
+        listener.watches[0].emit([], [
+            change("MODIFIED", Doc("esp32", name="ESP32 DevKit")),
+            change("REMOVED", Doc("dht22"))
+        ])
+        await asyncio.sleep(0.01)
+        await replica.stop()
+
+    asyncio.run(scenario())
+    assert replica.get("esp32") == {"name": "ESP32 DevKit", "id": "esp32"}
+    assert replica.get("dht22") is None
+    assert upserts == ["esp32", "dht22", "esp32"] and removals == ["dht22"]
+
+
+def test_dead_listener_is_resubscribed_and_resynced():
+    listener = Listener()
+    replica = ComponentReplica(None, "components", subscribe=listener, check_interval=0.01, max_backoff=0.02)
+
+    async def scenario():
+        start = asyncio.ensure_future(replica.start(timeout=1))
+        await asyncio.sleep(0)
+        listener.watches[0].emit([Doc("esp32", name="ESP32"), Doc("dht22", name="DHT22")])
+        await start
+
+        listener.watches[0].is_active = False
+        for _ in range(100):
+            if len(listener.watches) > 1:
+                break
+            await asyncio.sleep(0.01)
+        # dht22 was deleted while the listener was down
+        listener.watches[1].emit([Doc("esp32", name="ESP32")])
+        await asyncio.sleep(0.01)
+        await replica.stop()
+
+    asyncio.run(scenario())
+    assert len(listener.watches) == 2
+    assert sorted(data["id"] for data in replica.values()) == ["esp32"]
+
+
+def test_start_gives_up_waiting_when_no_snapshot_arrives():
+    replica = ComponentReplica(None, "components", subscribe=Listener())
+
+    async def scenario():
+        await replica.start(timeout=0.01)
+        await replica.stop()
+
+    asyncio.run(scenario())
+    assert not replica.ready
+
+
+def test_full_snapshots_report_the_live_ids_without_blocking_start():
+    listener = Listener()
+    synced = []
+    replica = ComponentReplica(None, "components", on_sync=synced.append, subscribe=listener)
+
+    async def scenario():
+        # Nothing to wait for when the caller already has usable data
+        await asyncio.wait_for(replica.start(timeout=0), timeout=0.1)
+        assert not replica.ready
+        listener.watches[0].emit([Doc("esp32", name="ESP32")])
+        await asyncio.sleep(0.01)
+        listener.watches[0].emit([], [change("ADDED", Doc("dht22", name="DHT22"))])
+        await asyncio.sleep(0.01)
+        await replica.stop()
+
+    asyncio.run(scenario())
+    assert replica.ready
+    assert synced == [{"esp32"}]
@@ -0,0 +1,43 @@
+from component_resolver import ComponentResolver
+
+
+def test_resolves_loose_names():
+    resolver = ComponentResolver()
+    resolver.add("dht22", "DHT22 Temperature Sensor")
+    resolver.add("servo-sg90", "Servo Motor SG90")
+
+    assert resolver.resolve("dht-22")[0] == "dht22"
+    assert resolver.resolve("Servo")[0] == "servo-sg90"
+    assert resolver.resolve("") is None
+
+
+def test_reindexing_reuses_freed_slots():
+    resolver = ComponentResolver()
+    resolver.add("esp32", "ESP32 Dev Board")
+    resolver.add("servo-sg90", "Servo Motor SG90")
+    size = len(resolver._slots)
+
+    for _ in range(100):
+        resolver.add("esp32", "ESP32 Dev Board")
+        resolver.remove("servo-sg90")
+        resolver.add("servo-sg90", "Servo Motor SG90")
+
+    assert len(resolver._slots) == size
+    assert resolver.resolve("esp32")[0] == "esp32"
+    assert resolver.resolve("sg90 servo motor")[0] == "servo-sg90"
+
+
+def test_restored_index_reuses_its_freed_slots():
+    resolver = ComponentResolver()
+    resolver.add("esp32", "ESP32 Dev Board")
+    resolver.add("servo-sg90", "Servo Motor SG90")
+    size = len(resolver._slots)
+    resolver.remove("servo-sg90")
+
+    restored = ComponentResolver()
+    restored.load_state(resolver.export_state())
+    restored.add("servo-sg90", "Servo Motor SG90")
+
+    assert len(restored._slots) == size
+    assert restored.resolve("Servo")[0] == "servo-sg90"
+    assert restored.resolve("esp32")[0] == "esp32"
@@ -0,0 +1,32 @@
+import main
+
+
+def store(fake_db, *doc_ids):
+    for doc_id in doc_ids:
+        fake_db.collection("components").document(doc_id)._write({
+            "name": doc_id.upper(), "description": "Part", "category": "Sensors", "price_range": "$5-10"
+        })
+
+
+def test_batch_get_returns_found_components_and_missing_ids(fake_db, api):
+    store(fake_db, "esp32", "dht22")
+
+    response = api("POST", "/api/components:batchGet", json={"ids": ["esp32", "nope", "dht22", "esp32"]})
+    assert response.status_code == 200
+    assert [component["id"] for component in response.json()["components"]] == ["esp32", "dht22"]
+    assert response.json()["missing"] == ["nope"]
+    assert fake_db.calls == 1
+
+
+def test_batch_get_serves_cached_components_without_a_read(fake_db, api):
+    store(fake_db, "esp32")
+    api("POST", "/api/components:batchGet", json={"ids": ["esp32"]})
+    calls = fake_db.calls
+
+    assert api("POST", "/api/components:batchGet", json={"ids": ["esp32"]}).json()["missing"] == []
+    assert fake_db.calls == calls
+
+
+def test_batch_get_rejects_too_many_ids(fake_db, api):
+    ids = [f"c{i}" for i in range(main.MAX_BATCH_GET_IDS + 1)]
+    assert api("POST", "/api/components:batchGet", json={"ids": ids}).status_code == 400
@@ -0,0 +1,24 @@
+from connection_stats import ConnectionStats
+
+
+def test_requests_from_a_known_client_pair_count_as_reused():
+    stats = ConnectionStats(keep_alive=30)
+    for client in [("10.0.0.1", 5000), ("10.0.0.1", 5000), ("10.0.0.1", 5001), ("10.0.0.1", 5000), None]:
+        stats.record(client)
+
+    snapshot = stats.snapshot()
+    assert (snapshot["requests"], snapshot["connections"], snapshot["reused_requests"]) == (5, 3, 2)
+    assert snapshot["reuse_ratio"] == 0.4
+    assert snapshot["open_connections_estimate"] == 2
+
+
+def test_a_pair_idle_past_keep_alive_is_a_new_connection():
+    stats = ConnectionStats(keep_alive=-1)
+    stats.record(("10.0.0.1", 5000))
+    stats.record(("10.0.0.1", 5000))
+    assert stats.snapshot()["connections"] == 2
+
+
+def test_empty_stats_have_zero_ratios():
+    snapshot = ConnectionStats(keep_alive=30).snapshot()
+    assert snapshot["reuse_ratio"] == snapshot["requests_per_connection"] == 0.0
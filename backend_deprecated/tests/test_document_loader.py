@@ -0,0 +1,64 @@
+import asyncio
+
+from document_loader import DocumentLoader
+from fake_firestore import FakeFirestore
+from tenancy import RoutedClient
+
+
+def loader_with(*doc_ids, **kwargs):
+    fake = FakeFirestore()
+    for doc_id in doc_ids:
+        fake.collection("components").document(doc_id)._write({"name": doc_id})
+    return fake, DocumentLoader(RoutedClient(fake), "components", **kwargs)
+
+
+def test_concurrent_reads_share_one_get_all():
+    fake, loader = loader_with("esp32", "dht22")
+
+    async def scenario():
+        return await asyncio.gather(
+            loader.load("esp32"), loader.load("esp32"), loader.load("dht22"), loader.load("nope")
+        )
+
+    esp32, again, dht22, missing = asyncio.run(scenario())
+    assert esp32 == again == {"name": "esp32", "id": "esp32"}
+    assert dht22["id"] == "dht22" and missing is None
+    assert fake.calls == 1
+
+
+def test_callers_get_their_own_copies():
+    _, loader = loader_with("esp32")
+
+    async def scenario():
+        first, second = await asyncio.gather(loader.load("esp32"), loader.load("esp32"))
+        first["name"] = "changed"
+        return second
+
+    assert asyncio.run(scenario())["name"] == "esp32"
+
+
+def test_full_batches_go_out_without_waiting_for_the_window():
+    fake, loader = loader_with(*(f"c{i}" for i in range(5)), window=10, max_batch=5)
+
+    async def scenario():
+        return await asyncio.wait_for(loader.load_many(f"c{i}" for i in range(5)), timeout=1)
+
+    assert sorted(asyncio.run(scenario())) == [f"c{i}" for i in range(5)]
+    assert fake.calls == 1
+
+
+def test_a_failed_batch_fails_every_waiting_read():
+    fake, loader = loader_with("esp32")
+
+    def down(references):
+        raise RuntimeError("down")
+
+    fake.get_all = down
+
+    async def scenario():
+        return await asyncio.gather(loader.load("esp32"), loader.load("dht22"), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+    # Failures aren't remembered; the next read goes to Firestore again
+    del fake.get_all
+    assert asyncio.run(loader.load("esp32"))["name"] == "esp32"
@@ -0,0 +1,29 @@
+import inspect
+from datetime import datetime, timezone
+
+from fake_firestore import FakeFirestore
+
+
+def test_naive_timestamps_compare_as_utc():
+    db = FakeFirestore()
+    db.collection("components").document("old")._write({"updated_at": datetime(2024, 5, 1, 11, 59)})
+    db.collection("components").document("new")._write({"updated_at": datetime(2024, 5, 1, 12, 1)})
+
+    watermark = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    changed = db.collection("components").where("updated_at", ">", watermark).stream()
+    assert [doc.id for doc in changed] == ["new"]
+
+
+def test_get_all_and_list_documents_are_lazy():
+    db = FakeFirestore()
+    db.collection("users").document("u1")._write({"name": "Ada"})
+    db.collection("tenants").document("school").collection("projects").document("p1")._write({"title": "Robot"})
+
+    results = db.get_all([db.collection("users").document("u1"), db.collection("users").document("u2")])
+    refs = db.collection("tenants").list_documents()
+    assert inspect.isgenerator(results) and inspect.isgenerator(refs)
+    assert db.calls == 0
+
+    assert [(doc.id, doc.exists) for doc in results] == [("u1", True), ("u2", False)]
+    assert [ref.id for ref in refs] == ["school"]
+    assert db.calls == 2
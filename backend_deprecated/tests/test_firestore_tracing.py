@@ -0,0 +1,128 @@
+import time
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from fake_firestore import FakeFirestore
+from firestore_tracing import FirestoreProfiler, traced_client
+from request_context import RequestStats, request_stats
+
+
+class GeneratorClient:
+    """Like the real client, get_all() only reaches the backend while iterating"""
+
+    def __init__(self, error=None, delay=0.0):
+        self.error = error
+        self.delay = delay
+
+    def get_all(self, references):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        yield from references
+
+
+def read_all(db):
+    return list(db.get_all(["a", "b"]))
+
+
+def test_get_all_errors_raised_while_iterating_trip_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    db = traced_client(GeneratorClient(error=api_exceptions.ServiceUnavailable("down")), breaker)
+
+    for _ in range(3):
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            read_all(db)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        read_all(db)
+
+
+def test_half_open_probe_through_get_all_is_judged_by_its_iteration():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    client = GeneratorClient(error=api_exceptions.ServiceUnavailable("down"))
+    db = traced_client(client, breaker)
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        read_all(db)
+    time.sleep(0.02)
+    assert breaker.state == HALF_OPEN
+
+    # Getting the generator back is not a successful probe
+    results = db.get_all(["a"])
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        list(results)
+    assert breaker.state == OPEN
+
+    time.sleep(0.02)
+    client.error = None
+    assert read_all(db) == ["a", "b"]
+    assert breaker.state == CLOSED
+
+
+def test_non_generator_calls_are_recorded_immediately():
+    class Document:
+        def get(self):
+            raise api_exceptions.ServiceUnavailable("down")
+
+    breaker = CircuitBreaker(failure_threshold=1)
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        traced_client(Document(), breaker).get()
+    assert breaker.state == OPEN
+
+
+def test_request_stats_time_the_whole_get_all_iteration():
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        read_all(traced_client(GeneratorClient(delay=0.05)))
+    finally:
+        request_stats.reset(token)
+
+    assert stats.firestore_calls == 1
+    assert stats.firestore_ops[("get_all", None)] == 1
+    assert stats.firestore_ms >= 50
+
+
+def traced_request(work):
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        work(traced_client(FakeFirestore()))
+    finally:
+        request_stats.reset(token)
+    return stats
+
+
+def test_calls_are_counted_per_operation_and_collection():
+    def work(db):
+        db.collection("projects").document("p1").set({"title": "A"})
+        list(db.collection("projects").where("status", "==", "saved").stream())
+        for doc_id in ("u1", "u2", "u3"):
+            db.collection("users").document(doc_id).get()
+        batch = db.batch()
+        batch.set(db.collection("projects").document("p2"), {"title": "B"})
+        batch.commit()
+
+    stats = traced_request(work)
+    assert stats.firestore_calls == 6
+    assert dict(stats.firestore_ops) == {
+        ("set", "projects"): 1, ("stream", "projects"): 1, ("get", "users"): 3, ("commit", None): 1
+    }
+
+
+def test_profiler_flags_repeated_calls_and_budget_overruns():
+    profiler = FirestoreProfiler(call_budget=3, repeat_threshold=3)
+    looped = traced_request(lambda db: [db.collection("users").document(f"u{i}").get() for i in range(4)])
+    batched = traced_request(lambda db: list(db.get_all([db.collection("users").document("u1")])))
+
+    warnings = profiler.record("GET /api/projects", looped)
+    assert warnings == ["4 Firestore calls exceeds budget of 3", "possible N+1: get users called 4 times"]
+    assert profiler.record("GET /api/projects", batched) == []
+
+    report = profiler.report()["GET /api/projects"]
+    assert (report["requests"], report["calls_avg"], report["calls_max"], report["over_budget"]) == (2, 2.5, 4, 1)
+    assert report["repeated_calls"] == {"get users": 4}
+    assert profiler.check_budgets({"GET /api/projects": 2, "GET /": 0}) == ["GET /api/projects: 4 calls > 2"]
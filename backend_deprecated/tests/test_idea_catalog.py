@@ -0,0 +1,82 @@
+import numpy as np
+
+from idea_catalog import IdeaCatalog, normalize_name
+
+
+def template(template_id, components, category="IoT", difficulty="beginner", time="2-5h"):
+    return {
+        "id": template_id, "title": template_id, "description": "", "difficulty": difficulty,
+        "estimatedTime": time, "components": components, "category": category, "instructions": []
+    }
+
+
+CATALOG = IdeaCatalog([
+    template("weather", ["ESP32", "DHT22", "OLED Display"]),
+    template(
+        "robot", ["Arduino Uno", "Servo Motors", "Ultrasonic Sensor"], category="Robotics", difficulty="advanced"
+    ),
+    template("plant", ["Arduino Uno", "Soil Moisture Sensor"], category="Home Automation"),
+    template("lamp", ["ESP32", "LED Strip"], time="lt-2h")
+])
+
+
+def test_names_match_across_case_punctuation_and_plurals():
+    assert normalize_name("Servo Motors") == normalize_name("servo-motor") == "servomotor"
+    assert normalize_name("Glass") == "glass"
+
+
+def test_requested_components_and_category_rank_first():
+    assert CATALOG.top_k(2, components=["esp32", "dht-22"]) == [0, 3]
+    assert CATALOG.top_k(1, categories=["robot"], skill="advanced")[0] == 1
+    # A requested part only counts once even if it matches several vocabulary entries
+    assert CATALOG.top_k(4, components=["sensor"])[:2] == [2, 1]
+
+
+def test_scores_match_a_per_template_reference():
+    request = {"skill": "beginner", "categories": ["iot"], "components": ["ESP32", "Servo Motor"], "time": "2-5h"}
+    expected = []
+    for item in CATALOG.templates:
+        owned = {normalize_name(name) for name in item["components"]}
+        matches = sum(normalize_name(name) in owned for name in request["components"])
+        score = 3.0 * matches / max(len(request["components"]), len(item["components"]))
+        score += 2.0 * (normalize_name(item["category"]) == "iot")
+        score += {"beginner": 1.0, "intermediate": 0.5}.get(item["difficulty"], 0.0)
+        score += 1.0 * (item["estimatedTime"] == "2-5h")
+        expected.append(score)
+
+    assert np.allclose(CATALOG.score(**request), expected)
+
+
+def test_top_k_handles_ties_and_oversized_k():
+    assert CATALOG.top_k(10) == [0, 1, 2, 3]
+    assert CATALOG.top_k(0) == []
+    # weather and robot tie for the last place; the earlier template wins
+    assert CATALOG.top_k(3, components=["ESP32", "Arduino Uno"]) == [2, 3, 0]
+
+
+def test_diversity_of_one_is_plain_top_k():
+    request = {"components": ["ESP32", "Arduino Uno"]}
+    assert CATALOG.diverse_top_k(3, diversity=1.0, **request) == CATALOG.top_k(3, **request)
+
+
+def test_diverse_ranking_spreads_across_components():
+    near_duplicates = IdeaCatalog([
+        template("weather", ["ESP32", "DHT22"]),
+        template("weather-2", ["ESP32", "DHT22"]),
+        template("weather-3", ["ESP32", "DHT22"]),
+        template("robot", ["Arduino Uno", "Servo Motor"])
+    ])
+    request = {"components": ["ESP32", "DHT22", "Servo Motor"]}
+
+    assert near_duplicates.top_k(2, **request) == [0, 1]
+    assert near_duplicates.diverse_top_k(2, diversity=0.5, **request) == [0, 3]
+
+
+def test_missing_components_are_the_parts_not_requested():
+    assert CATALOG.missing_components(0, ["esp32", "OLED"]) == ["DHT22"]
+    assert CATALOG.missing_components(1, None) == ["Arduino Uno", "Servo Motors", "Ultrasonic Sensor"]
+
+
+def test_candidate_pool_breaks_ties_by_template_order():
+    catalog = IdeaCatalog([template(f"idea-{i}", ["ESP32", f"Part {i}"]) for i in range(100)])
+    assert catalog.diverse_top_k(2, diversity=1.0, components=["ESP32"]) == [0, 1]
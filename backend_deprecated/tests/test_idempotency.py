@@ -0,0 +1,141 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from idempotency import IdempotencyConflict, IdempotencyStore
+from shared_cache import SharedCache, TieredCache
+from test_projects_api import project
+
+
+def counting(result, delay=0.0, error=None):
+    calls = []
+
+    async def create():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    return create, calls
+
+
+def test_repeats_get_the_first_result():
+    store = IdempotencyStore(TieredCache("idempotency"))
+    create, calls = counting({"id": "p1"})
+
+    async def scenario():
+        return [await store.run("key", "body", create) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [{"id": "p1"}] * 3
+    assert len(calls) == 1
+
+
+def test_reusing_a_key_with_another_body_conflicts():
+    store = IdempotencyStore(TieredCache("idempotency"))
+    create, calls = counting({"id": "p1"})
+
+    async def scenario():
+        await store.run("key", "body", create)
+        await store.run("key", "other body", create)
+
+    with pytest.raises(IdempotencyConflict):
+        asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_concurrent_repeats_collapse_into_one_call():
+    store = IdempotencyStore(TieredCache("idempotency"))
+    create, calls = counting({"id": "p1"}, delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(store.run("key", "body", create) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [{"id": "p1"}] * 5
+    assert len(calls) == 1
+
+
+def test_failures_are_not_stored():
+    store = IdempotencyStore(TieredCache("idempotency"))
+    failing, failed_calls = counting(None, delay=0.05, error=RuntimeError("Firestore down"))
+    create, calls = counting({"id": "p1"})
+
+    async def scenario():
+        # A repeat waiting on the failing call sees the same failure
+        outcomes = await asyncio.gather(
+            store.run("key", "body", failing), store.run("key", "body", failing), return_exceptions=True
+        )
+        return outcomes, await store.run("key", "body", create)
+
+    outcomes, retried = asyncio.run(scenario())
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert len(failed_calls) == 1
+    assert retried == {"id": "p1"} and len(calls) == 1
+
+
+def test_results_are_replayed_by_other_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = IdempotencyStore(TieredCache("idempotency", SharedCache(path)))
+    second = IdempotencyStore(TieredCache("idempotency", SharedCache(path)))
+    result = {"id": "p1", "updated_at": datetime(2024, 5, 1, 12, 0)}
+    create, calls = counting(result)
+
+    async def scenario():
+        await first.run("key", "body", create)
+        return await second.run("key", "body", create)
+
+    assert asyncio.run(scenario()) == result
+    assert len(calls) == 1
+
+
+def test_saving_a_project_twice_with_one_key_creates_one_document(fake_db, api):
+    headers = {"Idempotency-Key": "save-1"}
+    first = api("POST", "/api/projects", json=project(), headers=headers)
+    repeat = api("POST", "/api/projects", json=project(), headers=headers)
+    changed = api("POST", "/api/projects", json=project(title="Other"), headers=headers)
+
+    assert first.status_code == repeat.status_code == 200
+    assert repeat.json()["id"] == first.json()["id"]
+    assert changed.status_code == 422
+    assert len(list(fake_db.collection("projects").stream())) == 1
+
+
+def test_concurrent_repeats_on_other_workers_collapse_into_one_call(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    workers = [IdempotencyStore(TieredCache("idempotency", SharedCache(path))) for _ in range(3)]
+    create, calls = counting({"id": "p1"}, delay=0.1)
+
+    async def scenario():
+        return await asyncio.gather(*(worker.run("key", "body", create) for worker in workers))
+
+    assert asyncio.run(scenario()) == [{"id": "p1"}] * 3
+    assert len(calls) == 1
+
+
+def test_a_failed_claim_holder_lets_another_worker_run(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = IdempotencyStore(TieredCache("idempotency", SharedCache(path)))
+    second = IdempotencyStore(TieredCache("idempotency", SharedCache(path)))
+    failing, failed_calls = counting(None, delay=0.1, error=RuntimeError("Firestore down"))
+    create, calls = counting({"id": "p1"})
+
+    async def scenario():
+        return await asyncio.gather(
+            first.run("key", "body", failing), second.run("key", "body", create), return_exceptions=True
+        )
+
+    failed, retried = asyncio.run(scenario())
+    assert isinstance(failed, RuntimeError)
+    assert retried == {"id": "p1"}
+    assert len(failed_calls) == 1 and len(calls) == 1
+
+
+def test_claims_lapse_when_the_holder_dies(tmp_path):
+    shared = SharedCache(str(tmp_path / "cache.sqlite3"))
+    cache = TieredCache("idempotency", shared)
+    assert cache.claim("key", ttl=0.05)
+    assert not cache.claim("key", ttl=0.05)
+    time.sleep(0.1)
+    assert cache.claim("key", ttl=0.05)
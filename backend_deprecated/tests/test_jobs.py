@@ -0,0 +1,159 @@
+import asyncio
+import sqlite3
+
+import jobs
+from jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, InMemoryJobStore, JobQueue, SQLiteJobStore
+
+
+def test_two_queues_sharing_a_store_run_each_job_once(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    runs = []
+
+    async def handler(payload):
+        runs.append(payload["n"])
+        await asyncio.sleep(0.05)
+        return payload["n"]
+
+    async def scenario():
+        first = JobQueue(SQLiteJobStore(path), handler, workers=2)
+        await first.start()
+        job = await first.submit({"n": 1})
+        await asyncio.sleep(0.01)
+
+        # A second worker process starting up while the job is running
+        second = JobQueue(SQLiteJobStore(path), handler, workers=2)
+        await second.start()
+        finished = await second.wait(job["id"], timeout=2)
+        await first.stop()
+        await second.stop()
+        return finished
+
+    finished = asyncio.run(scenario())
+    assert runs == [1]
+    assert finished["status"] == SUCCEEDED
+    assert finished["result"] == 1
+
+
+def test_claim_is_atomic(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = SQLiteJobStore(path)
+    other = SQLiteJobStore(path)
+    store.create({"id": "j", "status": QUEUED, "payload": {}, "created_at": "t", "updated_at": "t"})
+
+    assert store.claim("j", "1:a", lease=60)
+    assert not other.claim("j", "2:b", lease=60)
+    assert other.get("j")["status"] == RUNNING
+
+
+def test_only_abandoned_jobs_are_requeued(tmp_path, monkeypatch):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    for job_id in ("live", "dead", "expired"):
+        store.create({"id": job_id, "status": QUEUED, "payload": {}, "created_at": "t", "updated_at": "t"})
+    store.claim("live", "100:a", lease=60)
+    store.claim("dead", "200:b", lease=60)
+    store.claim("expired", "100:c", lease=-1)
+    monkeypatch.setattr(jobs, "_owner_alive", lambda owner: owner.startswith("100:"))
+
+    assert store.requeue_abandoned() == 2
+    assert store.get("live")["status"] == RUNNING
+    assert store.get("dead")["status"] == QUEUED
+    assert store.get("expired")["status"] == QUEUED
+
+
+def test_restarted_worker_runs_jobs_left_by_a_dead_one(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = SQLiteJobStore(path)
+    store.create({"id": "j", "status": QUEUED, "payload": {"n": 7}, "created_at": "t", "updated_at": "t"})
+    # Claimed by a process that no longer exists (PIDs never reach this high)
+    store.claim("j", "999999999:x", lease=60)
+
+    async def handler(payload):
+        return payload["n"]
+
+    async def scenario():
+        queue = JobQueue(SQLiteJobStore(path), handler, workers=1)
+        await queue.start()
+        job = await queue.wait("j", timeout=2)
+        await queue.stop()
+        return job
+
+    assert asyncio.run(scenario())["result"] == 7
+
+
+def test_running_job_lease_is_renewed(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    async def handler(payload):
+        await asyncio.sleep(0.3)
+
+    async def scenario():
+        queue = JobQueue(SQLiteJobStore(path), handler, workers=1, lease=0.15)
+        await queue.start()
+        job = await queue.submit({})
+        await asyncio.sleep(0.2)
+        # Past the original lease, but the heartbeat has extended it
+        requeued = SQLiteJobStore(path).requeue_abandoned()
+        await queue.wait(job["id"], timeout=2)
+        await queue.stop()
+        return requeued
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_old_databases_gain_the_ownership_columns(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, result TEXT, "
+        "error TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL, finished_at REAL)"
+    )
+    conn.execute("INSERT INTO jobs VALUES ('j', 'queued', '{}', NULL, NULL, 't', 't', NULL)")
+    conn.commit()
+    conn.close()
+
+    assert SQLiteJobStore(path).claim("j", "1:a", lease=60)
+
+
+def test_failed_jobs_are_recorded():
+    async def handler(payload):
+        raise ValueError("boom")
+
+    async def scenario():
+        queue = JobQueue(InMemoryJobStore(), handler, workers=1)
+        await queue.start()
+        job = await queue.submit({})
+        job = await queue.wait(job["id"], timeout=1)
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job["status"] == FAILED
+    assert job["error"] == "boom"
+
+
+def test_async_generation_request_is_served_through_a_job(monkeypatch):
+    import httpx
+    import main
+
+    queue = JobQueue(InMemoryJobStore(), main.run_generation_job, workers=1)
+    monkeypatch.setattr(main, "generation_jobs", queue)
+
+    async def scenario():
+        await queue.start()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            accepted = await client.post("/api/projects/generate?async=true", json={"skill": "beginner"})
+            job_id = accepted.json()["id"]
+            finished = await client.get(f"/api/projects/generate/jobs/{job_id}", params={"wait": 2})
+            missing = await client.get("/api/projects/generate/jobs/unknown")
+        await queue.stop()
+        return accepted, finished, missing
+
+    accepted, finished, missing = asyncio.run(scenario())
+    assert accepted.status_code == 202
+    assert accepted.json()["status"] == QUEUED
+    # The stored request payload is not echoed back to clients
+    assert "payload" not in accepted.json()
+    assert finished.json()["status"] == SUCCEEDED
+    assert len(finished.json()["result"]) == main.settings.IDEA_RESULTS_LIMIT
+    assert missing.status_code == 404
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+import queue
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+
+from log_config import (
+    JsonFormatter, RequestContextFilter, RequestLoggingMiddleware, StructuredQueueHandler, access_logger, bind_route,
+    parse_sample_rates
+)
+from request_context import request_id
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.addFilter(RequestContextFilter())
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def logged_app(**options):
+    app = FastAPI(dependencies=[Depends(bind_route)])
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        if item_id == "broken":
+            raise HTTPException(status_code=500, detail="broken")
+        return {"id": item_id}
+
+    app.add_middleware(RequestLoggingMiddleware, **options)
+    return app
+
+
+def get(app, url, **kwargs):
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(url, **kwargs)
+
+    return asyncio.run(send())
+
+
+def access_records(app, *requests):
+    capture = Capture()
+    level = access_logger.level
+    access_logger.addHandler(capture)
+    access_logger.setLevel(logging.INFO)
+    try:
+        responses = [get(app, url, **kwargs) for url, kwargs in requests]
+    finally:
+        access_logger.removeHandler(capture)
+        access_logger.setLevel(level)
+    return responses, capture.records
+
+
+def test_records_are_one_json_object_with_extras_and_request_context():
+    record = logging.LogRecord("atal", logging.WARNING, __file__, 1, "slow %s", ("query",), None)
+    record.collection = "projects"
+    token = request_id.set("req-1")
+    try:
+        RequestContextFilter().filter(record)
+    finally:
+        request_id.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "slow query" and entry["level"] == "WARNING"
+    assert entry["collection"] == "projects" and entry["request_id"] == "req-1"
+
+
+def test_sample_rates_parse_per_route():
+    assert parse_sample_rates("GET /api/components=0.1, GET /=0") == {"GET /api/components": 0.1, "GET /": 0.0}
+    assert parse_sample_rates("") == {}
+
+
+def test_access_line_per_request_with_its_route_and_request_id():
+    (response,), records = access_records(logged_app(), ("/items/1", {"headers": {"X-Request-ID": "abc"}}))
+
+    assert response.headers["x-request-id"] == "abc"
+    assert len(records) == 1
+    assert (records[0].request_id, records[0].route, records[0].status) == ("abc", "GET /items/{item_id}", 200)
+
+
+def test_sampled_out_routes_still_log_errors():
+    app = logged_app(sample_rates={"GET /items/{item_id}": 0.0})
+    responses, records = access_records(app, ("/items/1", {}), ("/items/broken", {}))
+
+    assert [response.status_code for response in responses] == [200, 500]
+    assert [record.status for record in records] == [500]
+    assert responses[0].headers["x-request-id"] != responses[1].headers["x-request-id"]
+
+
+def test_tracebacks_cross_the_queue_in_their_own_field():
+    log_queue = queue.Queue()
+    handler = StructuredQueueHandler(log_queue)
+    logger = logging.getLogger("atal.tests.queued")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        try:
+            raise ValueError("bad value")
+        except ValueError:
+            logger.exception("boom %s", "here")
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = True
+
+    entry = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+    assert entry["message"] == "boom here"
+    assert entry["exc_info"].startswith("Traceback") and "ValueError: bad value" in entry["exc_info"]
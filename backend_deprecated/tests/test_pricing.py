@@ -0,0 +1,61 @@
+import pytest
+
+from pricing import BomEstimator, parse_price_range, price_bucket
+
+
+@pytest.mark.parametrize("text, bounds", [
+    ("$20-30", (20.0, 30.0)),
+    ("$5", (5.0, 5.0)),
+    ("₹150 - ₹300", (150.0, 300.0)),
+    ("$1,200-1,500", (1200.0, 1500.0)),
+    ("$4.50 - $2.25", (2.25, 4.5)),
+    ("Contact us", None),
+    (None, None)
+])
+def test_price_ranges_parse_into_bounds(text, bounds):
+    assert parse_price_range(text) == bounds
+
+
+def test_buckets_go_by_the_low_end():
+    assert [price_bucket(text) for text in ("$3-20", "$5", "$15-16", "$30", "free")] == [
+        "under-5", "5-15", "15-30", "30-plus", "unknown"
+    ]
+
+
+def test_estimates_sum_distinct_parts_and_list_unpriced_ones():
+    estimator = BomEstimator()
+    estimator.set_price("esp32", "$8-12")
+    estimator.set_price("dht22", "$3.50")
+    estimator.set_price("mystery", "ask")
+
+    assert estimator.estimate(["esp32", "dht22", "esp32", "mystery", "unknown"]) == {
+        "min": 11.5, "max": 15.5, "unpriced_ids": ["mystery", "unknown"]
+    }
+
+
+def test_price_changes_invalidate_memoized_estimates():
+    estimator = BomEstimator()
+    estimator.set_price("esp32", "$8-12")
+    estimator.set_price("dht22", "$4")
+    assert estimator.estimate(["esp32", "dht22"])["max"] == 16
+    assert estimator.estimate(["dht22"])["max"] == 4
+
+    estimator.set_price("esp32", "$10-20")
+    estimator.remove("dht22")
+    assert estimator.estimate(["esp32", "dht22"]) == {"min": 10, "max": 20, "unpriced_ids": ["dht22"]}
+    assert estimator.estimate(["dht22"])["unpriced_ids"] == ["dht22"]
+
+
+def test_project_costs_resolve_free_form_part_names(monkeypatch):
+    import main
+    from component_resolver import ComponentResolver
+
+    resolver, estimator = ComponentResolver(), BomEstimator()
+    resolver.add("esp32", "ESP32 Dev Board")
+    estimator.set_price("esp32", "$8-12")
+    monkeypatch.setattr(main, "component_resolver", resolver)
+    monkeypatch.setattr(main, "bom_estimator", estimator)
+
+    assert main.with_cost({"requirements": ["esp-32", "Flux capacitor"]})["estimated_cost"] == {
+        "min": 8, "max": 12, "unpriced": ["Flux capacitor"]
+    }
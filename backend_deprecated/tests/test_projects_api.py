@@ -0,0 +1,33 @@
+def project(**fields):
+    return {
+        "title": "Plant monitor", "category": "IoT", "tags": ["garden"], "difficulty": "beginner",
+        "status": "saved", "dateSaved": "2024-05-01T12:00:00", "instructions": "Wire the sensor",
+        "requirements": ["Arduino Uno"], "notes": "", **fields
+    }
+
+
+def test_projects_stored_before_the_caps_still_load(fake_db, api):
+    long_project = project(instructions="x" * 30000, tags=["t"] * 40, title="T" * 300)
+    fake_db.collection("projects").document("legacy")._write(long_project)
+
+    response = api("GET", "/api/projects")
+    assert response.status_code == 200
+    assert [item["instructions"] for item in response.json()] == ["x" * 30000]
+
+
+def test_saves_and_updates_over_the_caps_are_rejected(fake_db, api):
+    assert api("POST", "/api/projects", json=project(instructions="x" * 30000)).status_code == 422
+    assert api("PUT", "/api/projects/p1", json=project(tags=["t"] * 40)).status_code == 422
+
+    saved = api("POST", "/api/projects", json=project())
+    assert saved.status_code == 200
+    assert saved.json()["title"] == "Plant monitor"
+
+
+def test_users_stored_before_the_caps_still_load(fake_db, api):
+    fake_db.collection("users").document("u1")._write({"name": "N" * 300, "email": "a@example.com"})
+
+    response = api("GET", "/api/users/u1")
+    assert response.status_code == 200
+    assert response.json()["name"] == "N" * 300
+    assert api("POST", "/api/users", json={"name": "N" * 300, "email": "a@example.com"}).status_code == 422
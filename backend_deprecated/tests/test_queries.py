@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from queries import INDEXES, components_query, index_config, projects_query
+
+INDEX_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "firestore.indexes.json")
+
+
+class Recorder:
+    """Records the shape of a query instead of running it"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.filters = []
+        self.order = []
+        self.fields = None
+        self.max_results = None
+
+    def where(self, field, op, value):
+        self.filters.append((field, op))
+        return self
+
+    def order_by(self, field, direction="ASCENDING"):
+        self.order.append({"fieldPath": field, "order": direction})
+        return self
+
+    def select(self, fields):
+        self.fields = fields
+        return self
+
+    def limit(self, count):
+        self.max_results = count
+        return self
+
+
+class RecordingClient:
+    def collection(self, name):
+        return Recorder(name)
+
+
+def needs_index(query):
+    # Equality filters followed by the sort order, as Firestore matches composite indexes
+    fields = [{"fieldPath": field, "order": "ASCENDING"} for field, op in query.filters if op == "=="]
+    return fields + query.order
+
+
+@pytest.mark.parametrize("build", [
+    lambda db: components_query(db, ["name"], category="Sensors", limit=20),
+    lambda db: projects_query(db, ["title"], user_id="u1")
+])
+def test_filtered_list_queries_are_ordered_projected_and_indexed(build):
+    query = build(RecordingClient())
+    assert query.order and query.fields
+    assert {"collectionGroup": query.collection, "queryScope": "COLLECTION", "fields": needs_index(query)} in INDEXES
+
+
+def test_unfiltered_list_queries_need_no_composite_index():
+    assert components_query(RecordingClient(), ["name"]).filters == []
+    assert projects_query(RecordingClient(), ["title"]).filters == []
+
+
+def test_index_file_is_up_to_date():
+    with open(INDEX_FILE, encoding="utf-8") as f:
+        assert json.load(f) == index_config()
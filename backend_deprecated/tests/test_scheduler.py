@@ -0,0 +1,59 @@
+import asyncio
+
+import scheduler
+from scheduler import InteractiveLatencyMiddleware
+
+
+def request(path, query=b""):
+    return {"type": "http", "method": "GET", "path": path, "query_string": query}
+
+
+def served_latencies(monkeypatch, *scopes):
+    tracker = scheduler.LatencyTracker()
+    monkeypatch.setattr(scheduler.get_scheduler(), "latency", tracker)
+
+    async def app(scope, receive, send):
+        pass
+
+    async def scenario():
+        middleware = InteractiveLatencyMiddleware(app)
+        for scope in scopes:
+            await middleware(scope, None, None)
+
+    asyncio.run(scenario())
+    return len(tracker._samples)
+
+
+def test_long_polls_are_not_interactive_latency(monkeypatch):
+    assert served_latencies(
+        monkeypatch,
+        request("/api/projects/generate/jobs/j1", b"wait=30"),
+        request("/api/projects/generate/jobs/j1", b"wait=0.5"),
+        request("/api/metrics/datastore")
+    ) == 0
+
+
+def test_ordinary_reads_are_tracked(monkeypatch):
+    assert served_latencies(
+        monkeypatch,
+        request("/api/components"),
+        request("/api/projects/generate/jobs/j1", b"wait=0"),
+        request("/api/components", b"wait=soon")
+    ) == 3
+
+
+def test_background_work_runs_after_max_wait_even_if_traffic_stays_slow():
+    busy = scheduler.PriorityScheduler(max_wait=0.2)
+    for _ in range(50):
+        busy.latency.observe(5000)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await busy.run(scheduler.BATCH, lambda: "done")
+        return result, loop.time() - started
+
+    result, waited = asyncio.run(scenario())
+    busy.shutdown()
+    assert result == "done"
+    assert 0.2 <= waited < 1.0
@@ -0,0 +1,56 @@
+import os
+import pickle
+import stat
+import time
+from datetime import datetime
+
+import pytest
+
+from shared_cache import SharedCache, TieredCache, private_directory
+
+
+class Exploit:
+    def __reduce__(self):
+        return (os.system, ("touch pwned",))
+
+
+def test_values_round_trip_as_json(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"))
+    value = {"name": "Arduino", "updated_at": datetime(2024, 5, 1, 12, 30), "tags": ["a", 1, None]}
+    cache.set("components:1", value, ttl=60)
+    assert cache.get("components:1") == value
+
+
+def test_pickled_entries_are_never_loaded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"))
+    cache._conn.execute(
+        "INSERT INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+        ("components:1", pickle.dumps(Exploit()), time.time() + 60)
+    )
+    assert cache.get("components:1") is None
+    assert not (tmp_path / "pwned").exists()
+
+
+def test_tiered_cache_reads_other_workers_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = TieredCache("idempotency", SharedCache(path))
+    reader = TieredCache("idempotency", SharedCache(path))
+    writer.set("key", ("fingerprint", {"id": "p1"}))
+    fingerprint, result = reader.get("key")
+    assert (fingerprint, result) == ("fingerprint", {"id": "p1"})
+
+
+def test_private_directory_is_owner_only(tmp_path):
+    path = str(tmp_path / "cache")
+    os.makedirs(path, mode=0o777)
+    os.chmod(path, 0o777)
+    private_directory(path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+
+
+def test_private_directory_refuses_symlinks(tmp_path):
+    os.makedirs(tmp_path / "elsewhere")
+    os.symlink(tmp_path / "elsewhere", tmp_path / "cache")
+    with pytest.raises(PermissionError):
+        private_directory(str(tmp_path / "cache"))
@@ -0,0 +1,115 @@
+import asyncio
+
+from cache import PartitionedCache
+from document_loader import DocumentLoader
+from fake_firestore import FakeFirestore
+from tenancy import RoutedClient, for_each_tenant, parse_quotas, use_tenant
+from test_projects_api import project
+from write_behind import WriteBehindBuffer
+
+
+def stored(fake, path, doc_id):
+    collection = fake.collection(path.split("/")[0])
+    parts = path.split("/")[1:]
+    for document_id, collection_id in zip(parts[::2], parts[1::2]):
+        collection = collection.document(document_id).collection(collection_id)
+    return collection.document(doc_id)._read().to_dict()
+
+
+def test_tenant_collections_are_routed_and_the_catalog_is_shared():
+    fake = FakeFirestore()
+    db = RoutedClient(fake)
+    with use_tenant("school-a"):
+        db.collection("projects").document("p1").set({"title": "A"})
+        db.collection("components").document("esp32").set({"name": "ESP32"})
+    db.collection("projects").document("p1").set({"title": "default"})
+
+    assert stored(fake, "tenants/school-a/projects", "p1") == {"title": "A"}
+    assert stored(fake, "projects", "p1") == {"title": "default"}
+    assert stored(fake, "components", "esp32") == {"name": "ESP32"}
+    assert db.tenants() == ["default", "school-a"]
+
+
+def test_for_each_tenant_binds_every_tenant_in_turn():
+    fake = FakeFirestore()
+    db = RoutedClient(fake)
+    for tenant in ("school-b", "school-a"):
+        with use_tenant(tenant):
+            db.collection("users").document("u1").set({"tenant": tenant})
+
+    def count_users(db):
+        return len(list(db.collection("users").stream()))
+
+    assert for_each_tenant(db, count_users) == {"default": 0, "school-a": 1, "school-b": 1}
+
+
+def test_loader_never_shares_a_document_between_tenants():
+    fake = FakeFirestore()
+    db = RoutedClient(fake)
+    loader = DocumentLoader(db, "users")
+    for tenant in ("school-a", "school-b"):
+        with use_tenant(tenant):
+            db.collection("users").document("u1").set({"name": tenant})
+
+    async def load_as(tenant):
+        with use_tenant(tenant):
+            return await loader.load("u1")
+
+    async def scenario():
+        return await asyncio.gather(load_as("school-a"), load_as("school-b"), load_as("default"))
+
+    first, second, default = asyncio.run(scenario())
+    assert (first["name"], second["name"], default) == ("school-a", "school-b", None)
+
+
+def test_write_behind_keeps_tenants_apart_across_a_restart(tmp_path):
+    fake = FakeFirestore()
+    db = RoutedClient(fake)
+    path = str(tmp_path / "writes.journal")
+    crashed = WriteBehindBuffer(db, "projects", path, flush_interval=60)
+
+    async def buffer_then_crash():
+        await crashed.start()
+        for tenant in ("school-a", "school-b"):
+            with use_tenant(tenant):
+                await crashed.put("p1", {"title": tenant})
+        with use_tenant("school-a"):
+            visible = crashed.pending_items()
+        # The process dies before a flush; only the journal survives
+        crashed._task.cancel()
+        crashed._journal.close()
+        return visible
+
+    async def restart():
+        restarted = WriteBehindBuffer(db, "projects", path, flush_interval=60)
+        await restarted.start()
+        await restarted.stop()
+
+    assert asyncio.run(buffer_then_crash()) == [{"title": "school-a", "id": "p1"}]
+    asyncio.run(restart())
+    assert stored(fake, "tenants/school-a/projects", "p1") == {"title": "school-a"}
+    assert stored(fake, "tenants/school-b/projects", "p1") == {"title": "school-b"}
+    assert stored(fake, "projects", "p1") is None
+
+
+def test_busy_tenant_cannot_evict_another_tenants_entries():
+    cache = PartitionedCache(maxsize=4, quotas=parse_quotas("big=8, pilot=2"))
+    cache.set(("quiet", "projects"), ["kept"])
+    for i in range(20):
+        cache.set(("busy", i), i)
+        cache.set(("big", i), i)
+        cache.set(("pilot", i), i)
+
+    assert cache.get(("quiet", "projects")) == ["kept"]
+    assert cache.sizes() == {"quiet": 1, "busy": 4, "big": 8, "pilot": 2}
+
+
+def test_requests_only_see_their_own_tenant(fake_db, api):
+    saved = api("POST", "/api/projects", json=project(title="A's"), headers={"X-Tenant-ID": "school-a"})
+    assert saved.status_code == 200
+
+    own = api("GET", "/api/projects", headers={"X-Tenant-ID": "school-a"})
+    other = api("GET", "/api/projects", headers={"X-Tenant-ID": "school-b"})
+    assert [item["title"] for item in own.json()] == ["A's"]
+    assert other.json() == []
+    assert api("GET", "/api/projects", headers={"X-Tenant-ID": "../etc"}).status_code == 400
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI, Request
+
+from replay_traffic import build_request, synthesize
+from traffic_capture import TrafficCaptureMiddleware, TrafficRecorder, body_shape, pseudonym, sanitize_value
+
+SECRETS = ("ada@example.com", "Ada Lovelace", "user-42", "school-a", "my-token", "key-1", "secret plan")
+
+
+def captured(tmp_path, method, url, **kwargs):
+    app = FastAPI()
+
+    @app.api_route("/api/users/{user_id}", methods=["GET", "POST"])
+    async def user(user_id: str, request: Request):
+        await request.body()
+        return {"id": user_id}
+
+    path = tmp_path / "traffic.jsonl"
+    recorder = TrafficRecorder(str(path))
+    app.add_middleware(TrafficCaptureMiddleware, recorder=recorder)
+
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.request(method, url, **kwargs)
+
+    asyncio.run(send())
+    recorder.close()
+    line = path.read_text(encoding="utf-8")
+    return line, json.loads(line)
+
+
+def test_trace_lines_keep_shapes_and_hashes_but_no_content(tmp_path):
+    line, entry = captured(
+        tmp_path, "POST", "/api/users/user-42?search=Ada%20Lovelace&limit=5&active=true",
+        json={"name": "Ada Lovelace", "email": "ada@example.com", "tags": ["secret plan"], "age": 36},
+        headers={"Authorization": "Bearer my-token", "X-Tenant-ID": "school-a", "Idempotency-Key": "key-1"}
+    )
+
+    assert not any(secret in line for secret in SECRETS)
+    assert (entry["m"], entry["r"], entry["s"]) == ("POST", "/api/users/{user_id}", 200)
+    assert entry["p"] == {"user_id": pseudonym("user-42")}
+    assert entry["q"] == [["search", pseudonym("Ada Lovelace")], ["limit", "5"], ["active", "true"]]
+    assert entry["b"] == {
+        "name": {"str": 12}, "email": {"str": 15}, "tags": {"list": [{"str": 11}], "len": 1}, "age": {"num": "int"}
+    }
+    assert entry["auth"] is True
+    assert (entry["tenant"], entry["idem"]) == (pseudonym("school-a"), pseudonym("key-1"))
+
+
+def test_unrouted_paths_are_not_recorded(tmp_path):
+    line, entry = captured(tmp_path, "GET", "/api/unknown/ada@example.com")
+    assert entry["r"] is None and entry["s"] == 404
+    assert "ada@example.com" not in line
+
+
+def test_sanitizing_keeps_only_numbers_and_booleans():
+    values = [sanitize_value(value) for value in ("12", "0.5", "False", "ada")]
+    assert values == ["12", "0.5", "False", pseudonym("ada")]
+    assert pseudonym("ada") == pseudonym("ada") != pseudonym("bob")
+
+
+def test_replayed_requests_have_the_captured_shape():
+    body = {"title": "Robot", "tags": ["a", "bb"], "steps": 3, "ratio": 0.5, "draft": False, "notes": None}
+    entry = {
+        "m": "PUT", "r": "/api/projects/{project_id}", "p": {"project_id": "h123"}, "q": [["wait", "5"]],
+        "b": body_shape(body), "idem": "h456", "tenant": "h789"
+    }
+
+    request = build_request(entry)
+    assert (request["method"], request["url"], request["params"]) == ("PUT", "/api/projects/h123", [("wait", "5")])
+    assert request["headers"] == {"Idempotency-Key": "h456", "X-Tenant-ID": "h789"}
+    assert body_shape(request["json"]) == body_shape(body)
+    assert synthesize(body_shape(body))["title"] == "xxxxx"
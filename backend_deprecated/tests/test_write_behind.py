@@ -0,0 +1,249 @@
+import asyncio
+import json
+import os
+import time
+
+from fake_firestore import FakeFirestore
+from write_behind import WriteBehindBuffer
+
+
+def journal(path, *records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def stored(db, doc_id):
+    return db.collection("projects").document(doc_id)._read().to_dict()
+
+
+def test_concurrently_starting_workers_adopt_an_orphan_once(tmp_path):
+    base = str(tmp_path / "writes.journal")
+    # Left behind by a worker that has exited (PIDs never reach this high)
+    journal(f"{base}.999999999", {"id": "p1", "data": {"title": "saved"}})
+    first = WriteBehindBuffer(FakeFirestore(), "projects", base, per_process=True)
+    second = WriteBehindBuffer(FakeFirestore(), "projects", base, per_process=True)
+    # Two live workers: PID 1 always exists
+    second.journal_path = f"{base}.1"
+
+    first._recover()
+    second._recover()
+
+    assert first.get("p1") == {"title": "saved"}
+    assert second.get("p1") is None
+
+
+def test_start_tolerates_an_adopted_journal_already_gone(tmp_path, monkeypatch):
+    base = str(tmp_path / "writes.journal")
+    journal(base, {"id": "p1", "data": {"title": "saved"}})
+    db = FakeFirestore()
+    buffer = WriteBehindBuffer(db, "projects", base, per_process=True)
+
+    recover = buffer._recover
+
+    def recover_then_lose_files():
+        adopted = recover()
+        for path in adopted:
+            os.remove(path)
+        return adopted
+
+    monkeypatch.setattr(buffer, "_recover", recover_then_lose_files)
+
+    async def scenario():
+        await buffer.start()
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert stored(db, "p1") == {"title": "saved"}
+
+
+def test_claimed_journal_of_a_dead_adopter_is_adopted_again(tmp_path):
+    base = str(tmp_path / "writes.journal")
+    journal(f"{base}.999999999.from-abcd1234", {"id": "p1", "data": {"title": "saved"}})
+    buffer = WriteBehindBuffer(FakeFirestore(), "projects", base, per_process=True)
+    buffer._recover()
+    assert buffer.get("p1") == {"title": "saved"}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_acknowledged_writes_survive_a_crash(tmp_path):
+    path = str(tmp_path / "writes.journal")
+    db = FakeFirestore()
+
+    async def scenario():
+        crashed = WriteBehindBuffer(db, "projects", path, flush_interval=60)
+        await crashed.start()
+        await crashed.put("p1", {"title": "draft"})
+        await crashed.put("p1", {"notes": "more"})
+        await crashed.put("p2", {"title": "gone"})
+        await crashed.discard("p2")
+        # No flush and no stop: the process dies here
+
+        restarted = WriteBehindBuffer(db, "projects", path, flush_interval=60)
+        await restarted.start()
+        await restarted.stop()
+
+    run(scenario())
+    assert stored(db, "p1") == {"title": "draft", "notes": "more"}
+    assert stored(db, "p2") is None
+
+
+def test_edits_to_one_document_are_coalesced_into_one_write(tmp_path):
+    db = FakeFirestore()
+    buffer = WriteBehindBuffer(db, "projects", str(tmp_path / "writes.journal"), flush_interval=60)
+
+    async def scenario():
+        await buffer.start()
+        calls_before = db.calls
+        await buffer.put("p1", {"title": "a", "notes": "x"})
+        await buffer.put("p1", {"title": "b"})
+        await buffer.put("p1", {"title": "c"})
+        assert buffer.get("p1") == {"title": "c", "notes": "x"}
+        await buffer.flush()
+        return db.calls - calls_before
+
+    assert run(scenario()) == 1
+    assert stored(db, "p1") == {"title": "c", "notes": "x"}
+    # The journal only keeps what is still unflushed
+    assert open(buffer.journal_path).read() == ""
+
+
+def test_delete_after_discard_wins_over_an_in_flight_flush(tmp_path):
+    db = FakeFirestore(latency_ms=100)
+    buffer = WriteBehindBuffer(db, "projects", str(tmp_path / "writes.journal"), flush_interval=60)
+
+    async def scenario():
+        await buffer.start()
+        await buffer.put("p1", {"title": "draft"})
+        flushing = asyncio.ensure_future(buffer.flush())
+        await asyncio.sleep(0.02)  # the batch commit is now in flight
+        await buffer.discard("p1")
+        db.collection("projects").document("p1").delete()
+        await flushing
+        await buffer.stop()
+
+    run(scenario())
+    assert stored(db, "p1") is None
+
+
+def test_journal_fsync_happens_off_the_event_loop(tmp_path, monkeypatch):
+    import write_behind
+
+    fsyncs = []
+
+    def slow_fsync(fd):
+        fsyncs.append(fd)
+        time.sleep(0.2)
+
+    monkeypatch.setattr(write_behind.os, "fsync", slow_fsync)
+    buffer = WriteBehindBuffer(FakeFirestore(), "projects", str(tmp_path / "writes.journal"), flush_interval=60)
+
+    async def scenario():
+        await buffer.start()
+        fsyncs.clear()
+        gaps = []
+
+        async def ticker():
+            last = time.perf_counter()
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticking = asyncio.ensure_future(ticker())
+        await asyncio.gather(*(buffer.put(f"p{i}", {"title": str(i)}) for i in range(20)))
+        await ticking
+        return max(gaps)
+
+    longest_stall = run(scenario())
+    assert longest_stall < 0.1
+    # Concurrent edits share fsyncs
+    assert len(fsyncs) < 20
+
+
+def test_discard_and_stop_are_not_held_up_by_backoff(tmp_path, monkeypatch):
+    import scheduler
+
+    busy = scheduler.PriorityScheduler(max_wait=60)
+    for _ in range(50):
+        busy.latency.observe(5000)
+    monkeypatch.setattr(scheduler, "_scheduler", busy)
+    db = FakeFirestore()
+    buffer = WriteBehindBuffer(db, "projects", str(tmp_path / "writes.journal"), flush_interval=60)
+
+    async def scenario():
+        await buffer.start()
+        await buffer.put("p1", {"title": "draft"})
+        await buffer.put("p2", {"title": "kept"})
+        flushing = asyncio.ensure_future(buffer.flush())  # backing off
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(buffer.discard("p1"), timeout=1)
+        await asyncio.wait_for(buffer.stop(), timeout=1)
+        flushing.cancel()
+
+    run(scenario())
+    busy.shutdown()
+    assert stored(db, "p1") is None
+    assert stored(db, "p2") == {"title": "kept"}
+
+
+def test_writes_being_committed_stay_readable(tmp_path):
+    db = FakeFirestore(latency_ms=100)
+    buffer = WriteBehindBuffer(db, "projects", str(tmp_path / "writes.journal"), flush_interval=60)
+    seen = {}
+
+    async def scenario():
+        await buffer.start()
+        await buffer.put("p1", {"title": "draft", "notes": "x"})
+        flushing = asyncio.ensure_future(buffer.flush(backoff=False))
+        await asyncio.sleep(0.05)  # the batch commit is now in flight
+        await buffer.put("p1", {"title": "newer"})
+        seen["get"] = buffer.get("p1")
+        seen["items"] = buffer.pending_items()
+        await flushing
+        await buffer.stop()
+
+    run(scenario())
+    assert seen["get"] == {"title": "newer", "notes": "x"}
+    assert seen["items"] == [{"title": "newer", "notes": "x", "id": "p1"}]
+    assert stored(db, "p1") == {"title": "newer", "notes": "x"}
+
+
+def test_document_discarded_during_a_failed_commit_is_not_restored(tmp_path, monkeypatch):
+    path = str(tmp_path / "writes.journal")
+    db = FakeFirestore()
+    buffer = WriteBehindBuffer(db, "projects", path, flush_interval=60)
+
+    def failing_commit(writes):
+        time.sleep(0.1)
+        raise RuntimeError("unavailable")
+
+    async def scenario():
+        await buffer.start()
+        await buffer.put("p1", {"title": "deleted"})
+        await buffer.put("p2", {"title": "kept"})
+        monkeypatch.setattr(buffer, "_commit", failing_commit)
+        flushing = asyncio.ensure_future(buffer.flush(backoff=False))
+        await asyncio.sleep(0.05)
+        await buffer.discard("p1")
+        assert buffer.get("p1") is None
+        await flushing
+
+        # A restart replays the journal the failed flush left behind
+        restarted = WriteBehindBuffer(db, "projects", path, flush_interval=60)
+        restarted._recover()
+        replayed = restarted.pending_items()
+
+        monkeypatch.undo()
+        await buffer.flush(backoff=False)
+        await buffer.stop()
+        return replayed
+
+    replayed = run(scenario())
+    assert replayed == [{"title": "kept", "id": "p2"}]
+    assert stored(db, "p1") is None
+    assert stored(db, "p2") == {"title": "kept"}
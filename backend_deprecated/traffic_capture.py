@@ -0,0 +1,153 @@
+"""
+Sanitized traffic capture for offline replay
+Each request is written as one compact JSON line: arrival offset, method,
+route template, pseudonymized path and query values, the shape of the JSON
+body (types and lengths, never content) and the observed status and latency.
+Identifiers are replaced by stable hashes, so repeated reads of the same
+document stay repeated in the trace without revealing which one it was.
+Lines are written by a background thread. Replay them with replay_traffic.py.
+"""
+
+import hashlib
+import json
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl
+
+# Largest body inspected for its shape; bigger ones are recorded by size only
+MAX_SHAPE_BYTES = 64 * 1024
+MAX_SHAPE_ITEMS = 20
+
+
+def pseudonym(value: str) -> str:
+    return "h" + hashlib.sha256(value.encode()).hexdigest()[:12]
+
+
+def sanitize_value(value: str) -> str:
+    """Numbers and booleans are kept; anything else may identify someone"""
+    if value.lower() in ("true", "false"):
+        return value
+    try:
+        float(value)
+        return value
+    except ValueError:
+        return pseudonym(value)
+
+
+def body_shape(value: Any) -> Any:
+    """Structure of a JSON value with strings reduced to their lengths"""
+    if isinstance(value, dict):
+        return {key: body_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return {"list": [body_shape(item) for item in value[:MAX_SHAPE_ITEMS]], "len": len(value)}
+    if isinstance(value, str):
+        return {"str": len(value)}
+    if isinstance(value, bool) or value is None:
+        return value
+    return {"num": type(value).__name__}
+
+
+class TrafficRecorder:
+    """Appends trace lines to a file from a background thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.monotonic()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write, name="traffic-capture", daemon=True)
+        self._thread.start()
+
+    def record(self, entry: Dict[str, Any]):
+        self._queue.put(entry)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _write(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    break
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                if self._queue.empty():
+                    f.flush()
+
+
+class TrafficCaptureMiddleware:
+    """Records a sampled, sanitized trace of every HTTP request"""
+
+    def __init__(self, app, recorder: TrafficRecorder, sample_rate: float = 1.0):
+        self.app = app
+        self.recorder = recorder
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.monotonic()
+        body = bytearray()
+        body_size = 0
+        status_code = 500
+
+        async def capture_receive():
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                if body_size <= MAX_SHAPE_BYTES:
+                    body.extend(chunk)
+            return message
+
+        async def capture_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            self.recorder.record(self._entry(scope, arrived, bytes(body), body_size, status_code))
+
+    def _entry(self, scope, arrived: float, body: bytes, body_size: int, status_code: int) -> Dict[str, Any]:
+        headers = dict(scope.get("headers", []))
+        matched = scope.get("route")
+        entry = {
+            "t": round(arrived - self.recorder.started, 4),
+            "m": scope["method"],
+            # Unmatched paths may embed identifiers, so only routed templates are kept
+            "r": matched.path if matched is not None else None,
+            "p": {key: pseudonym(str(value)) for key, value in scope.get("path_params", {}).items()},
+            "q": [[key, sanitize_value(value)] for key, value in parse_qsl(scope.get("query_string", b"").decode("latin-1"))],
+            "s": status_code,
+            "ms": round((time.monotonic() - arrived) * 1000, 2)
+        }
+        if b"authorization" in headers:
+            entry["auth"] = True
+        if b"x-tenant-id" in headers:
+            entry["tenant"] = pseudonym(headers[b"x-tenant-id"].decode("latin-1"))
+        if b"idempotency-key" in headers:
+            entry["idem"] = pseudonym(headers[b"idempotency-key"].decode("latin-1"))
+        if body_size:
+            entry["bytes"] = body_size
+            shape = self._shape(body, body_size)
+            if shape is not None:
+                entry["b"] = shape
+        return entry
+
+    @staticmethod
+    def _shape(body: bytes, body_size: int) -> Optional[Any]:
+        if body_size > MAX_SHAPE_BYTES:
+            return None
+        try:
+            return body_shape(json.loads(body))
+        except ValueError:
+            return None
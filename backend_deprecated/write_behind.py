@@ -0,0 +1,387 @@
+"""
+Write-behind buffer for Firestore document writes
+Writes are acknowledged once they are journaled locally, coalesced per
+document, and committed to Firestore in batches on an interval or when the
+buffer fills up. The journal is replayed on startup so nothing acknowledged
+is lost if the process dies before a flush. Journal appends are written and
+fsynced on a dedicated thread, one fsync per group of concurrent edits, so a
+slow disk delays only the edits waiting on it. Buffered writes belong to the
+tenant that made them and are only visible to, and committed for, that tenant.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import scheduler
+from tenancy import DEFAULT_TENANT, tenant_for, use_tenant
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batches with more than 500 writes
+MAX_BATCH_WRITES = 500
+
+
+def _encode(value: Any):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Cannot journal value of type {type(value).__name__}")
+
+
+def _decode(obj: Dict[str, Any]):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def _write_lines(path: str, lines: List[str]):
+    """Atomically replace a file with `lines`, durably"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as journal:
+        journal.writelines(lines)
+        journal.flush()
+        os.fsync(journal.fileno())
+    os.replace(tmp_path, path)
+
+
+def _settle(future: asyncio.Future, error: Optional[BaseException]):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(None)
+
+
+class JournalWriter:
+    """Appends to a journal on a background thread, one fsync per group of writes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="write-behind-journal", daemon=True)
+        self._thread.start()
+
+    def append(self, line: str) -> asyncio.Future:
+        """Future that resolves once `line` is on disk"""
+        return self._submit("append", line)
+
+    def replace(self, lines: List[str]) -> asyncio.Future:
+        """Future that resolves once the journal holds exactly `lines`"""
+        return self._submit("replace", lines)
+
+    def close(self):
+        """Finish queued writes and stop the thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _submit(self, kind: str, payload) -> asyncio.Future:
+        # Queue order is submission order, so the journal replays in the order edits were made
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((kind, payload, loop, future))
+        return future
+
+    def _run(self):
+        while True:
+            group = [self._queue.get()]
+            while True:
+                try:
+                    group.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            operations = [operation for operation in group if operation is not None]
+            error = None
+            try:
+                if self._file.closed:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                unsynced = False
+                for kind, payload, _, _ in operations:
+                    if kind == "append":
+                        self._file.write(payload)
+                        unsynced = True
+                    else:
+                        # Earlier appends are superseded by the new contents
+                        self._file.close()
+                        _write_lines(self.path, payload)
+                        self._file = open(self.path, "a", encoding="utf-8")
+                        unsynced = False
+                if unsynced:
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+            except Exception as e:
+                error = e
+                logger.error("Write-behind journal write failed", extra={"path": self.path, "error": str(e)})
+
+            for _, _, loop, future in operations:
+                loop.call_soon_threadsafe(_settle, future, error)
+            if len(operations) < len(group):
+                self._file.close()
+                return
+
+
+class WriteBehindBuffer:
+    """Coalescing, journaled write buffer for one Firestore collection"""
+
+    def __init__(
+        self,
+        db,
+        collection: str,
+        journal_path: str,
+        flush_interval: float = 0.5,
+        max_pending: int = 200,
+        per_process: bool = False
+    ):
+        self.db = db
+        self.collection = collection
+        # With several worker processes each one keeps its own journal
+        self.base_journal_path = journal_path
+        self.journal_path = f"{journal_path}.{os.getpid()}" if per_process else journal_path
+        self.per_process = per_process
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        # (tenant, doc_id) -> merged fields
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # The batch a flush is committing right now
+        self._committing: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Documents of that batch deleted while it was committing
+        self._discarded: Set[Tuple[str, str]] = set()
+        self._journal: Optional[JournalWriter] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Replay any journaled writes and start the background flusher"""
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        adopted = self._recover()
+        _write_lines(self.journal_path, self._journal_lines())
+        for path in adopted:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._journal = JournalWriter(self.journal_path)
+        await self.flush()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop the flusher and commit everything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush(backoff=False)
+        if self._journal is not None:
+            await asyncio.to_thread(self._journal.close)
+            self._journal = None
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Return the buffered (not yet committed) fields for a document"""
+        return self._buffered(self._key(doc_id))
+
+    def has_pending(self, doc_id: str) -> bool:
+        """Whether the document has writes buffered or still being committed"""
+        key = self._key(doc_id)
+        return key in self._pending or key in self._committing
+
+    def pending_items(self) -> List[Dict[str, Any]]:
+        """Return copies of every buffered document of the current tenant, with its ID"""
+        tenant = tenant_for(self.collection)
+        keys = dict.fromkeys(key for key in [*self._committing, *self._pending] if key[0] == tenant)
+        items = []
+        for key in keys:
+            data = self._buffered(key)
+            if data is not None:
+                items.append(dict(data, id=key[1]))
+        return items
+
+    async def put(self, doc_id: str, data: Dict[str, Any]):
+        """Buffer a merge-write of `data` into the document"""
+        key = self._key(doc_id)
+        durable = self._append(self._record(key, data=data))
+        # Visible right away; acknowledged once journaled
+        self._pending[key] = {**self._pending.get(key, {}), **data}
+
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+        await durable
+
+    async def discard(self, doc_id: str):
+        """Drop buffered writes for a document that is being deleted"""
+        key = self._key(doc_id)
+        committing = key in self._committing
+        if committing:
+            # Keep a failed commit from putting the document back
+            self._discarded.add(key)
+        if self._pending.pop(key, None) is not None or committing:
+            await self._append(self._record(key, discard=True))
+
+        # Let an in-flight commit land first so the caller's delete wins
+        async with self._flush_lock:
+            pass
+
+    async def flush(self, backoff: bool = True):
+        """Commit all buffered writes to Firestore in batches"""
+        if not self._pending:
+            return
+        # Back off before taking the lock, so discard() isn't held up by slow traffic
+        if backoff:
+            await scheduler.get_scheduler().wait_for_headroom(scheduler.BATCH)
+
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            batch, self._pending = self._pending, {}
+            self._committing = batch
+            try:
+                await scheduler.get_scheduler().execute(scheduler.BATCH, self._commit, batch)
+            except Exception as e:
+                # Put the failed writes back underneath anything newer
+                for key, data in batch.items():
+                    if key in self._discarded:
+                        continue
+                    self._pending[key] = {**data, **self._pending.get(key, {})}
+                logger.error(
+                    "Write-behind flush failed",
+                    extra={"collection": self.collection, "documents": len(batch), "error": str(e)}
+                )
+                return
+            finally:
+                self._committing = {}
+                self._discarded = set()
+
+            # Keep only writes that arrived while the batch was committing
+            await self._journal.replace(self._journal_lines())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _commit(self, writes: Dict[Tuple[str, str], Dict[str, Any]]):
+        refs = {}
+        for tenant, doc_id in writes:
+            if tenant not in refs:
+                with use_tenant(tenant):
+                    refs[tenant] = self.db.collection(self.collection)
+        items = list(writes.items())
+        for start in range(0, len(items), MAX_BATCH_WRITES):
+            batch = self.db.batch()
+            for (tenant, doc_id), data in items[start:start + MAX_BATCH_WRITES]:
+                batch.set(refs[tenant].document(doc_id), data, merge=True)
+            batch.commit()
+
+    def _buffered(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        # Writes still being committed are not in Firestore yet; newer ones go on top
+        committing = self._committing.get(key) if key not in self._discarded else None
+        pending = self._pending.get(key)
+        if committing is None and pending is None:
+            return None
+        return {**(committing or {}), **(pending or {})}
+
+    def _key(self, doc_id: str) -> Tuple[str, str]:
+        return tenant_for(self.collection), doc_id
+
+    @staticmethod
+    def _record(key: Tuple[str, str], **fields) -> Dict[str, Any]:
+        tenant, doc_id = key
+        record = {"id": doc_id, **fields}
+        # Journals written before tenancy have no tenant field
+        if tenant != DEFAULT_TENANT:
+            record["tenant"] = tenant
+        return record
+
+    def _append(self, record: Dict[str, Any]) -> asyncio.Future:
+        if self._journal is None:
+            raise RuntimeError("Write-behind buffer has not been started")
+        return self._journal.append(json.dumps(record, default=_encode) + "\n")
+
+    def _recover(self) -> List[str]:
+        """Replay our journal plus any left behind by dead workers"""
+        paths = [self.journal_path]
+        if self.per_process:
+            orphans = [self.base_journal_path] + [
+                path for path in glob.glob(f"{self.base_journal_path}.*")
+                if path != self.journal_path and not path.endswith(".tmp") and (
+                    # Adopted by an earlier process that had our PID
+                    path.startswith(self.journal_path + ".") or _is_orphaned(path, self.base_journal_path)
+                )
+            ]
+            # Workers starting together see the same orphans; only one may adopt each
+            paths += [claimed for claimed in map(self._claim, orphans) if claimed is not None]
+
+        recovered = []
+        for path in paths:
+            try:
+                journal = open(path, encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            with journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line, object_hook=_decode)
+                    except ValueError:
+                        # A torn final line from a crash mid-write
+                        continue
+                    key = (record.get("tenant", DEFAULT_TENANT), record["id"])
+                    if record.get("discard"):
+                        self._pending.pop(key, None)
+                    else:
+                        self._pending[key] = {**self._pending.get(key, {}), **record["data"]}
+            recovered.append(path)
+
+        if self._pending:
+            logger.info(
+                "Recovered buffered writes",
+                extra={"collection": self.collection, "documents": len(self._pending), "journals": recovered}
+            )
+        return [path for path in recovered if path != self.journal_path]
+
+    def _claim(self, path: str) -> Optional[str]:
+        """Atomically take over another journal; None if someone else got it first"""
+        # Named after our own journal, so it is adopted in turn if we die before merging it
+        claimed = f"{self.journal_path}.from-{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def _journal_lines(self) -> List[str]:
+        return [json.dumps(self._record(key, data=data), default=_encode) + "\n" for key, data in self._pending.items()]
+
+
+def _is_orphaned(journal_path: str, base_path: str) -> bool:
+    """True if the worker that owned a per-process journal is no longer running"""
+    # <base>.<pid>, or <base>.<pid>.from-<token> for journals that worker adopted
+    suffix = journal_path[len(base_path) + 1:]
+    pid = suffix.split(".", 1)[0]
+    if not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False